@@ -1,5 +1,5 @@
 """Builds project-wide context from scanner outputs and keeps cache updated."""
-import time, os, json
+import time, os, json, threading
 class ContextManager:
     def self_check(self, workspace=None):
         report = {'cache_available': self.cache is not None, 'optimizer_import': False, 'coordination_import': False, 'validator_import': False, 'visualizer_import': False, 'suggestion_test': None}
@@ -25,26 +25,19 @@ class ContextManager:
             report['visualizer_import'] = str(e)
         # 测试建议生成
         try:
-            optimizer = ProjectLogicOptimizer(workspace or os.getcwd())
-            coordination = GlobalCoordinationTester(workspace or os.getcwd())
-            validator = SystemLogicValidator(workspace or os.getcwd())
-            visualizer = StructureVisualizer(workspace or os.getcwd())
-            logic_report = optimizer.generate_optimization_report()
-            coord_report = coordination.generate_coordination_report()
-            sys_report = validator.validate_system_logic()
-            struct_data = visualizer.get_project_structure()
-            struct_analysis = struct_data.get('analysis', {})
-            suggestions = []
-            suggestions.extend(logic_report.get('recommendations', []))
-            suggestions.extend(coord_report.get('recommendations', []))
-            suggestions.extend(sys_report.get('recommendations', []))
-            suggestions.extend(struct_analysis.get('suggestions', []))
+            from utils.suggestion_engine import collect_global_suggestions
+            suggestions = collect_global_suggestions(workspace or os.getcwd())
             report['suggestion_test'] = {'success': bool(suggestions), 'suggestions': suggestions}
         except Exception as e:
             report['suggestion_test'] = {'success': False, 'error': str(e)}
         return report
-    def __init__(self, cache=None):
+    def __init__(self, cache=None, dispatcher=None, context_ttl=None):
         self.cache = cache
+        self.dispatcher = dispatcher
+        self.context_ttl = context_ttl
+        self.context = None
+        self.watcher = None
+        self._patch_lock = threading.Lock()
     async def build_context(self, scan_results, workspace=None):
         ctx = {'generated_at': time.time(), 'workspace': workspace, 'summary':{}, 'files':{}, 'security':[]}
         for name, r in scan_results.items():
@@ -77,35 +70,70 @@ class ContextManager:
         # 11. 防范措施：安全扫描、敏感信息检测、环境加密、提前预警，保障项目安全
         # 12. 优化建议部署：每次任务完成后自动输出一条全局优化建议，持续完善项目结构、安全体系、规则、执行力、全局观
         try:
-            from utils.project_logic_optimizer import ProjectLogicOptimizer
-            from utils.global_coordination_tester import GlobalCoordinationTester
-            from utils.system_logic_validator import SystemLogicValidator
-            from utils.structure_visualizer import StructureVisualizer
-            optimizer = ProjectLogicOptimizer(workspace or os.getcwd())
-            coordination = GlobalCoordinationTester(workspace or os.getcwd())
-            validator = SystemLogicValidator(workspace or os.getcwd())
-            visualizer = StructureVisualizer(workspace or os.getcwd())
-            logic_report = optimizer.generate_optimization_report()
-            coord_report = coordination.generate_coordination_report()
-            sys_report = validator.validate_system_logic()
-            struct_data = visualizer.get_project_structure()
-            struct_analysis = struct_data.get('analysis', {})
-            suggestions = []
-            # 逐项收集各维度建议
-            suggestions.extend(logic_report.get('recommendations', [])) # 架构、逻辑、依赖、队列化
-            suggestions.extend(coord_report.get('recommendations', [])) # 协作、交互、分工
-            suggestions.extend(sys_report.get('recommendations', []))   # 自愈、安全、兼容性
-            suggestions.extend(struct_analysis.get('suggestions', []))  # 结构、关键路径、耦合点
-            if not suggestions:
-                suggestions.append('项目结构与逻辑良好，无需优化。建议持续关注安全与协作。')
+            # 逐项收集各维度建议（见 utils.suggestion_engine.collect_global_suggestions）
+            from utils.suggestion_engine import collect_global_suggestions
+            suggestions = collect_global_suggestions(workspace or os.getcwd())
             # 详细注释每条建议的来源和优化点，便于AI学习
             ctx['global_optimization_suggestions'] = suggestions
         except Exception as e:
             ctx['global_optimization_suggestions'] = [f'全局优化建议生成失败: {e}']
 
-        if self.cache:
-            self.cache.set('latest_context', ctx)
+        self.context = ctx
+        self._publish()
         return ctx
 
+    def _publish(self):
+        if self.cache is not None and self.context is not None:
+            self.cache.set('latest_context', self.context, ttl=self.context_ttl)
+
+    def apply_changes(self, changed, removed=()):
+        """增量更新：只对变更文件重新运行扫描器，原地修补 files/summary/security"""
+        ctx = self.context
+        if ctx is None or self.dispatcher is None:
+            return None
+        changed = [f for f in changed if os.path.isfile(f)]
+        results = self.dispatcher.run_on_paths(changed) if changed else {}
+        touched = set(changed) | set(removed)
+        with self._patch_lock:
+            for f in removed:
+                ctx['files'].pop(f, None)
+            for name, summary in ctx['summary'].items():
+                r = results.get(name, {})
+                if 'error' in r: continue
+                new_files = r.get('files', [])
+                if 'files' in summary:
+                    summary['files'] = [f for f in summary['files'] if f not in touched] + new_files
+                if 'dependencies' in summary:
+                    for f in touched: summary['dependencies'].pop(f, None)
+                    summary['dependencies'].update(r.get('dependencies', {}))
+                if 'complexity' in summary:
+                    summary['complexity'] = [c for c in summary['complexity'] if c.get('file') not in touched] + r.get('complexity', [])
+            for name, r in results.items():
+                for f in r.get('files', []):
+                    ctx['files'].setdefault(f, {})
+            security = [s for s in ctx['security'] if s.get('file') not in touched]
+            seen = {(s.get('file'), s.get('match')) for s in security}
+            for r in results.values():
+                for s in r.get('security_findings', []):
+                    key = (s.get('file'), s.get('match'))
+                    if key in seen: continue
+                    seen.add(key); security.append(s)
+            ctx['security'] = security
+            ctx['updated_at'] = time.time()
+            ctx.setdefault('incremental_updates', 0)
+            ctx['incremental_updates'] += 1
+        self._publish()
+        return ctx
+
+    def watch(self, roots, interval=1.0, debounce=0.5):
+        """启动后台文件监听，变更批量回灌到 apply_changes，上下文不再因 TTL 过期而丢失"""
+        from utils.workspace_watcher import WorkspaceWatcher
+        if self.watcher is None:
+            self.context_ttl = float('inf')
+            self._publish()
+            settings = getattr(self.dispatcher, 'settings', None)
+            self.watcher = WorkspaceWatcher(roots, self.apply_changes, interval=interval, debounce=debounce, settings=settings).start()
+        return self.watcher
+
 if __name__ == "__main__":
     print("ContextManager 仅作为模块使用，不建议直接运行。")
@@ -8,7 +8,13 @@ async def main():
     cache = MemoryCache()
     ctxm = ContextManager(cache=cache)
     ml = ModelLoader()
-    ml_info = ml.load_model()
+    # 控制台整个生命周期都持有模型，退出时归还
+    ml_info, release_model = ml.acquire_model()
+    try:
+        await _loop(cache, ml_info)
+    finally:
+        release_model()
+async def _loop(cache, ml_info):
     print('Interactive console. Type exit to quit.')
     while True:
         q = input('> ')
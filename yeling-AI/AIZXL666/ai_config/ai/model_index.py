@@ -0,0 +1,153 @@
+"""Single-pass model file discovery: one scandir walk classifies every supported suffix, with an optional persisted directory index."""
+import os, json, time, threading, logging
+from pathlib import Path
+LOG = logging.getLogger('ai_assistant.model_index')
+# 后缀 -> 模型类别；ModelLoader.SUPPORTED_FORMATS 与 server.find_models 共用
+MODEL_FORMATS = {
+    '.gguf': 'LLM', '.bin': 'LLM', '.pt': 'LLM/CV', '.pth': 'LLM/CV', '.onnx': 'LLM/CV', '.pb': 'CV', '.h5': 'CV/语音', '.tflite': 'CV/语音'
+}
+INDEX_VERSION = 1
+# 目录 mtime 距扫描时刻不足该秒数时不缓存其列表（文件系统时间戳粒度内的修改可能不会改变 mtime）
+RACY_WINDOW = 2.0
+
+class ModelIndex:
+    """一次 scandir 遍历按后缀分类所有模型文件，文件大小与修改时间直接取自 DirEntry.stat()。
+
+    每个目录的列表（子目录名、模型文件名）按目录 mtime 缓存：目录中增删或改名文件都会改变它的 mtime，
+    因此 mtime 未变的目录不再列举，只重新 stat 其中的模型文件，再按缓存的子目录继续向下。
+    指定 index_path 时缓存以 JSON 持久化，进程重启后同样生效。
+    """
+    def __init__(self, formats=None, index_path=None):
+        self.formats = dict(formats or MODEL_FORMATS)
+        self.index_path = Path(index_path) if index_path else None
+        self._dirs = {}   # 目录 -> {'mtime': ns, 'subdirs': [名称], 'files': [名称]}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.stats = {'scans': 0, 'dirs_listed': 0, 'dirs_reused': 0, 'files': 0}
+        self._load()
+
+    def _signature(self):
+        return sorted(self.formats)
+
+    def _load(self):
+        if self.index_path is None or not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION and data.get('formats') == self._signature():
+                self._dirs = data.get('dirs', {})
+        except Exception as e:
+            LOG.warning('model index %s unreadable, rebuilding: %s', self.index_path, e)
+
+    def save(self):
+        """原子写入持久化索引（先写临时文件再替换）"""
+        if self.index_path is None or not self._dirty:
+            return
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.index_path.with_name(self.index_path.name + '.tmp')
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': INDEX_VERSION, 'formats': self._signature(), 'dirs': self._dirs}, f, ensure_ascii=False)
+            os.replace(tmp, self.index_path)
+            self._dirty = False
+        except OSError as e:
+            LOG.warning('could not save model index %s: %s', self.index_path, e)
+
+    def _record(self, path, name, st):
+        return {'path': path, 'type': self.formats[os.path.splitext(name)[1].lower()], 'name': name,
+                'size': st.st_size, 'last_modified': st.st_mtime}
+
+    def _list_dir(self, d, dir_st, now, found):
+        subdirs, files = [], []
+        with os.scandir(d) as it:
+            for e in it:
+                try:
+                    if e.is_dir():
+                        subdirs.append(e.name)
+                    elif os.path.splitext(e.name)[1].lower() in self.formats and e.is_file():
+                        found.append(self._record(e.path, e.name, e.stat()))
+                        files.append(e.name)
+                except OSError:
+                    continue
+        self.stats['dirs_listed'] += 1
+        if now - dir_st.st_mtime > RACY_WINDOW:
+            self._dirs[d] = {'mtime': dir_st.st_mtime_ns, 'subdirs': subdirs, 'files': files}
+            self._dirty = True
+        else:
+            self._dirs.pop(d, None)
+        return subdirs
+
+    def scan(self, roots, max_depth=None):
+        """遍历 roots（不存在的目录跳过），返回模型记录列表 {'path','type','name','size','last_modified'}。
+
+        max_depth=0 只看根目录本身；符号链接目录会被跟随，同一目录（设备号 + inode）只访问一次。
+        """
+        with self._lock:
+            self.stats['scans'] += 1
+            found, visited_dirs, seen = [], set(), set()
+            now = time.time()
+            for root in roots:
+                if not root or not os.path.isdir(root):
+                    continue
+                stack = [(os.path.realpath(root), 0)]
+                while stack:
+                    d, depth = stack.pop()
+                    try:
+                        st = os.stat(d)
+                    except OSError:
+                        continue
+                    if (st.st_dev, st.st_ino) in seen:
+                        continue
+                    seen.add((st.st_dev, st.st_ino))
+                    visited_dirs.add(d)
+                    cached = self._dirs.get(d)
+                    try:
+                        if cached is not None and cached['mtime'] == st.st_mtime_ns:
+                            self.stats['dirs_reused'] += 1
+                            for name in cached['files']:
+                                path = os.path.join(d, name)
+                                try:
+                                    found.append(self._record(path, name, os.stat(path)))
+                                except OSError:
+                                    continue
+                            subdirs = cached['subdirs']
+                        else:
+                            subdirs = self._list_dir(d, st, now, found)
+                    except OSError:
+                        continue
+                    if max_depth is None or depth < max_depth:
+                        stack.extend((os.path.join(d, n), depth + 1) for n in reversed(subdirs))
+            if max_depth is None:
+                # 完整遍历后清掉根目录下已不存在的目录
+                roots_real = [os.path.realpath(r) for r in roots if r and os.path.isdir(r)]
+                for d in [d for d in self._dirs if d not in visited_dirs]:
+                    if any(d == r or d.startswith(r + os.sep) for r in roots_real):
+                        del self._dirs[d]
+                        self._dirty = True
+            self.stats['files'] = len(found)
+            self.save()
+            return found
+
+_INDEXES = {}
+_INDEXES_LOCK = threading.Lock()
+
+def get_model_index(index_path=None, formats=None):
+    """按 (index_path, 后缀集合) 共享索引实例，ModelLoader、server 与 StructureVisualizer 因此共用同一份目录缓存"""
+    key = (str(index_path) if index_path else None, tuple(sorted(formats or MODEL_FORMATS)))
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = _INDEXES[key] = ModelIndex(formats, index_path)
+        return index
+
+def discovery_settings(settings=None, base_dir=None):
+    """从 settings['model']['discovery'] 取 (max_depth, index_path)；相对路径按 ai_config 目录解析"""
+    conf = ((settings or {}).get('model') or {}).get('discovery') or {}
+    index_path = conf.get('index_path')
+    if index_path and not os.path.isabs(index_path):
+        index_path = os.path.join(base_dir or Path(__file__).resolve().parent.parent, index_path)
+    return conf.get('max_depth'), index_path
+
+if __name__ == "__main__":
+    print("ModelIndex 仅作为模块使用，不建议直接运行。")
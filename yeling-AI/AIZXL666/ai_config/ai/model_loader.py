@@ -1,170 +1,11 @@
-    def download_model(self, url, target_dir=None):
-        """
-        自动下载模型文件，支持 huggingface hub、公开URL。
-        """
-        import os, requests
-        from pathlib import Path
-        target_dir = Path(target_dir or self.DEFAULT_DIRS[0])
-        target_dir.mkdir(parents=True, exist_ok=True)
-        fname = url.split('/')[-1]
-        fpath = target_dir / fname
-        try:
-            if 'huggingface.co' in url:
-                # 简单支持：下载权重文件
-                r = requests.get(url, stream=True)
-                with open(fpath, 'wb') as fh:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        fh.write(chunk)
-            else:
-                r = requests.get(url, stream=True)
-                with open(fpath, 'wb') as fh:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        fh.write(chunk)
-            return {'success': True, 'path': str(fpath)}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
-
-    def update_model(self, model_path, new_version_url):
-        """
-        自动更新模型：下载新版本并替换原模型，备份旧版本。
-        """
-        import shutil, os
-        from pathlib import Path
-        model_path = Path(model_path)
-        backup_path = model_path.with_suffix(model_path.suffix + '.bak')
-        try:
-            shutil.copy2(model_path, backup_path)
-            dl_result = self.download_model(new_version_url, model_path.parent)
-            if dl_result['success']:
-                os.replace(dl_result['path'], str(model_path))
-                return {'success': True, 'backup': str(backup_path), 'updated': str(model_path)}
-            else:
-                return {'success': False, 'error': dl_result['error']}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
-
-    def rollback_model(self, model_path, backup_path=None):
-        """
-        回滚模型到备份版本。
-        """
-        import shutil, os
-        from pathlib import Path
-        model_path = Path(model_path)
-        backup_path = Path(backup_path or model_path.with_suffix(model_path.suffix + '.bak'))
-        try:
-            if backup_path.exists():
-                shutil.copy2(backup_path, model_path)
-                return {'success': True, 'restored': str(model_path)}
-            else:
-                return {'success': False, 'error': '备份文件不存在'}
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
-
-    def get_model_metadata(self, model_info):
-        meta = {
-            'name': model_info['name'],
-            'path': model_info['path'],
-            'type': model_info['type'],
-            'size': model_info['size'],
-            'last_modified': model_info['mtime'],
-            'backend': 'unknown',
-            'error': None,
-            'version': None,
-            'source': None,
-            'download_time': None
-        }
-        # 可扩展：参数量、依赖、用途、来源、下载时间等
-        return meta
-    def auto_infer_and_check(self, model_path=None):
-        """
-        自动推理健康检查：根据模型类型自动生成测试输入，运行推理并校验输出 shape。
-        支持 transformers、diffusers、onnx、keras、torch、paddlepaddle 等主流模型。
-        """
-        import traceback
-        result = {'model_path': model_path, 'backend': None, 'success': False, 'output_shape': None, 'error': None}
-        mlist = self.find_all_models()
-        minfo = None
-        if model_path:
-            minfo = next((m for m in mlist if m['path'] == model_path), None)
-        else:
-            minfo = mlist[0] if mlist else None
-        if not minfo:
-            result['error'] = '未找到可用模型'
-            return result
-        ext = Path(minfo['path']).suffix.lower()
-        try:
-            if ext in ['.pt', '.pth']:
-                import torch
-                model = torch.load(minfo['path'])
-                dummy_input = torch.randn(1, 3, 224, 224)
-                out = model(dummy_input)
-                result['backend'] = 'torch'
-                result['output_shape'] = tuple(out.shape)
-                result['success'] = True
-            elif ext == '.onnx':
-                import onnxruntime
-                session = onnxruntime.InferenceSession(minfo['path'])
-                input_name = session.get_inputs()[0].name
-                dummy_input = {input_name: [[0.0]*224]*224}
-                out = session.run(None, dummy_input)
-                result['backend'] = 'onnxruntime'
-                result['output_shape'] = str([o.shape if hasattr(o, 'shape') else type(o) for o in out])
-                result['success'] = True
-            elif ext == '.h5':
-                from tensorflow import keras
-                model = keras.models.load_model(minfo['path'])
-                import numpy as np
-                dummy_input = np.random.randn(1, 224, 224, 3)
-                out = model.predict(dummy_input)
-                result['backend'] = 'keras'
-                result['output_shape'] = tuple(out.shape)
-                result['success'] = True
-            elif ext in ['.bin', '.gguf']:
-                from pygpt4all import GPT4All
-                model = GPT4All(model=minfo['path'])
-                out = model.generate("你好", max_tokens=10)
-                result['backend'] = 'pygpt4all'
-                result['output_shape'] = str(type(out))
-                result['success'] = True
-            elif ext == '.pdparams':
-                import paddle
-                model = paddle.load(minfo['path'])
-                dummy_input = paddle.randn([1, 3, 224, 224])
-                out = model(dummy_input)
-                result['backend'] = 'paddlepaddle'
-                result['output_shape'] = tuple(out.shape)
-                result['success'] = True
-            elif ext == '.safetensors':
-                try:
-                    from diffusers import DiffusionPipeline
-                    pipe = DiffusionPipeline.from_pretrained(minfo['path'])
-                    out = pipe("a cat")
-                    result['backend'] = 'diffusers'
-                    result['output_shape'] = str(type(out))
-                    result['success'] = True
-                except Exception:
-                    result['backend'] = 'diffusers'
-                    result['error'] = 'diffusers模型推理失败'
-            elif ext == '.pt' and 'transformers' in minfo['path']:
-                from transformers import AutoModel, AutoTokenizer
-                model = AutoModel.from_pretrained(minfo['path'])
-                tokenizer = AutoTokenizer.from_pretrained(minfo['path'])
-                inputs = tokenizer("你好", return_tensors="pt")
-                out = model(**inputs)
-                result['backend'] = 'transformers'
-                result['output_shape'] = str(out.last_hidden_state.shape)
-                result['success'] = True
-            else:
-                result['error'] = '暂不支持该模型类型自动推理'
-        except Exception as e:
-            result['error'] = str(e) + '\n' + traceback.format_exc()
-        return result
 """Auto-detect model file in a directory and provide a simple loader wrapper.
 It tries to support multiple backends: pygpt4all and llama_cpp (if installed).
 If none available, it returns a dummy object so rest of system works offline.
 """
 import os, glob
 from pathlib import Path
+from contextlib import contextmanager, ExitStack
+from ai.model_index import MODEL_FORMATS, get_model_index
 class ModelLoader:
     def self_check(self):
         import time
@@ -194,31 +35,32 @@ class ModelLoader:
             except Exception:
                 report['missing_dependencies'].append(pkg)
                 report['suggestions'].append(f'缺失依赖包：{pkg}，建议运行 pip install {pkg} 自动安装。')
-        models = self.find_all_models()
+        models = self.find_all_models()['models']
         report['models_found'] = len(models)
         if models:
             try:
                 t0 = time.time()
-                result = self.load_model(models[0]['path'])
-                t1 = time.time()
-                report['load_time'] = round(t1-t0, 3)
-                report['load_test'] = {'success': result['error'] is None, 'backend': result['backend'], 'error': result['error']}
-                if result['backend'] == 'torch' and result['model'] is not None:
-                    try:
-                        param_count = sum(p.numel() for p in result['model'].parameters())
-                        report['param_count'] = param_count
-                    except Exception:
-                        report['param_count'] = '未知'
-                        report['suggestions'].append('无法统计参数量，建议检查模型结构或依赖版本。')
-                if result['backend'] == 'torch' and result['model'] is not None:
-                    try:
-                        import torch
-                        dummy_input = torch.randn(1, 3, 224, 224)
-                        out = result['model'](dummy_input)
-                        report['inference_test'] = {'success': True, 'output_shape': tuple(out.shape)}
-                    except Exception as e:
-                        report['inference_test'] = {'success': False, 'error': str(e)}
-                        report['suggestions'].append(f'推理异常：{e}，建议检查模型输入 shape 或依赖版本。')
+                # 加载、参数统计与推理都在同一个租约内完成，期间模型不会被池卸载
+                with self._leased(models[0]) as result:
+                    t1 = time.time()
+                    report['load_time'] = round(t1-t0, 3)
+                    report['load_test'] = {'success': result['error'] is None, 'backend': result['backend'], 'error': result['error']}
+                    if result['backend'] == 'torch' and result['model'] is not None:
+                        try:
+                            param_count = sum(p.numel() for p in result['model'].parameters())
+                            report['param_count'] = param_count
+                        except Exception:
+                            report['param_count'] = '未知'
+                            report['suggestions'].append('无法统计参数量，建议检查模型结构或依赖版本。')
+                    if result['backend'] == 'torch' and result['model'] is not None:
+                        try:
+                            import torch
+                            dummy_input = torch.randn(1, 3, 224, 224)
+                            out = result['model'](dummy_input)
+                            report['inference_test'] = {'success': True, 'output_shape': tuple(out.shape)}
+                        except Exception as e:
+                            report['inference_test'] = {'success': False, 'error': str(e)}
+                            report['suggestions'].append(f'推理异常：{e}，建议检查模型输入 shape 或依赖版本。')
             except Exception as e:
                 report['load_test'] = {'success': False, 'error': str(e)}
                 report['suggestions'].append(f'模型加载失败：{e}，建议检查模型格式或依赖包。')
@@ -231,53 +73,41 @@ class ModelLoader:
         自动推理健康检查：根据模型类型自动生成测试输入，运行推理并校验输出 shape。
         支持 transformers、diffusers、onnx、keras、torch、paddlepaddle 等主流模型。
         """
-        import traceback
-        result = {'model_path': model_path, 'backend': None, 'success': False, 'output_shape': None, 'error': None, 'suggestion': None}
-        mlist = self.find_all_models()
-        minfo = None
-        if model_path:
-            minfo = next((m for m in mlist if m['path'] == model_path), None)
-        else:
-            minfo = mlist[0] if mlist else None
+        minfo = self._select_model(model_path)
         if not minfo:
-            result['error'] = '未找到可用模型'
-            result['suggestion'] = '请将模型文件放入 models 相关目录，并确保格式受支持。'
-            return result
+            return {'model_path': model_path, 'backend': None, 'success': False, 'output_shape': None,
+                    'error': '未找到可用模型', 'suggestion': '请将模型文件放入 models 相关目录，并确保格式受支持。'}
+        return self.check_model(minfo)
+
+    def check_model(self, minfo):
+        """对单个模型（find_all_models 返回的条目）加载并做一次推理，返回健康检查结果"""
+        import traceback
+        result = {'model_path': minfo['path'], 'backend': None, 'success': False, 'output_shape': None, 'error': None, 'suggestion': None}
         ext = Path(minfo['path']).suffix.lower()
         try:
-            if ext in ['.pt', '.pth']:
-                import torch
-                model = torch.load(minfo['path'])
-                dummy_input = torch.randn(1, 3, 224, 224)
-                out = model(dummy_input)
-                result['backend'] = 'torch'
-                result['output_shape'] = tuple(out.shape)
-                result['success'] = True
-            elif ext == '.onnx':
-                import onnxruntime
-                session = onnxruntime.InferenceSession(minfo['path'])
-                input_name = session.get_inputs()[0].name
-                dummy_input = {input_name: [[0.0]*224]*224}
-                out = session.run(None, dummy_input)
-                result['backend'] = 'onnxruntime'
-                result['output_shape'] = str([o.shape if hasattr(o, 'shape') else type(o) for o in out])
-                result['success'] = True
-            elif ext == '.h5':
-                from tensorflow import keras
-                model = keras.models.load_model(minfo['path'])
-                import numpy as np
-                dummy_input = np.random.randn(1, 224, 224, 3)
-                out = model.predict(dummy_input)
-                result['backend'] = 'keras'
-                result['output_shape'] = tuple(out.shape)
-                result['success'] = True
-            elif ext in ['.bin', '.gguf']:
-                from pygpt4all import GPT4All
-                model = GPT4All(model=minfo['path'])
-                out = model.generate("你好", max_tokens=10)
-                result['backend'] = 'pygpt4all'
-                result['output_shape'] = str(type(out))
-                result['success'] = True
+            if ext in self.POOLED_FORMATS:
+                # 权重经 _leased 加载：有模型池时复用常驻模型，推理期间持有引用
+                with self._leased(minfo) as loaded:
+                    if loaded['error']:
+                        raise RuntimeError(loaded['error'])
+                    model = loaded['model']
+                    result['backend'] = loaded['backend']
+                    if loaded['backend'] == 'torch':
+                        import torch
+                        out = model(torch.randn(1, 3, 224, 224))
+                        result['output_shape'] = tuple(out.shape)
+                    elif loaded['backend'] == 'onnxruntime':
+                        input_name = model.get_inputs()[0].name
+                        out = model.run(None, {input_name: [[0.0]*224]*224})
+                        result['output_shape'] = str([o.shape if hasattr(o, 'shape') else type(o) for o in out])
+                    elif loaded['backend'] == 'keras':
+                        import numpy as np
+                        out = model.predict(np.random.randn(1, 224, 224, 3))
+                        result['output_shape'] = tuple(out.shape)
+                    else:
+                        out = model.generate("你好", max_tokens=10)
+                        result['output_shape'] = str(type(out))
+                    result['success'] = True
             elif ext == '.pdparams':
                 import paddle
                 model = paddle.load(minfo['path'])
@@ -320,69 +150,32 @@ class ModelLoader:
             else:
                 result['suggestion'] = '建议检查模型路径、格式或依赖包版本。'
         return result
-        import time
-        report = {
-            'model_dirs': [],
-            'supported_formats': list(self.SUPPORTED_FORMATS.keys()),
-            'models_found': 0,
-            'missing_dependencies': [],
-            'dependency_versions': {},
-            'load_test': None,
-            'param_count': None,
-            'load_time': None,
-            'inference_test': None
-        }
-        # 检查模型目录
-        dirs = [self.preferred_dir] if self.preferred_dir else self.DEFAULT_DIRS
-        for d in dirs:
-            report['model_dirs'].append(str(d))
-            if not d.exists():
-                report.setdefault('missing_dirs', []).append(str(d))
-        # 检查依赖包及版本
-        for pkg in ['pygpt4all', 'llama_cpp_python', 'torch', 'onnxruntime', 'tensorflow']:
-            try:
-                mod = __import__(pkg)
-                ver = getattr(mod, '__version__', None)
-                report['dependency_versions'][pkg] = ver
-            except Exception:
-                report['missing_dependencies'].append(pkg)
-        # 检查模型文件
-        models = self.find_all_models()
-        report['models_found'] = len(models)
-        # 尝试加载第一个模型并统计参数量、加载耗时
-        if models:
-            try:
-                t0 = time.time()
-                result = self.load_model(models[0]['path'])
-                t1 = time.time()
-                report['load_time'] = round(t1-t0, 3)
-                report['load_test'] = {'success': result['error'] is None, 'backend': result['backend'], 'error': result['error']}
-                # 参数量统计
-                if result['backend'] == 'torch' and result['model'] is not None:
-                    try:
-                        param_count = sum(p.numel() for p in result['model'].parameters())
-                        report['param_count'] = param_count
-                    except Exception:
-                        report['param_count'] = '未知'
-                # 推理健康检查（仅示例，实际需根据模型类型定制）
-                if result['backend'] == 'torch' and result['model'] is not None:
-                    try:
-                        import torch
-                        dummy_input = torch.randn(1, 3, 224, 224)
-                        out = result['model'](dummy_input)
-                        report['inference_test'] = {'success': True, 'output_shape': tuple(out.shape)}
-                    except Exception as e:
-                        report['inference_test'] = {'success': False, 'error': str(e)}
-                # 可扩展：其他后端推理测试
-            except Exception as e:
-                report['load_test'] = {'success': False, 'error': str(e)}
-        return report
-    SUPPORTED_FORMATS = {
-        '.gguf': 'LLM', '.bin': 'LLM', '.pt': 'LLM/CV', '.pth': 'LLM/CV', '.onnx': 'LLM/CV', '.pb': 'CV', '.h5': 'CV/语音', '.tflite': 'CV/语音'
-    }
-    def __init__(self, preferred_dir=None):
+    SUPPORTED_FORMATS = MODEL_FORMATS
+    # 由 _load_backend 加载、可放入模型池的格式
+    POOLED_FORMATS = ('.gguf', '.bin', '.pt', '.pth', '.onnx', '.h5')
+    def __init__(self, preferred_dir=None, max_depth=None, index_path=None, pool=None):
         self.preferred_dir = preferred_dir
+        # 可选的常驻模型池（ai.model_pool.ModelPool），load_model 与健康检查共享已加载的模型
+        self.pool = pool
         self.DEFAULT_DIRS = self._find_gpt_dirs()
+        # 目录遍历由共享的 ModelIndex 完成：一次 scandir 按后缀分类，max_depth 限制深度，index_path 持久化目录索引
+        self.max_depth = max_depth
+        self.index_path = index_path
+
+    @classmethod
+    def from_settings(cls, settings=None, preferred_dir=None):
+        """按 settings['model'] 的 discovery 配置创建，并接入进程共享的模型池"""
+        from ai.model_index import discovery_settings
+        from ai.model_pool import get_model_pool
+        max_depth, index_path = discovery_settings(settings)
+        return cls(preferred_dir=preferred_dir, max_depth=max_depth, index_path=index_path, pool=get_model_pool(settings))
+
+    def warm_up(self, count=1, background=True):
+        """把最近修改的 count 个可加载模型预加载进模型池；background=True 时返回后台线程"""
+        if self.pool is None or count <= 0:
+            return None
+        models = [m for m in self.find_all_models()['models'] if Path(m['path']).suffix.lower() in self.POOLED_FORMATS]
+        return self.pool.warm_up(models[:count], self._load_backend, background)
 
     def _find_gpt_dirs(self):
         from pathlib import Path
@@ -397,22 +190,9 @@ class ModelLoader:
                 dirs.append(ai)
         return dirs if dirs else [start_dir]
     def find_all_models(self):
-        from pathlib import Path
         try:
             dirs = [self.preferred_dir] if self.preferred_dir else self.DEFAULT_DIRS
-            found = []
-            for d in dirs:
-                d = Path(d) if not isinstance(d, Path) else d
-                if d and d.exists():
-                    for ext, mtype in self.SUPPORTED_FORMATS.items():
-                        for f in d.glob(f'**/*{ext}'):
-                            found.append({
-                                'path': str(f.resolve()),
-                                'type': mtype,
-                                'name': f.name,
-                                'size': f.stat().st_size,
-                                'last_modified': f.stat().st_mtime
-                            })
+            found = get_model_index(self.index_path, self.SUPPORTED_FORMATS).scan([str(d) for d in dirs if d], self.max_depth)
             return {
                 'success': True,
                 'models': sorted(found, key=lambda x: x['last_modified'], reverse=True),
@@ -424,6 +204,12 @@ class ModelLoader:
                 'models': [],
                 'error': str(e)
             }
+    def _select_model(self, model_path=None):
+        """按路径取模型条目；未指定路径时取最近修改的模型"""
+        mlist = self.find_all_models()['models']
+        if model_path:
+            return next((m for m in mlist if m['path'] == model_path), None)
+        return mlist[0] if mlist else None
     def get_model_metadata(self, model_info):
         try:
             meta = {
@@ -444,14 +230,38 @@ class ModelLoader:
                 'error': str(e)
             }
     def load_model(self, model_path=None):
-        mlist = self.find_all_models()
-        minfo = None
-        if model_path:
-            minfo = next((m for m in mlist if m['path'] == model_path), None)
-        else:
-            minfo = mlist[0] if mlist else None
+        """加载一份调用方独占的模型（不经过模型池，池的卸载不会影响它）；需要共享常驻模型时用 lease_model / acquire_model"""
+        minfo = self._select_model(model_path)
         if not minfo:
             return {'error': '未找到可用模型', 'backend': 'none', 'model': None, 'meta': None}
+        return self._load_backend(minfo)
+
+    @contextmanager
+    def lease_model(self, model_path=None):
+        """with 块内持有模型：有模型池时复用常驻模型，块结束前不会被卸载"""
+        minfo = self._select_model(model_path)
+        if not minfo:
+            yield {'error': '未找到可用模型', 'backend': 'none', 'model': None, 'meta': None}
+            return
+        with self._leased(minfo) as result:
+            yield result
+
+    def acquire_model(self, model_path=None):
+        """长期持有模型（控制台、启动脚本）：返回 (结果, release)，不再使用模型时必须调用 release()（可重复调用）"""
+        stack = ExitStack()
+        result = stack.enter_context(self.lease_model(model_path))
+        return result, stack.close
+
+    @contextmanager
+    def _leased(self, minfo):
+        """在 with 块内持有模型：有模型池时占用一个引用（期间不会被卸载），否则直接加载"""
+        if self.pool is None:
+            yield self._load_backend(minfo)
+        else:
+            with self.pool.lease(minfo, self._load_backend) as result:
+                yield result
+
+    def _load_backend(self, minfo):
         ext = Path(minfo['path']).suffix.lower()
         try:
             if ext in ['.gguf', '.bin']:
@@ -482,5 +292,67 @@ class ModelLoader:
             meta['error'] = str(e)
             return {'backend': 'error', 'model': None, 'meta': meta, 'error': str(e)}
 
+    def download_model(self, url, target_dir=None):
+        """
+        自动下载模型文件，支持 huggingface hub、公开URL。
+        """
+        import os, requests
+        from pathlib import Path
+        target_dir = Path(target_dir or self.DEFAULT_DIRS[0])
+        target_dir.mkdir(parents=True, exist_ok=True)
+        fname = url.split('/')[-1]
+        fpath = target_dir / fname
+        try:
+            if 'huggingface.co' in url:
+                # 简单支持：下载权重文件
+                r = requests.get(url, stream=True)
+                with open(fpath, 'wb') as fh:
+                    for chunk in r.iter_content(chunk_size=8192):
+                        fh.write(chunk)
+            else:
+                r = requests.get(url, stream=True)
+                with open(fpath, 'wb') as fh:
+                    for chunk in r.iter_content(chunk_size=8192):
+                        fh.write(chunk)
+            return {'success': True, 'path': str(fpath)}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def update_model(self, model_path, new_version_url):
+        """
+        自动更新模型：下载新版本并替换原模型，备份旧版本。
+        """
+        import shutil, os
+        from pathlib import Path
+        model_path = Path(model_path)
+        backup_path = model_path.with_suffix(model_path.suffix + '.bak')
+        try:
+            shutil.copy2(model_path, backup_path)
+            dl_result = self.download_model(new_version_url, model_path.parent)
+            if dl_result['success']:
+                os.replace(dl_result['path'], str(model_path))
+                return {'success': True, 'backup': str(backup_path), 'updated': str(model_path)}
+            else:
+                return {'success': False, 'error': dl_result['error']}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
+    def rollback_model(self, model_path, backup_path=None):
+        """
+        回滚模型到备份版本。
+        """
+        import shutil, os
+        from pathlib import Path
+        model_path = Path(model_path)
+        backup_path = Path(backup_path or model_path.with_suffix(model_path.suffix + '.bak'))
+        try:
+            if backup_path.exists():
+                shutil.copy2(backup_path, model_path)
+                return {'success': True, 'restored': str(model_path)}
+            else:
+                return {'success': False, 'error': '备份文件不存在'}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
+
 if __name__ == "__main__":
     print("ModelLoader 仅作为模块使用，不建议直接运行。")
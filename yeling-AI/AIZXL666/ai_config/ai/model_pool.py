@@ -0,0 +1,212 @@
+"""Resident model pool: loaded backends are shared across requests with reference counts and unloaded LRU-first under a RAM budget."""
+import os, time, threading, logging
+from collections import OrderedDict
+from contextlib import contextmanager
+LOG = logging.getLogger('ai_assistant.model_pool')
+
+def _file_size(minfo):
+    """以磁盘上的权重大小估算常驻内存（各后端加载后的占用与文件大小同量级）"""
+    size = minfo.get('size')
+    if size is None:
+        try: size = os.path.getsize(minfo['path'])
+        except OSError: size = 0
+    return size
+
+class _Slot:
+    __slots__ = ('path', 'key', 'size', 'value', 'refs', 'loading', 'attached', 'load_seconds', 'hits', 'last_used')
+    def __init__(self, path, key, size):
+        self.path = path
+        self.key = key
+        self.size = size
+        self.value = None
+        self.refs = 1          # 创建者（负责加载的线程）持有第一个引用
+        self.loading = True
+        self.attached = True   # False：已从池中摘下（文件已变化或加载失败），最后一个持有者释放时卸载
+        self.load_seconds = 0.0
+        self.hits = 0
+        self.last_used = time.time()
+
+class ModelPool:
+    """按模型路径缓存 ModelLoader 的加载结果 {'backend','model','meta','error'}。
+
+    - acquire/release 成对使用（或 with pool.lease(...)），引用计数大于 0 的模型不会被卸载；
+    - 同一模型同时被多个请求加载时只加载一次，其余请求等待并共享结果；
+    - 文件 (size, mtime) 变化后旧版本从池中摘下，新请求重新加载，旧版本在最后一个持有者释放后卸载；
+    - 加载前按 LRU 卸载空闲模型，使常驻估算大小不超过 max_bytes、模型数不超过 max_models；
+      所有模型都在使用中时允许暂时超出预算，释放后再回收。
+    加载失败的结果只交给正在等待的请求，不进入缓存。
+    """
+    def __init__(self, max_bytes=None, max_models=None, sizeof=None):
+        self.max_bytes = max_bytes
+        self.max_models = max_models
+        self._sizeof = sizeof or _file_size
+        self._slots = OrderedDict()   # path -> _Slot，顺序即 LRU 顺序
+        self._bytes = 0               # 所有未卸载槽位（含已摘下但仍被持有的）的估算大小
+        self._cond = threading.Condition()
+        self.stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'loads': 0, 'load_failures': 0,
+                      'load_seconds': 0.0, 'max_load_seconds': 0.0, 'evictions': 0, 'reloads': 0}
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        conf = ((settings or {}).get('model') or {}).get('pool') or {}
+        return cls(max_bytes=conf.get('max_bytes'), max_models=conf.get('max_models'))
+
+    def acquire(self, minfo, load):
+        """返回持有一个引用的槽位；slot.value 为 load(minfo) 的结果。用完必须 release(slot)"""
+        path = minfo['path']
+        key = (minfo.get('size'), minfo.get('last_modified'))
+        with self._cond:
+            while True:
+                slot = self._slots.get(path)
+                if slot is not None and slot.key != key and not slot.loading:
+                    self._detach(slot)
+                    self.stats['reloads'] += 1
+                    slot = None
+                if slot is None:
+                    break
+                if slot.loading:
+                    self.stats['coalesced'] += 1
+                    self._cond.wait_for(lambda: not slot.loading)
+                    if not slot.attached and slot.value is not None:
+                        # 加载失败：把同一个失败结果交给等待者
+                        slot.refs += 1
+                        return slot
+                    continue
+                slot.refs += 1
+                slot.hits += 1
+                slot.last_used = time.time()
+                self.stats['hits'] += 1
+                self._slots.move_to_end(path)
+                return slot
+            slot = _Slot(path, key, self._sizeof(minfo))
+            self._slots[path] = slot
+            self._bytes += slot.size
+            self.stats['misses'] += 1
+            self._evict()
+        t0 = time.perf_counter()
+        try:
+            value = load(minfo)
+        except Exception as e:
+            value = {'backend': 'error', 'model': None, 'meta': None, 'error': str(e)}
+        elapsed = time.perf_counter() - t0
+        with self._cond:
+            slot.value = value
+            slot.loading = False
+            slot.load_seconds = elapsed
+            self.stats['loads'] += 1
+            self.stats['load_seconds'] += elapsed
+            self.stats['max_load_seconds'] = max(self.stats['max_load_seconds'], elapsed)
+            if value.get('error') or value.get('model') is None:
+                self.stats['load_failures'] += bool(value.get('error'))
+                self._detach(slot)
+            self._cond.notify_all()
+        return slot
+
+    def release(self, slot):
+        with self._cond:
+            slot.refs -= 1
+            if slot.refs <= 0 and not slot.attached:
+                self._unload(slot)
+            self._evict()
+
+    @contextmanager
+    def lease(self, minfo, load):
+        slot = self.acquire(minfo, load)
+        try:
+            yield slot.value
+        finally:
+            self.release(slot)
+
+    def _detach(self, slot):
+        """调用方持锁：从池中摘下槽位；无人持有时立即卸载"""
+        if self._slots.get(slot.path) is slot:
+            del self._slots[slot.path]
+        slot.attached = False
+        if slot.refs <= 0:
+            self._unload(slot)
+
+    def _unload(self, slot):
+        """调用方持锁：丢弃池对模型的引用（有 close() 的后端先关闭），并扣除估算大小"""
+        if slot.size == 0 and (slot.value is None or slot.value.get('model') is None):
+            return
+        model = (slot.value or {}).get('model')
+        if model is not None:
+            close = getattr(model, 'close', None)
+            if callable(close):
+                try: close()
+                except Exception as e: LOG.warning('closing %s failed: %s', slot.path, e)
+            # 失败结果（不含模型）保留，仍在等待的请求会拿到同一个错误
+            slot.value = None
+        self._bytes -= slot.size
+        slot.size = 0
+
+    def _over_budget(self):
+        return ((self.max_bytes is not None and self._bytes > self.max_bytes) or
+                (self.max_models is not None and len(self._slots) > self.max_models))
+
+    def _evict(self):
+        """调用方持锁：按 LRU 卸载空闲模型直到回到预算内；在用或加载中的模型跳过"""
+        if not self._over_budget():
+            return
+        for slot in list(self._slots.values()):
+            if slot.refs > 0 or slot.loading:
+                continue
+            self._detach(slot)
+            self.stats['evictions'] += 1
+            LOG.info('model pool evicted %s', slot.path)
+            if not self._over_budget():
+                return
+        if self._over_budget():
+            LOG.warning('model pool over budget: %d bytes in %d models, all in use', self._bytes, len(self._slots))
+
+    def warm_up(self, minfos, load, background=True):
+        """预加载模型（服务启动时调用）；background=True 时在守护线程中进行并返回该线程"""
+        def run():
+            for minfo in minfos:
+                slot = self.acquire(minfo, load)
+                err = (slot.value or {}).get('error')
+                self.release(slot)
+                LOG.info('model warm-up %s: %s', minfo['path'], err or f'{slot.load_seconds:.2f}s')
+        if not background:
+            run()
+            return None
+        t = threading.Thread(target=run, daemon=True, name='model-warm-up')
+        t.start()
+        return t
+
+    def metrics(self):
+        """加载耗时、命中率与常驻模型信息"""
+        with self._cond:
+            s = dict(self.stats)
+            requests = s['hits'] + s['misses']
+            s['hit_rate'] = round(s['hits'] / requests, 4) if requests else None
+            s['avg_load_seconds'] = round(s['load_seconds'] / s['loads'], 4) if s['loads'] else None
+            s['load_seconds'] = round(s['load_seconds'], 4)
+            s['max_load_seconds'] = round(s['max_load_seconds'], 4)
+            s.update(resident_models=len(self._slots), resident_bytes=self._bytes,
+                     max_bytes=self.max_bytes, max_models=self.max_models)
+            s['models'] = [{'path': sl.path, 'backend': (sl.value or {}).get('backend'), 'size': sl.size, 'refs': sl.refs,
+                            'loading': sl.loading, 'hits': sl.hits, 'load_seconds': round(sl.load_seconds, 4),
+                            'last_used': sl.last_used} for sl in reversed(self._slots.values())]
+            return s
+
+    def clear(self):
+        """卸载所有空闲模型（在用的模型在释放后卸载）"""
+        with self._cond:
+            for slot in list(self._slots.values()):
+                if not slot.loading:
+                    self._detach(slot)
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+def get_model_pool(settings=None):
+    """进程级共享的模型池，首次调用时按 settings['model']['pool'] 创建"""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = ModelPool.from_settings(settings)
+        return _POOL
+
+if __name__ == "__main__":
+    print("ModelPool 仅作为模块使用，不建议直接运行。")
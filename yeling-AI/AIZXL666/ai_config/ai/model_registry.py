@@ -0,0 +1,150 @@
+"""Model registry: index model files once, cache metadata and health keyed by (path, size, mtime), run health checks in the background."""
+import time, threading, logging
+from concurrent.futures import ThreadPoolExecutor
+from ai.model_loader import ModelLoader
+LOG = logging.getLogger('ai_assistant.model_registry')
+
+class ModelRegistry:
+    """/models 只读这里的快照，不在请求里遍历目录或加载权重。
+
+    - 索引：首次访问时同步遍历一次模型目录（只 stat，不加载），之后超过 reindex_interval 才在后台线程重建；
+    - 元数据与健康状态按 (path, size, mtime) 缓存，文件未变化时沿用上次的检查结果；
+    - 健康检查（会真正加载模型）提交到最多 health_workers 个线程的线程池，同一版本的模型不会重复排队，
+      结果超过 health_ttl 秒后在下次访问时重新排队。
+    """
+    def __init__(self, loader=None, health_workers=1, reindex_interval=300, health_ttl=3600, checker=None):
+        self.loader = loader or ModelLoader()
+        self._check = checker or self.loader.check_model
+        self.health_workers = max(1, int(health_workers))
+        self.reindex_interval = reindex_interval
+        self.health_ttl = health_ttl
+        self._entries = {}        # path -> {'key', 'info', 'meta', 'health', 'checked_at', 'check_report'}
+        self._inflight = set()    # 已排队或正在检查的 (path, size, mtime)
+        self._lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._executor = None
+        self._indexer = None
+        self.indexed_at = None
+        self.index_error = None
+        self.stats = {'index_runs': 0, 'index_seconds': 0.0, 'checks_run': 0, 'checks_failed': 0, 'checks_reused': 0}
+
+    @classmethod
+    def from_settings(cls, settings=None, loader=None):
+        conf = ((settings or {}).get('model') or {}).get('registry') or {}
+        return cls(loader=loader or ModelLoader.from_settings(settings), health_workers=conf.get('health_workers', 1),
+                   reindex_interval=conf.get('reindex_interval', 300), health_ttl=conf.get('health_ttl', 3600))
+
+    def refresh_index(self):
+        """遍历模型目录并与缓存对比：新增或变化的模型标记为 pending 并排队检查，消失的模型移除。返回模型数"""
+        with self._index_lock:
+            t0 = time.perf_counter()
+            result = self.loader.find_all_models()
+            self.stats['index_runs'] += 1
+            self.stats['index_seconds'] += time.perf_counter() - t0
+            if not result.get('success'):
+                # 索引失败时保留上一次的结果
+                self.index_error = result.get('error')
+                LOG.warning('model index failed: %s', self.index_error)
+                return len(self._entries)
+            entries = {}
+            with self._lock:
+                for m in result.get('models', []):
+                    key = (m['path'], m['size'], m['last_modified'])
+                    old = self._entries.get(m['path'])
+                    if old is not None and old['key'] == key:
+                        entries[m['path']] = old
+                        self.stats['checks_reused'] += old['checked_at'] is not None
+                        continue
+                    meta = self.loader.get_model_metadata(m)
+                    meta.pop('success', None)
+                    entries[m['path']] = {'key': key, 'info': m, 'meta': meta, 'health': 'pending',
+                                          'checked_at': None, 'check_report': None}
+                self._entries = entries
+                self.indexed_at = time.time()
+                self.index_error = None
+            for entry in entries.values():
+                if entry['checked_at'] is None:
+                    self._schedule(entry)
+            return len(entries)
+
+    def _schedule(self, entry):
+        with self._lock:
+            if entry['key'] in self._inflight:
+                return False
+            self._inflight.add(entry['key'])
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.health_workers, thread_name_prefix='model-health')
+        self._executor.submit(self._run_check, entry['key'], entry['info'])
+        return True
+
+    def _run_check(self, key, info):
+        try:
+            report = self._check(info)
+            health = 'ok' if report.get('success') else 'error'
+        except Exception as e:
+            report, health = {'success': False, 'error': str(e)}, 'error'
+        with self._lock:
+            self._inflight.discard(key)
+            self.stats['checks_run'] += 1
+            self.stats['checks_failed'] += health != 'ok'
+            entry = self._entries.get(key[0])
+            # 检查期间文件被替换则丢弃旧结果，新版本已另行排队
+            if entry is not None and entry['key'] == key:
+                entry.update(health=health, checked_at=time.time(), check_report=report)
+
+    def _reindex_in_background(self):
+        with self._lock:
+            if self._indexer is not None and self._indexer.is_alive():
+                return False
+            self._indexer = threading.Thread(target=self.refresh_index, daemon=True, name='model-index')
+            self._indexer.start()
+        return True
+
+    def refresh(self, recheck=False):
+        """后台重建索引；recheck=True 时同时让所有模型重新做健康检查"""
+        if recheck:
+            with self._lock:
+                for entry in self._entries.values():
+                    entry['checked_at'] = None
+        return self._reindex_in_background()
+
+    def snapshot(self):
+        """返回当前缓存的模型列表（毫秒级，不做 I/O）；首次调用时同步建立索引"""
+        if self.indexed_at is None:
+            self.refresh_index()
+        elif time.time() - self.indexed_at > self.reindex_interval:
+            self._reindex_in_background()
+        now = time.time()
+        models, stale = [], []
+        with self._lock:
+            for entry in self._entries.values():
+                checked = entry['checked_at']
+                if entry['key'] not in self._inflight and (checked is None or now - checked > self.health_ttl):
+                    stale.append(entry)
+                item = dict(entry['meta'])
+                item.update(health=entry['health'], checked_at=checked, check_report=entry['check_report'])
+                models.append(item)
+            pending = len(self._inflight)
+            snapshot = {'models': models, 'indexed_at': self.indexed_at, 'index_error': self.index_error,
+                        'pending_checks': pending, 'stats': dict(self.stats)}
+        snapshot['pending_checks'] += sum(self._schedule(entry) for entry in stale)
+        return snapshot
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+_REGISTRY = None
+_REGISTRY_LOCK = threading.Lock()
+
+def get_registry(settings=None):
+    """进程级共享的注册表，首次调用时按 settings['model']['registry'] 创建"""
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            _REGISTRY = ModelRegistry.from_settings(settings)
+        return _REGISTRY
+
+if __name__ == "__main__":
+    print("ModelRegistry 仅作为模块使用，不建议直接运行。")
@@ -0,0 +1,58 @@
+import os, sys, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ai.model_index import ModelIndex
+from ai.model_loader import ModelLoader
+
+def make_tree(root):
+    for rel in ('a.gguf', 'B.ONNX', 'readme.md', 'x/c.pt', 'x/y/d.h5', 'x/y/z/e.tflite', 'x/y/z/notes.txt'):
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_bytes(b'0' * len(rel))
+    age(root)
+
+def age(root, seconds=60):
+    """把目录 mtime 调到过去，避开“刚修改”的不缓存窗口"""
+    past = time.time() - seconds
+    for d, _, _ in os.walk(root):
+        os.utime(d, (past, past))
+
+def test_single_pass_classifies_all_suffixes_and_honours_depth(tmp_path):
+    make_tree(tmp_path)
+    index = ModelIndex()
+    found = {m['name']: m for m in index.scan([str(tmp_path)])}
+    assert sorted(found) == ['B.ONNX', 'a.gguf', 'c.pt', 'd.h5', 'e.tflite']
+    assert found['a.gguf']['type'] == 'LLM' and found['d.h5']['type'] == 'CV/语音'
+    assert found['c.pt']['size'] == len('x/c.pt')
+    assert index.stats['dirs_listed'] == 4
+    assert sorted(m['name'] for m in ModelIndex().scan([str(tmp_path)], max_depth=1)) == ['B.ONNX', 'a.gguf', 'c.pt']
+    # 重叠的根目录不会重复计数
+    assert len(ModelIndex().scan([str(tmp_path / 'x'), str(tmp_path)])) == 5
+
+def test_persisted_index_skips_unchanged_directories(tmp_path):
+    root = tmp_path / 'models'
+    make_tree(root)
+    index_path = tmp_path / 'index.json'
+    first = ModelIndex(index_path=index_path).scan([str(root)])
+    assert index_path.exists()
+    index = ModelIndex(index_path=index_path)
+    assert sorted(map(str, index.scan([str(root)]))) == sorted(map(str, first))
+    assert index.stats['dirs_listed'] == 0 and index.stats['dirs_reused'] == 4
+    # 新增文件改变所在目录的 mtime：只重新列举这一个目录
+    (root / 'x' / 'y' / 'new.bin').write_bytes(b'1')
+    names = sorted(m['name'] for m in index.scan([str(root)]))
+    assert 'new.bin' in names and index.stats['dirs_listed'] == 1
+    # 原地改写的模型文件：目录未变，但大小取自新的 stat
+    (root / 'a.gguf').write_bytes(b'0' * 100)
+    age(root)
+    sizes = {m['name']: m['size'] for m in index.scan([str(root)])}
+    assert sizes['a.gguf'] == 100
+    # 删除子目录后，索引中对应的条目被清掉
+    for f in (root / 'x' / 'y' / 'z').iterdir(): f.unlink()
+    (root / 'x' / 'y' / 'z').rmdir()
+    assert sorted(m['name'] for m in index.scan([str(root)])) == ['B.ONNX', 'a.gguf', 'c.pt', 'd.h5', 'new.bin']
+    assert not any(d.endswith('z') for d in index._dirs)
+
+def test_model_loader_uses_shared_walker(tmp_path):
+    make_tree(tmp_path)
+    result = ModelLoader(preferred_dir=tmp_path, max_depth=0).find_all_models()
+    assert result['success'] and sorted(m['name'] for m in result['models']) == ['B.ONNX', 'a.gguf']
@@ -0,0 +1,124 @@
+import os, sys, time, threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ai.model_pool import ModelPool
+from ai.model_loader import ModelLoader
+
+class FakeModel:
+    def __init__(self, path):
+        self.path = path
+        self.closed = False
+    def close(self):
+        self.closed = True
+
+class CountingLoader:
+    def __init__(self, delay=0.0, fail=()):
+        self.loads = []
+        self.delay = delay
+        self.fail = set(fail)
+    def __call__(self, minfo):
+        self.loads.append(minfo['path'])
+        time.sleep(self.delay)
+        if minfo['path'] in self.fail:
+            return {'backend': 'error', 'model': None, 'meta': None, 'error': 'boom'}
+        return {'backend': 'fake', 'model': FakeModel(minfo['path']), 'meta': {}, 'error': None}
+
+def info(name, size=100, mtime=1.0):
+    return {'path': f'/models/{name}', 'size': size, 'last_modified': mtime}
+
+def test_models_stay_resident_and_are_evicted_lru_under_budget():
+    load = CountingLoader()
+    pool = ModelPool(max_bytes=250)
+    for name in ('a', 'b', 'a', 'a'):
+        with pool.lease(info(name), load) as r:
+            assert r['model'].path.endswith(name)
+    assert load.loads == ['/models/a', '/models/b']
+    with pool.lease(info('b'), load):
+        pass
+    # 加载 c 超出预算：卸载最久未用的 a，而不是刚用过的 b
+    a_slot = pool._slots['/models/a']
+    with pool.lease(info('c'), load):
+        pass
+    assert a_slot.attached is False and a_slot.value is None
+    m = pool.metrics()
+    assert m['resident_models'] == 2 and m['resident_bytes'] == 200 and m['evictions'] == 1
+    assert m['hits'] == 3 and m['misses'] == 3 and m['hit_rate'] == 0.5 and m['avg_load_seconds'] is not None
+    assert [x['path'] for x in m['models']] == ['/models/c', '/models/b']
+
+def test_models_in_use_are_not_unloaded():
+    load = CountingLoader()
+    pool = ModelPool(max_models=1)
+    held = pool.acquire(info('a'), load)
+    with pool.lease(info('b'), load):
+        # 两个模型都在使用：暂时超出上限，不卸载
+        assert len(pool._slots) == 2
+    # b 释放后回到上限内；a 仍被持有，不受影响
+    assert list(pool._slots) == ['/models/a'] and held.value['model'].closed is False
+    pool.release(held)
+    assert list(pool._slots) == ['/models/a']
+    # 文件变化后旧版本从池中摘下，但在最后一个持有者释放时才卸载
+    old = pool.acquire(info('a'), load)
+    new = pool.acquire(info('a', mtime=2.0), load)
+    assert load.loads == ['/models/a', '/models/b', '/models/a'] and pool.stats['reloads'] == 1
+    old_model = old.value['model']
+    assert old_model.closed is False and new.value['model'] is not old_model
+    pool.release(old)
+    assert old_model.closed is True and pool._bytes == 100
+    pool.release(new)
+
+def test_concurrent_requests_share_one_load_and_failures_are_not_cached():
+    load = CountingLoader(delay=0.1, fail={'/models/bad'})
+    pool = ModelPool()
+    results = []
+    def worker(name):
+        with pool.lease(info(name), load) as r:
+            results.append(r)
+    threads = [threading.Thread(target=worker, args=(n,)) for n in ['a'] * 5 + ['bad'] * 3]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert load.loads.count('/models/a') == 1 and load.loads.count('/models/bad') == 1
+    assert len({id(r['model']) for r in results if r['model']}) == 1
+    assert sum(1 for r in results if r['error'] == 'boom') == 3
+    assert '/models/bad' not in pool._slots and pool._bytes == 100
+    assert pool.stats['coalesced'] == 6 and pool.stats['load_failures'] == 1
+    with pool.lease(info('bad'), load):
+        pass
+    assert load.loads.count('/models/bad') == 2
+
+def test_loader_checks_and_warm_up_reuse_pooled_models(tmp_path, monkeypatch):
+    (tmp_path / 'm.onnx').write_bytes(b'0' * 10)
+    loads = []
+    class Session:
+        def get_inputs(self):
+            return [type('I', (), {'name': 'x'})()]
+        def run(self, names, feed):
+            return [[0.0]]
+    def fake_load(self, minfo):
+        loads.append(minfo['path'])
+        return {'backend': 'onnxruntime', 'model': Session(), 'meta': {}, 'error': None}
+    monkeypatch.setattr(ModelLoader, '_load_backend', fake_load)
+    loader = ModelLoader(preferred_dir=tmp_path, pool=ModelPool())
+    loader.warm_up(1, background=False)
+    assert loader.check_model(loader.find_all_models()['models'][0])['success']
+    assert loader.auto_infer_and_check()['success']
+    with loader.lease_model() as r:
+        assert r['backend'] == 'onnxruntime'
+    assert len(loads) == 1 and loader.pool.metrics()['hits'] == 3
+    # load_model 返回调用方独占的一份，不占用池里的模型
+    assert loader.load_model()['model'] is not loader.pool._slots[str(tmp_path / 'm.onnx')].value['model']
+    assert len(loads) == 2 and loader.pool.metrics()['hits'] == 3
+
+def test_held_model_survives_eviction_and_clear(tmp_path, monkeypatch):
+    for name in ('a', 'b'):
+        (tmp_path / f'{name}.onnx').write_bytes(b'0' * 10)
+    monkeypatch.setattr(ModelLoader, '_load_backend', lambda self, minfo: {'backend': 'fake', 'model': FakeModel(minfo['path']),
+                                                                           'meta': {}, 'error': None})
+    loader = ModelLoader(preferred_dir=tmp_path, pool=ModelPool(max_models=1))
+    held, release = loader.acquire_model(str(tmp_path / 'a.onnx'))
+    # 其他请求加载 b 使池超出上限，并清空池：a 仍被持有，不能被关闭
+    with loader.lease_model(str(tmp_path / 'b.onnx')) as other:
+        assert other['model'].path.endswith('b.onnx')
+    loader.pool.clear()
+    assert held['model'].closed is False and loader.pool._bytes == 10
+    assert not loader.pool._slots  # 已从池中摘下，最后一个持有者释放时才卸载
+    release(); release()
+    assert held['model'].closed is True and loader.pool._bytes == 0
@@ -0,0 +1,73 @@
+import os, sys, time, threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ai.model_loader import ModelLoader
+from ai.model_registry import ModelRegistry
+
+class SlowChecker:
+    """模拟加载权重：每次检查阻塞到 release 被设置"""
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = []
+        self.active = self.peak = 0
+        self.lock = threading.Lock()
+    def __call__(self, info):
+        with self.lock:
+            self.calls.append(info['path'])
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        self.release.wait(5)
+        with self.lock:
+            self.active -= 1
+        return {'model_path': info['path'], 'success': info['path'].endswith('.onnx'), 'error': None}
+
+def wait_for(cond, timeout=5):
+    end = time.time() + timeout
+    while time.time() < end:
+        if cond(): return True
+        time.sleep(0.01)
+    return False
+
+def make_models(tmp_path):
+    (tmp_path / 'sub').mkdir()
+    for name in ('a.gguf', 'b.onnx', 'sub/c.pt', 'notes.txt'):
+        (tmp_path / name).write_bytes(b'x' * 10)
+
+def test_snapshot_does_not_wait_for_health_checks(tmp_path):
+    make_models(tmp_path)
+    checker = SlowChecker()
+    registry = ModelRegistry(loader=ModelLoader(preferred_dir=tmp_path), health_workers=2, checker=checker)
+    try:
+        t0 = time.perf_counter()
+        snap = registry.snapshot()
+        assert time.perf_counter() - t0 < 1.0
+        assert sorted(m['name'] for m in snap['models']) == ['a.gguf', 'b.onnx', 'c.pt']
+        assert all(m['health'] == 'pending' and m['checked_at'] is None for m in snap['models'])
+        assert snap['pending_checks'] == 3
+        checker.release.set()
+        assert wait_for(lambda: registry.snapshot()['pending_checks'] == 0)
+        health = {m['name']: m['health'] for m in registry.snapshot()['models']}
+        assert health == {'a.gguf': 'error', 'b.onnx': 'ok', 'c.pt': 'error'}
+        assert all(m['checked_at'] for m in registry.snapshot()['models'])
+        assert checker.peak <= 2
+    finally:
+        registry.shutdown()
+
+def test_unchanged_models_reuse_cached_health(tmp_path):
+    make_models(tmp_path)
+    checker = SlowChecker()
+    checker.release.set()
+    registry = ModelRegistry(loader=ModelLoader(preferred_dir=tmp_path), checker=checker)
+    try:
+        registry.snapshot()
+        assert wait_for(lambda: len(checker.calls) == 3 and registry.snapshot()['pending_checks'] == 0)
+        registry.refresh_index()
+        assert len(checker.calls) == 3
+        # 文件大小变化 -> 新的 (path, size, mtime)，只重新检查这一个
+        (tmp_path / 'b.onnx').write_bytes(b'y' * 20)
+        registry.refresh_index()
+        assert wait_for(lambda: len(checker.calls) == 4)
+        assert checker.calls[-1].endswith('b.onnx')
+        (tmp_path / 'a.gguf').unlink()
+        assert registry.refresh_index() == 2
+    finally:
+        registry.shutdown()
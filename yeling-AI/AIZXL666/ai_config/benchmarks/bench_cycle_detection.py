@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark: dependency cycle detection on a generated graph — legacy recursive DFS vs iterative Tarjan vs incremental update.
+
+用法: python benchmarks/bench_cycle_detection.py [节点数] [平均出度]
+"""
+import os, sys, time, random
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+from utils.graph_algorithms import IncrementalSCC, scc_of_adjacency
+
+def legacy_detect_cycles(dependency_graph):
+    """原 SystemLogicValidator._detect_dependency_cycles（递归 DFS，每层复制路径）"""
+    cycles = []
+    visited = set()
+    rec_stack = set()
+    def dfs(node, path):
+        if node in rec_stack:
+            cycle_start = path.index(node)
+            cycles.append(path[cycle_start:] + [node])
+            return
+        if node in visited:
+            return
+        visited.add(node)
+        rec_stack.add(node)
+        for dep in dependency_graph.get(node, []):
+            dfs(dep, path + [node])
+        rec_stack.remove(node)
+    for node in dependency_graph:
+        if node not in visited:
+            dfs(node, [])
+    return cycles
+
+def make_graph(n, degree, seed=1):
+    """模块名 -> 依赖列表：大多数边指向“更底层”的模块，另有少量回边形成环"""
+    rnd = random.Random(seed)
+    names = [f'pkg{i % 50}/mod_{i}.py' for i in range(n)]
+    graph = {}
+    for i, name in enumerate(names):
+        deps = {names[rnd.randrange(i + 1, min(n, i + 200))] for _ in range(degree) if i + 1 < n}
+        if rnd.random() < 0.002 and i > 10:
+            deps.add(names[i - rnd.randrange(1, 10)])
+        graph[name] = sorted(deps)
+    return names, graph
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    try:
+        out = fn(*args)
+    except RecursionError:
+        out = RecursionError
+    return out, time.perf_counter() - t0
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    degree = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    names, graph = make_graph(n, degree)
+    edges = sum(len(v) for v in graph.values())
+    print(f'{n} nodes, {edges} edges')
+    print(f'{"method":<28}{"seconds":>10}{"cycles":>10}')
+
+    legacy, t = timed(legacy_detect_cycles, graph)
+    print(f'{"legacy recursive DFS":<28}{t:>10.3f}{"RecursionError" if legacy is RecursionError else len(legacy):>16}')
+    chain = {names[i]: [names[i + 1]] if i + 1 < n else [] for i in range(n)}
+    legacy, t = timed(legacy_detect_cycles, chain)
+    print(f'{"legacy DFS (import chain)":<28}{t:>10.3f}{"RecursionError" if legacy is RecursionError else len(legacy):>16}')
+    t0 = time.perf_counter()
+    comps = scc_of_adjacency(chain)
+    print(f'{"Tarjan (import chain)":<28}{time.perf_counter() - t0:>10.3f}{sum(len(c) > 1 for c in comps):>10}')
+
+    t0 = time.perf_counter()
+    comps = scc_of_adjacency(graph)
+    full = [c for c in comps if len(c) > 1 or c[0] in graph[c[0]]]
+    print(f'{"iterative Tarjan (full)":<28}{time.perf_counter() - t0:>10.3f}{len(full):>10}')
+
+    t0 = time.perf_counter()
+    index = IncrementalSCC(graph)
+    print(f'{"IncrementalSCC build":<28}{time.perf_counter() - t0:>10.3f}{len(index.cycles()):>10}')
+
+    rnd = random.Random(2)
+    position = {name: i for i, name in enumerate(names)}
+    for label, keep in (('incremental (5 files)', False), ('incremental (drop import)', True)):
+        total = 0.0; touched = 0; rounds = 20
+        for _ in range(rounds):
+            # 模拟改动少量文件：替换 5 个文件的全部导入，或只删掉其中一条导入
+            changed = {}
+            for name in rnd.sample(names, 5):
+                i = position[name]
+                if keep: changed[name] = sorted(index.adj[name])[1:]
+                else: changed[name] = [names[rnd.randrange(max(0, i - 100), min(n, i + 100))] for _ in range(degree)]
+            t0 = time.perf_counter()
+            touched += index.update(changed)
+            total += time.perf_counter() - t0
+        print(f'{label:<28}{total / rounds:>10.4f}{len(index.cycles()):>10}   avg recomputed nodes: {touched // rounds}')
+
+    t0 = time.perf_counter()
+    comps = scc_of_adjacency(index.adj)
+    expected = sorted(sorted(c) for c in comps if len(c) > 1 or c[0] in index.adj[c[0]])
+    assert sorted(sorted(c) for c in index.cycles()) == expected
+    print(f'{"full recompute (check)":<28}{time.perf_counter() - t0:>10.3f}{len(expected):>10}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Benchmark: MemoryCache ops/sec at capacity, current LRU implementation vs the previous min()-eviction one.
+
+用法: python benchmarks/bench_memory_cache.py [操作数]
+"""
+import os, sys, time, threading
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+from utils.memory_cache import MemoryCache, ShardedMemoryCache
+
+class LegacyMemoryCache:
+    """旧实现（写满后每次 set 用 min() 扫描全部条目）"""
+    def __init__(self, max_items=2000, default_ttl=600):
+        self._max = max_items
+        self._ttl = default_ttl
+        self._store = {}
+        self._lock = threading.Lock()
+    def set(self, key, value, ttl=None):
+        expire = time.time() + (ttl if ttl is not None else self._ttl)
+        with self._lock:
+            if len(self._store) >= self._max:
+                oldest = min(self._store.items(), key=lambda kv: kv[1][0])[0]
+                del self._store[oldest]
+            self._store[key] = (expire, value)
+    def get(self, key, default=None):
+        with self._lock:
+            v = self._store.get(key)
+            if not v: return default
+            if v[0] < time.time():
+                del self._store[key]; return default
+            return v[1]
+
+def bench(cache, size, ops):
+    """先写满到 size，再交替执行 get（命中）与 set（新键，触发淘汰）"""
+    for i in range(size):
+        cache.set(f'complexity:{i}', i)
+    t0 = time.perf_counter()
+    for i in range(ops):
+        cache.get(f'complexity:{size + i - 1}')
+        cache.set(f'complexity:{size + i}', i)
+    return 2 * ops / (time.perf_counter() - t0)
+
+def bench_threads(cache, threads, ops):
+    """多线程读多写少（9:1）负载，模拟 parallel_workers 个插件线程查询 complexity: 键"""
+    for i in range(1000):
+        cache.set(f'complexity:{i}', i)
+    def worker(t):
+        for i in range(ops):
+            k = f'complexity:{(t * 7919 + i) % 1000}'
+            if i % 10: cache.get(k)
+            else: cache.set(k, i)
+    ts = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    t0 = time.perf_counter()
+    for th in ts: th.start()
+    for th in ts: th.join()
+    return threads * ops / (time.perf_counter() - t0)
+
+def main():
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f'{"entries":>8}{"legacy ops/s":>16}{"new ops/s":>14}{"speedup":>10}')
+    for size in (10_000, 100_000):
+        legacy = bench(LegacyMemoryCache(max_items=size), size, ops)
+        new = bench(MemoryCache(max_items=size, background_expiry=False), size, ops)
+        print(f'{size:>8}{legacy:>16.0f}{new:>14.0f}{new / legacy:>9.1f}x')
+    print(f'\n{"threads":>8}{"legacy ops/s":>16}{"single ops/s":>14}{"sharded ops/s":>16}')
+    for threads in (1, 4, 8, 16):
+        row = [bench_threads(c, threads, ops * 10) for c in (LegacyMemoryCache(max_items=2000), MemoryCache(max_items=2000, background_expiry=False),
+                                                          ShardedMemoryCache(shards=8, max_items=2000, background_expiry=False))]
+        print(f'{threads:>8}{row[0]:>16.0f}{row[1]:>14.0f}{row[2]:>16.0f}')
+
+if __name__ == '__main__':
+    main()
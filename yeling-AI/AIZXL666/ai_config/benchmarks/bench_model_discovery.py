@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark: model discovery, legacy per-suffix recursive glob vs one scandir walk vs a warm persisted directory index.
+
+用法: python benchmarks/bench_model_discovery.py [目录数，默认 2000] [每目录文件数，默认 20]
+模拟模型缓存目录：大量非模型文件（分词器、配置、分片索引）中夹杂少量模型文件。
+"""
+import os, sys, time, random, tempfile
+from pathlib import Path
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+from ai.model_index import ModelIndex, MODEL_FORMATS
+
+def legacy_find(d):
+    """原 find_all_models：每个后缀一次 glob('**/*ext')，每个命中 stat 两次"""
+    found = []
+    for ext, mtype in MODEL_FORMATS.items():
+        for f in Path(d).glob(f'**/*{ext}'):
+            found.append({'path': str(f.resolve()), 'type': mtype, 'name': f.name,
+                          'size': f.stat().st_size, 'last_modified': f.stat().st_mtime})
+    return found
+
+def make_tree(root, n_dirs, n_files, seed=1):
+    rnd = random.Random(seed)
+    dirs = [root]
+    for i in range(n_dirs):
+        d = os.path.join(rnd.choice(dirs), f'd{i}')
+        os.mkdir(d)
+        dirs.append(d)
+        for k in range(n_files):
+            name = f'model{k}{rnd.choice(list(MODEL_FORMATS))}' if rnd.random() < 0.02 else f'file{k}.json'
+            open(os.path.join(d, name), 'w').close()
+    past = time.time() - 60
+    for d in dirs:
+        os.utime(d, (past, past))
+
+def timed(fn):
+    t0 = time.perf_counter()
+    res = fn()
+    return time.perf_counter() - t0, res
+
+def main():
+    n_dirs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    n_files = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as root:
+        tree = os.path.join(root, 'models')
+        os.mkdir(tree)
+        make_tree(tree, n_dirs, n_files)
+        index_path = os.path.join(root, 'model_index.json')
+        t_old, old = timed(lambda: legacy_find(tree))
+        t_cold, new = timed(lambda: ModelIndex(index_path=index_path).scan([tree]))
+        warm = ModelIndex(index_path=index_path)
+        t_warm, again = timed(lambda: warm.scan([tree]))
+        key = lambda m: m['path']
+        assert sorted(map(str, sorted(old, key=key))) == sorted(map(str, sorted(new, key=key))) == sorted(map(str, sorted(again, key=key)))
+        print(f'{n_dirs} dirs x {n_files} files, {len(new)} models')
+        print(f'{"legacy 8x glob":<28}{t_old:>8.3f}s')
+        print(f'{"single scandir walk":<28}{t_cold:>8.3f}s  ({t_old / t_cold:.1f}x)')
+        print(f'{"persisted index (restart)":<28}{t_warm:>8.3f}s  ({t_old / t_warm:.1f}x, dirs listed: {warm.stats["dirs_listed"]})')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Benchmark: per-request cost of logging a monitor event and latency of /monitor-style queries, old (append per request, parse whole file) vs MonitorLog.
+
+用法: python benchmarks/bench_monitor_log.py [日志条数，默认 200000]
+在临时目录中生成日志，不影响 reports/monitor_log.json。
+"""
+import os, sys, json, time, shutil, tempfile, datetime
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+from utils.monitor_log import MonitorLog
+
+def legacy_append(path, event, detail):
+    entry = {'event': event, 'detail': detail, 'timestamp': datetime.datetime.utcnow().isoformat() + 'Z'}
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+def legacy_query(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    return [json.loads(line) for line in lines]
+
+def timed(fn, repeat=1):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - t0) / repeat, result
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    tmp = tempfile.mkdtemp()
+    legacy_path = os.path.join(tmp, 'legacy.json')
+    log = MonitorLog(os.path.join(tmp, 'monitor_log.json'), max_bytes=0, max_age=0)
+    details = [{'path': f'/api/{i % 7}', 'method': 'GET'} for i in range(n)]
+    t_legacy, _ = timed(lambda: [legacy_append(legacy_path, 'request', d) for d in details])
+    t_new, _ = timed(lambda: [log.append('request', d) for d in details])
+    log.flush(timeout=60)
+    print(f'{n} events, {os.path.getsize(log.path) / 1e6:.1f} MB')
+    print(f'append per request    legacy {t_legacy / n * 1e6:8.1f} us   buffered {t_new / n * 1e6:8.1f} us')
+    t_full, _ = timed(lambda: legacy_query(legacy_path), 3)
+    t_index, _ = timed(lambda: log.query(limit=1), 1)
+    t_tail, _ = timed(lambda: log.query(limit=100), 20)
+    with open(log.path, 'rb') as f:
+        f.seek(os.path.getsize(log.path) // 2)
+        f.readline()
+        since = json.loads(f.readline())['timestamp']
+    t_since, _ = timed(lambda: log.query(since=since, path='/api/3', limit=100), 20)
+    t_filter, _ = timed(lambda: log.query(event='error', limit=100), 3)
+    print(f'legacy /monitor (parse whole file)      {t_full * 1000:8.1f} ms')
+    print(f'first query (builds sparse index)       {t_index * 1000:8.1f} ms')
+    print(f'latest 100                              {t_tail * 1000:8.1f} ms')
+    print(f'100 from mid-file timestamp, path=...   {t_since * 1000:8.1f} ms')
+    print(f'event filter, no matches (full scan)    {t_filter * 1000:8.1f} ms')
+    log.close()
+    shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    main()
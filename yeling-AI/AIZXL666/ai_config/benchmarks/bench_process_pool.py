@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Benchmark: ComplexityScanner + DependencyScanner on a synthetic tree, thread vs process executor.
+
+用法: python benchmarks/bench_process_pool.py [文件数] [每文件函数数]
+"""
+import os, sys, time, tempfile
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+from scanner.file_index import walk_files, shutdown_process_pools
+from scanner.complexity_scanner import ComplexityScanner
+from scanner.dependency_scanner import DependencyScanner
+
+FUNC = '''
+def func_{i}(a, b, c):
+    total = 0
+    for x in range(a):
+        if x % 2:
+            total += x * b
+        elif x % 3:
+            while c > 0:
+                c -= 1
+        else:
+            total -= {i}
+    return total
+'''
+
+def make_tree(root, n_files, n_funcs):
+    for k in range(n_files):
+        d = os.path.join(root, f'pkg{k % 20}')
+        os.makedirs(d, exist_ok=True)
+        with open(os.path.join(d, f'mod{k}.py'), 'w', encoding='utf-8') as f:
+            f.write('import os\nimport json\n')
+            f.write(''.join(FUNC.format(i=i) for i in range(n_funcs)))
+
+def run_once(root, settings):
+    records = walk_files([root])
+    for r in records: r.text  # 预读，只比较分析阶段
+    t0 = time.perf_counter()
+    ComplexityScanner().run_on_files(records, None, settings)
+    DependencyScanner().run_on_files(records, None, settings)
+    return time.perf_counter() - t0
+
+def main():
+    n_files = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    n_funcs = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, n_files, n_funcs)
+        base = run_once(root, {'scanner': {'executor': 'thread'}})
+        print(f'{n_files} files x {n_funcs} funcs, cpu_count={os.cpu_count()}')
+        print(f'{"mode":<16}{"seconds":>10}{"speedup":>10}')
+        print(f'{"thread":<16}{base:>10.2f}{1.0:>10.2f}')
+        for workers in (1, 2, 4, 8):
+            settings = {'scanner': {'executor': 'process', 'process_workers': workers, 'chunk_size': 16}}
+            run_once(root, settings)  # 预热进程池
+            t = run_once(root, settings)
+            print(f'{"process x"+str(workers):<16}{t:>10.2f}{base/t:>10.2f}')
+        shutdown_process_pools()
+
+if __name__ == '__main__':
+    main()
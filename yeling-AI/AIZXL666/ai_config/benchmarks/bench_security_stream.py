@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Benchmark: SecurityScanner on a large log file, whole-file read vs streamed chunks; reports time and peak RSS.
+
+用法: python benchmarks/bench_security_stream.py [GiB，默认 2] [整读模式的大小上限 GiB，默认 1]
+每种模式在独立子进程中运行，峰值 RSS 取自 getrusage。
+"""
+import os, sys, time, tempfile, resource, subprocess
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+def make_log(path, gib):
+    line = b'2024-01-01 12:00:00 INFO worker-3 request handled in 12ms status=200 path=/api/v1/items\n'
+    block = bytearray()
+    i = 0
+    while len(block) < (1 << 20):
+        block += line
+        i += 1
+        if i % 5000 == 0: block += b"config api_key = 'ABCDEFGH12345678' token=sk_live_ABCDEFGH12\n"
+    total = int(gib * (1 << 30))
+    with open(path, 'wb') as f:
+        written = 0
+        while written < total:
+            f.write(block); written += len(block)
+    return written
+
+def run_mode(mode, path):
+    from scanner.security_scanner import SecurityScanner, stream_secrets
+    t0 = time.perf_counter()
+    if mode == 'legacy':
+        # 旧实现：整文件读入后逐个模式扫描
+        txt = open(path, 'r', encoding='utf-8', errors='ignore').read()
+        n = sum(1 for pat in SecurityScanner.PATTERNS for _ in pat.finditer(txt))
+    else:
+        n = len(stream_secrets(path))
+    elapsed = time.perf_counter() - t0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f'{mode} {n} {elapsed:.2f} {rss:.0f}')
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--mode':
+        return run_mode(sys.argv[2], sys.argv[3])
+    gib = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    legacy_max = float(sys.argv[2]) if len(sys.argv) > 2 else 1
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, 'big.log')
+        size = make_log(path, gib)
+        print(f'file: {size / (1 << 30):.2f} GiB')
+        print(f'{"mode":<10}{"findings":>10}{"seconds":>10}{"MB/s":>10}{"peak RSS MB":>14}')
+        for mode in ('legacy', 'stream'):
+            if mode == 'legacy' and gib > legacy_max:
+                print(f'{mode:<10}{"skipped (file larger than legacy limit)":>44}')
+                continue
+            out = subprocess.run([sys.executable, __file__, '--mode', mode, path], capture_output=True, text=True)
+            if out.returncode != 0:
+                print(f'{mode:<10} failed: {out.stderr.strip().splitlines()[-1:]}')
+                continue
+            _, n, secs, rss = out.stdout.split()
+            print(f'{mode:<10}{n:>10}{secs:>10}{size / (1 << 20) / float(secs):>10.0f}{rss:>14}')
+
+if __name__ == '__main__':
+    main()
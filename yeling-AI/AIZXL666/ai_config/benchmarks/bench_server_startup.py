@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark: time from process start until server.py answers HTTP requests (serving) and until /ready reports warm.
+
+用法: python benchmarks/bench_server_startup.py [重复次数，默认 5] [工作区目录，默认 ai_config 本身]
+分别以快速启动（后台启动任务）和 AI_ASSISTANT_FAST_START=0（导入时同步完成，旧行为）启动，目标：300 ms 内开始服务。
+"""
+import os, sys, time, socket, statistics, subprocess, urllib.request, urllib.error
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+
+CHILD = r'''
+import sys
+sys.path.insert(0, {base!r})
+import server
+from werkzeug.serving import make_server
+srv = make_server('127.0.0.1', {port}, server.app, threaded=True)
+server.STARTUP.start()
+srv.serve_forever()
+'''
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def probe(port):
+    """返回 /ready 的 HTTP 状态码；连接失败返回 None"""
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/ready', timeout=1) as r:
+            return r.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return None
+
+def run_once(fast_start, workspace, timeout=300):
+    port = free_port()
+    env = dict(os.environ, AI_ASSISTANT_FAST_START='1' if fast_start else '0', AI_ASSISTANT_WORKSPACE=workspace)
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-c', CHILD.format(base=BASE_DIR, port=port)], cwd=BASE_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    serving = warm = None
+    try:
+        while time.perf_counter() - t0 < timeout:
+            code = probe(port)
+            now = time.perf_counter() - t0
+            if code is not None and serving is None:
+                serving = now
+            if code == 200:
+                warm = now
+                break
+            time.sleep(0.002)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return serving, warm
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    workspace = sys.argv[2] if len(sys.argv) > 2 else BASE_DIR
+    print(f'workspace: {workspace}')
+    for fast in (True, False):
+        runs = [run_once(fast, workspace) for _ in range(repeat)]
+        serving = statistics.median(r[0] for r in runs) * 1000
+        warm = statistics.median(r[1] for r in runs) * 1000
+        label = 'fast start' if fast else 'legacy (sync import)'
+        print(f'{label:<22} serving {serving:>7.0f} ms   warm {warm:>7.0f} ms   (median of {repeat})')
+
+if __name__ == '__main__':
+    main()
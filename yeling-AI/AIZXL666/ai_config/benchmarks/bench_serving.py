@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Benchmark: latency of fast endpoints (/rules GET, /monitor) under concurrent slow requests, served by serve.py.
+
+用法: python benchmarks/bench_serving.py [慢请求并发数，默认 8] [快速请求次数，默认 50] [慢接口，默认 /structure] [工作区目录，默认 ai_config 本身]
+分别在启用慢接口线程池（settings.yaml 默认配置）与关闭它（所有请求共用连接线程）时运行，连接线程数均为 8。
+"""
+import os, sys, time, json, socket, signal, tempfile, statistics, threading, subprocess, urllib.request, urllib.error
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, BASE_DIR)
+from serve import load_serving_settings
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def get(port, path, timeout=300):
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=timeout) as r:
+            r.read()
+            code = r.status
+    except urllib.error.HTTPError as e:
+        code = e.code
+    except OSError:
+        code = None
+    return code, time.perf_counter() - t0
+
+def start(slow_lane, port, workspace):
+    options = load_serving_settings()
+    if not slow_lane:
+        options['slow_lane']['routes'] = []
+    cfg = tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False)
+    json.dump({'server': options}, cfg)
+    cfg.close()
+    proc = subprocess.Popen([sys.executable, os.path.join(BASE_DIR, 'serve.py'), '--port', str(port), '--threads', '8',
+                             '--config', cfg.name], cwd=BASE_DIR, env=dict(os.environ, AI_ASSISTANT_WORKSPACE=workspace),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    while get(port, '/ready', timeout=1)[0] != 200:
+        time.sleep(0.05)
+    return proc, cfg.name
+
+def run(slow_lane, concurrency, count, slow_path, workspace):
+    port = free_port()
+    proc, cfg = start(slow_lane, port, workspace)
+    slow_codes = []
+    try:
+        threads = [threading.Thread(target=lambda: slow_codes.append(get(port, slow_path)[0])) for _ in range(concurrency)]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)
+        fast = [get(port, path)[1] for _ in range(count) for path in ('/rules', '/monitor')]
+        for t in threads:
+            t.join()
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait()
+        os.unlink(cfg)
+    fast.sort()
+    return statistics.median(fast) * 1000, fast[int(len(fast) * 0.95) - 1] * 1000, slow_codes
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    slow_path = sys.argv[3] if len(sys.argv) > 3 else '/structure'
+    workspace = sys.argv[4] if len(sys.argv) > 4 else BASE_DIR
+    print(f'workspace: {workspace}')
+    print(f'{concurrency} concurrent {slow_path} requests, {count} x (/rules, /monitor)')
+    for slow_lane in (True, False):
+        p50, p95, codes = run(slow_lane, concurrency, count, slow_path, workspace)
+        label = 'slow lane' if slow_lane else 'shared threads'
+        summary = ', '.join(f'{c}: {codes.count(c)}' for c in sorted(set(codes), key=str))
+        print(f'{label:<15} fast p50 {p50:>8.1f} ms   p95 {p95:>8.1f} ms   slow responses {{{summary}}}')
+
+if __name__ == '__main__':
+    main()
@@ -17,7 +17,7 @@ def print_json(data):
 
 def main():
     if len(sys.argv) < 2:
-        print("用法: cli.py [self_check|rules|structure|tasks|report|model_check] [参数]")
+        print("用法: cli.py [self_check|rules|structure|tasks|report|model_check|context] [参数]")
         sys.exit(1)
     cmd = sys.argv[1]
     if cmd == "self_check":
@@ -41,6 +41,25 @@ def main():
     elif cmd == "model_check":
         r = requests.get(f"{API_BASE}/model_check")
         print_json(r.json())
+    elif cmd == "context":
+        # 直接读取共享缓存后端中的最新上下文，无需启动服务
+        import yaml
+        from utils.memory_cache import open_backend
+        with open(BASE_DIR / 'config' / 'settings.yaml', 'r', encoding='utf-8') as f:
+            backend = open_backend(yaml.safe_load(f) or {})
+        if backend is None:
+            print("未配置共享缓存后端（settings.yaml 中 cache.backend）")
+            sys.exit(1)
+        found, ctx, _ = backend.get('latest_context')
+        if not found:
+            print_json({'error': '共享缓存中没有 latest_context，请先运行 start_ai_assistant.py'})
+            sys.exit(1)
+        if len(sys.argv) > 2 and sys.argv[2] == "--full":
+            print_json(ctx)
+        else:
+            print_json({k: ctx.get(k) for k in ('workspace', 'generated_at', 'updated_at', 'incremental_updates') if k in ctx} |
+                       {'scanners': sorted(ctx.get('summary', {})), 'files': len(ctx.get('files', {})),
+                        'security_findings': len(ctx.get('security', []))})
     else:
         print(f"未知命令: {cmd}")
         sys.exit(1)
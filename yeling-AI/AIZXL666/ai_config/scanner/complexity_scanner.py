@@ -1,6 +1,23 @@
 """Estimate simple complexity scores per Python file."""
-import ast, time, os
+import ast, os
 from pathlib import Path
+from scanner.file_index import walk_files, map_records
+from utils.ast_cache import parse_source
+def score_source(fp, src):
+    if src is None:
+        return {'file':fp,'error':'read'}
+    try:
+        tree = parse_source(fp, src)
+        funcs = len([n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)])
+        branches = len([n for n in ast.walk(tree) if isinstance(n, (ast.If, ast.For, ast.While))])
+        # heuristic score
+        score = funcs*2 + branches
+        return {'file':fp,'score':score}
+    except Exception as e:
+        return {'file':fp,'error':str(e)}
+def cache_key(rec):
+    # mtime/size are part of the key so an edited file never gets a stale score
+    return f'complexity:{rec.path}:{rec.mtime}:{rec.size}'
 class ComplexityScanner:
     name = 'complexity_analyzer'
     def score_file(self, fp):
@@ -8,32 +25,22 @@ class ComplexityScanner:
             src = open(fp, 'r', encoding='utf-8').read()
         except Exception:
             return {'file':fp,'error':'read'}
-        try:
-            tree = ast.parse(src)
-            funcs = len([n for n in ast.walk(tree) if isinstance(n, ast.FunctionDef)])
-            branches = len([n for n in ast.walk(tree) if isinstance(n, (ast.If, ast.For, ast.While))])
-            # heuristic score
-            score = funcs*2 + branches
-            time.sleep(0.005)
-            return {'file':fp,'score':score}
-        except Exception as e:
-            return {'file':fp,'error':str(e)}
+        return score_source(fp, src)
+    def run_on_files(self, records, cache, settings, scan_cache=None):
+        records = [r for r in records if r.endswith('.py')]
+        files = [r.path for r in records]
+        ttl = (settings or {}).get('scanner',{}).get('heavy_ttl',300)
+        out = [cache.get(cache_key(rec)) if cache is not None else None for rec in records]
+        todo = [rec for rec, c in zip(records, out) if c is None]
+        scored, stats = map_records(self.name, todo, score_source, scan_cache, settings)
+        it = iter(scored)
+        for i, c in enumerate(out):
+            if c is not None: continue
+            out[i] = r = next(it)
+            if cache is not None: cache.set(cache_key(records[i]), r, ttl=ttl)
+        return {'files':files,'complexity':out,'cache_stats':stats,'nodes':[],'edges':[]}
     def run(self, paths, cache, settings):
-        files=[]
-        for p in paths:
-            for root,dirs,fs in os.walk(p):
-                for f in fs:
-                    if f.endswith('.py'):
-                        files.append(str(Path(root)/f))
-        out=[]
-        for fp in files:
-            cached = cache.get('complexity:'+fp) if cache else None
-            if cached is not None:
-                out.append(cached); continue
-            r = self.score_file(fp)
-            if cache: cache.set('complexity:'+fp, r, ttl=settings.get('scanner',{}).get('heavy_ttl',300))
-            out.append(r)
-        return {'files':files,'complexity':out,'nodes':[],'edges':[]}
+        return self.run_on_files(walk_files(paths, settings), cache, settings)
 def register(): return ComplexityScanner()
 if __name__ == "__main__":
     print("ComplexityScanner 仅作为模块使用，不建议直接运行。")
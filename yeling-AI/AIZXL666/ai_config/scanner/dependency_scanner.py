@@ -1,42 +1,140 @@
 """Parse imports from Python files to build simple dependency mapping."""
-import ast, os
+import ast, os, time, threading
+import importlib.util
 from pathlib import Path
 import subprocess, sys
+from scanner.file_index import walk_files, map_records
+from utils.ast_cache import parse_source
+from utils.graph_algorithms import CSRGraph
+# 扫描缓存中的结果格式版本（相对导入改为带前导点的写法）
+CACHE_VERSION = 2
+STDLIB_MODULES = frozenset(getattr(sys, 'stdlib_module_names', ())) | frozenset(sys.builtin_module_names)
+def parse_imports(fp, src):
+    """返回文件中导入的模块名；相对导入保留前导点（from .x import y -> '.x'，from . import y -> '.y'）"""
+    try:
+        tree = parse_source(fp, src)
+    except Exception:
+        return []
+    imports = []
+    for n in ast.walk(tree):
+        if isinstance(n, ast.Import):
+            for name in n.names:
+                imports.append(name.name)
+        elif isinstance(n, ast.ImportFrom):
+            dots = '.' * (n.level or 0)
+            if n.module: imports.append(dots + n.module)
+            elif dots: imports.extend(dots + a.name for a in n.names)
+    return imports
+def local_module_index(files):
+    """工作区内可被绝对导入的顶层名字：.py 文件名与包含 .py 文件的目录名（只取公共根目录以下的部分）"""
+    index = set()
+    if not files: return index
+    base = os.path.dirname(os.path.commonpath([os.path.dirname(fp) for fp in files]))
+    for fp in files:
+        rel = Path(os.path.relpath(fp, base))
+        index.add(rel.stem)
+        index.update(part for part in rel.parent.parts if part.isidentifier())
+    return index
+def classify_modules(modules, local_index):
+    """把模块按顶层名字分为 stdlib / local / third_party / missing。
+
+    只对顶层名字调用 find_spec（不会执行模块代码），每个名字每次扫描只解析一次。
+    """
+    table = {}; kinds = {}
+    for mod in modules:
+        top = mod.split('.')[0]
+        if top not in table:
+            if top in STDLIB_MODULES: table[top] = 'stdlib'
+            elif top in local_index: table[top] = 'local'
+            else:
+                try:
+                    found = importlib.util.find_spec(top) is not None
+                except (ImportError, ValueError):
+                    found = False
+                table[top] = 'third_party' if found else 'missing'
+        kinds[mod] = table[top]
+    return kinds, table
+def module_names(files):
+    """点分模块名 -> 文件列表：每个文件登记其路径的所有后缀（pkg/sub/m.py -> m, sub.m, pkg.sub.m），
+    包的 __init__.py 登记为包名。调用方不知道 sys.path 根目录，所以按后缀匹配。"""
+    names = {}
+    if not files: return names
+    base = os.path.dirname(os.path.commonpath([os.path.dirname(fp) for fp in files]))
+    for fp in files:
+        parts = list(Path(os.path.relpath(fp, base)).with_suffix('').parts)
+        if parts[-1] == '__init__': parts.pop()
+        for k in range(len(parts)):
+            names.setdefault('.'.join(parts[k:]), []).append(fp)
+    return names
+def _closest(candidates, fp):
+    """同名模块有多个候选时（如 release/source 副本），取与导入方目录公共前缀最长的那个"""
+    if len(candidates) == 1: return candidates[0]
+    here = os.path.dirname(fp)
+    return max(candidates, key=lambda c: (len(os.path.commonpath([here, os.path.dirname(c)])), -len(c)))
+def resolve_import(fp, mod, names, file_set):
+    """把 fp 中的一条导入解析为工作区内的文件路径；外部模块返回 None"""
+    if mod.startswith('.'):
+        level = len(mod) - len(mod.lstrip('.'))
+        base = os.path.dirname(fp)
+        for _ in range(level - 1): base = os.path.dirname(base)
+        parts = [p for p in mod[level:].split('.') if p]
+        # 逐级回退：from .a.b import c 中 b 可能是 a 模块里的属性
+        for k in range(len(parts), -1, -1):
+            target = os.path.join(base, *parts[:k])
+            for cand in (target + '.py', os.path.join(target, '__init__.py')):
+                if cand in file_set and cand != fp: return cand
+        return None
+    parts = mod.split('.')
+    for k in range(len(parts), 0, -1):
+        cands = names.get('.'.join(parts[:k]))
+        if cands:
+            target = _closest(cands, fp)
+            return target if target != fp else None
+    return None
+def resolve_edges(files, deps):
+    """返回文件级导入图（CSRGraph，节点顺序与 files 一致）"""
+    names = module_names(files); file_set = set(files)
+    index = {fp: i for i, fp in enumerate(files)}
+    edges = set()
+    for fp, mods in deps.items():
+        for mod in mods:
+            target = resolve_import(fp, mod, names, file_set)
+            if target is not None: edges.add((index[fp], index[target]))
+    return CSRGraph.from_edges(len(files), edges, labels=list(files), dedupe=False)
 class DependencyScanner:
     name = 'dependency_parser'
+    def run_on_files(self, records, cache, settings, scan_cache=None):
+        records = [r for r in records if r.endswith('.py')]
+        files = [r.path for r in records]
+        parsed, stats = map_records(f'{self.name}@{CACHE_VERSION}', records, parse_imports, scan_cache, settings)
+        deps = dict(zip(files, parsed))
+        # 只解析去重后的绝对导入：耗时与唯一模块数成正比，而不是导入语句总数
+        t0 = time.perf_counter()
+        unique = {m for imports in parsed for m in imports if not m.startswith('.')}
+        _, table = classify_modules(sorted(unique), local_module_index(files))
+        missing = sorted(top for top, kind in table.items() if kind == 'missing')
+        modules = {kind: sorted(top for top, k in table.items() if k == kind) for kind in ('stdlib', 'local', 'third_party', 'missing')}
+        resolution = {'imports': sum(len(i) for i in parsed), 'unique_modules': len(unique), 'top_level': len(table),
+                      'seconds': round(time.perf_counter() - t0, 4)}
+        conf = ((settings or {}).get('scanner', {}) or {}).get('dependencies', {}) or {}
+        if missing and conf.get('auto_install'):
+            # 显式开启时才安装，并放到后台线程，不阻塞扫描
+            threading.Thread(target=install_missing, args=(missing,), daemon=True, name='dependency-install').start()
+        # 文件级导入边：紧凑整数邻接表放在 graph，edges 保留可视化使用的字典形式
+        graph = resolve_edges(files, deps)
+        edges = [{'src': files[u], 'tgt': files[graph.targets[k]], 'type': 'dependency'}
+                 for u in range(graph.n) for k in range(graph.offsets[u], graph.offsets[u + 1])]
+        return {'files':files,'dependencies':deps,'missing':missing,'modules':modules,'resolution':resolution,
+                'graph':graph.to_dict(),'cache_stats':stats,'nodes':[],'edges':edges}
     def run(self, paths, cache, settings):
-        deps={}; files=[]; missing=set()
-        for p in paths:
-            for root,dirs,fs in os.walk(p):
-                for f in fs:
-                    if f.endswith('.py'):
-                        fp = str(Path(root)/f); files.append(fp)
-                        try:
-                            tree = ast.parse(open(fp,'r',encoding='utf-8').read())
-                            imports = []
-                            for n in ast.walk(tree):
-                                if isinstance(n, ast.Import):
-                                    for name in n.names:
-                                        imports.append(name.name)
-                                elif isinstance(n, ast.ImportFrom):
-                                    if n.module: imports.append(n.module)
-                            deps[fp] = imports
-                            # 检查依赖是否已安装
-                            for mod in imports:
-                                try:
-                                    __import__(mod)
-                                except ImportError:
-                                    missing.add(mod)
-                        except Exception:
-                            deps[fp] = []
-        # 自动安装缺失依赖
-        for mod in missing:
-            try:
-                print(f'[依赖补齐] 自动安装: {mod}')
-                subprocess.run([sys.executable, '-m', 'pip', 'install', mod])
-            except Exception as e:
-                print(f'[依赖补齐] 安装失败: {mod}, 错误: {e}')
-        return {'files':files,'dependencies':deps,'missing':list(missing),'nodes':[],'edges':[]}
+        return self.run_on_files(walk_files(paths, settings), cache, settings)
+def install_missing(missing):
+    for mod in missing:
+        try:
+            print(f'[依赖补齐] 自动安装: {mod}')
+            subprocess.run([sys.executable, '-m', 'pip', 'install', mod])
+        except Exception as e:
+            print(f'[依赖补齐] 安装失败: {mod}, 错误: {e}')
 def register(): return DependencyScanner()
 if __name__ == "__main__":
     print("DependencyScanner 仅作为模块使用，不建议直接运行。")
@@ -1,14 +1,33 @@
 """Pluginized scanner loader + async runner using ThreadPoolExecutor for heavy tasks."""
-import importlib.util, asyncio, os
+import importlib.util, asyncio, os, inspect
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor
+from scanner.file_index import walk_files, FileRecord
+# 扫描器目录中不是插件的辅助模块
+NON_PLUGIN_MODULES = ('__init__','dispatcher','file_index')
 class ScannerDispatcher:
-    def __init__(self, scanner_folder:Path, cache=None, settings=None):
+    def __init__(self, scanner_folder:Path, cache=None, settings=None, scan_cache=None):
         self.scanner_folder = Path(scanner_folder)
         self.cache = cache
         self.settings = settings or {}
         self.plugins = {}
         self.plugin_files = set()
+        self.scan_cache = scan_cache if scan_cache is not None else self._open_scan_cache()
+
+    def _open_scan_cache(self):
+        """scanner.scan_cache 配置了路径时启用持久化扫描缓存（相对路径以 ai_config 目录为基准）"""
+        db = self.settings.get('scanner',{}).get('scan_cache')
+        if not db: return None
+        db = Path(db)
+        if not db.is_absolute():
+            db = self.scanner_folder.parent / db
+        try:
+            db.parent.mkdir(parents=True, exist_ok=True)
+            from utils.scan_cache import ScanCache
+            return ScanCache(db)
+        except Exception as e:
+            print('scan cache disabled', e)
+            return None
 
     def find_gpt_folder(start_dir=None):
         if start_dir is None:
@@ -23,7 +42,7 @@ class ScannerDispatcher:
     async def load_plugins(self):
         if not self.scanner_folder.exists(): return
         for p in self.scanner_folder.glob('*.py'):
-            if p.stem in ('__init__','dispatcher'): continue
+            if p.stem in NON_PLUGIN_MODULES or p.stem.startswith('test_'): continue
             if p.name in self.plugin_files:
                 continue  # 已加载，无需重复
             spec = importlib.util.spec_from_file_location(f'scanner.{p.stem}', str(p))
@@ -56,24 +75,65 @@ class ScannerDispatcher:
         except Exception as e:
             print('plugin reload fail', p.name, e)
         return False
+    def _run_plugin(self, plug, paths, records):
+        """新插件接口 run_on_files 共享同一次遍历的文件记录，旧插件回退到 run(paths)"""
+        if records is not None and hasattr(plug, 'run_on_files'):
+            if self.scan_cache is not None and 'scan_cache' in inspect.signature(plug.run_on_files).parameters:
+                return plug.run_on_files(records, self.cache, self.settings, scan_cache=self.scan_cache)
+            return plug.run_on_files(records, self.cache, self.settings)
+        return plug.run(paths, self.cache, self.settings)
+
     async def run_all(self, paths, parallel=True):
         loop = asyncio.get_running_loop()
         results = {}
-        if parallel:
-            with ThreadPoolExecutor(max_workers=self.settings.get('scanner',{}).get('parallel_workers',4)) as ex:
-                tasks = [loop.run_in_executor(ex, plug.run, paths, self.cache, self.settings) for plug in self.plugins.values()]
-                completed = await asyncio.gather(*tasks, return_exceptions=True)
-                for plug, res in zip(self.plugins.values(), completed):
-                    if isinstance(res, Exception):
-                        results[plug.name] = {'error':str(res)}
-                    else:
-                        results[plug.name] = res
-        else:
+        records = None
+        if any(hasattr(plug, 'run_on_files') for plug in self.plugins.values()):
+            # 整个工作区只遍历一次，每个文件只读取一次
+            records = await loop.run_in_executor(None, walk_files, paths, self.settings)
+        try:
+            if parallel:
+                with ThreadPoolExecutor(max_workers=self.settings.get('scanner',{}).get('parallel_workers',4)) as ex:
+                    tasks = [loop.run_in_executor(ex, self._run_plugin, plug, paths, records) for plug in self.plugins.values()]
+                    completed = await asyncio.gather(*tasks, return_exceptions=True)
+                    for plug, res in zip(self.plugins.values(), completed):
+                        if isinstance(res, Exception):
+                            results[plug.name] = {'error':str(res)}
+                        else:
+                            results[plug.name] = res
+            else:
+                for plug in self.plugins.values():
+                    try:
+                        results[plug.name] = self._run_plugin(plug, paths, records)
+                    except Exception as e:
+                        results[plug.name] = {'error':str(e)}
+        finally:
+            for rec in records or ():
+                rec.release()
+            if self.scan_cache is not None:
+                self.scan_cache.commit()
+        return results
+
+    def run_on_paths(self, file_paths):
+        """增量扫描：只对给定文件运行支持 run_on_files 的插件（供文件监听使用）"""
+        records = []
+        for fp in file_paths:
+            try:
+                records.append(FileRecord.from_path(fp))
+            except OSError:
+                continue
+        results = {}
+        try:
             for plug in self.plugins.values():
+                if not hasattr(plug, 'run_on_files'): continue
                 try:
-                    results[plug.name] = plug.run(paths, self.cache, self.settings)
+                    results[plug.name] = self._run_plugin(plug, None, records)
                 except Exception as e:
                     results[plug.name] = {'error':str(e)}
+        finally:
+            for rec in records:
+                rec.release()
+            if self.scan_cache is not None:
+                self.scan_cache.commit()
         return results
 
 if __name__ == "__main__":
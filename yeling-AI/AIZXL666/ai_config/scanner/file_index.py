@@ -0,0 +1,225 @@
+"""Single-pass workspace walk producing shared, read-once file records for scanner plugins."""
+import os, threading, hashlib, importlib.util
+from collections import OrderedDict
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+# 超过该大小的文件计算摘要时分块读取，不整体载入内存
+STREAM_THRESHOLD = 1 << 20
+# 一次遍历中同时驻留内存的文件内容上限（scanner.max_retained_bytes 可覆盖，null 表示不限）
+MAX_RETAINED_BYTES = 64 << 20
+class ContentBudget:
+    """Caps how much file content the records of one walk keep in memory.
+
+    Records register their bytes/text when loaded; once the total exceeds max_bytes the
+    least recently loaded records are released and re-read if another plugin needs them again.
+    """
+    def __init__(self, max_bytes=MAX_RETAINED_BYTES):
+        self.max_bytes = max_bytes
+        self.retained = 0
+        self.evictions = 0
+        self._held = OrderedDict()
+        self._lock = threading.Lock()
+    def hold(self, rec, nbytes):
+        evicted = []
+        with self._lock:
+            self._held[rec] = self._held.pop(rec, 0) + nbytes
+            self.retained += nbytes
+            while self.retained > self.max_bytes and len(self._held) > 1:
+                old, held = self._held.popitem(last=False)
+                self.retained -= held
+                self.evictions += 1
+                evicted.append(old)
+        for old in evicted:
+            old.release()
+    def forget(self, rec):
+        with self._lock:
+            self.retained -= self._held.pop(rec, 0)
+class FileRecord:
+    """One workspace file. Content is read lazily, once, and shared by every plugin (bounded by an optional ContentBudget)."""
+    __slots__ = ('path','name','size','mtime','ino','budget','_data','_text','_digest','_lock')
+    def __init__(self, path, size=0, mtime=0.0, ino=0, budget=None):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.size = size
+        self.mtime = mtime
+        self.ino = ino
+        self.budget = budget
+        self._data = None
+        self._text = None
+        self._digest = None
+        self._lock = threading.Lock()
+    @classmethod
+    def from_path(cls, path, budget=None):
+        st = os.stat(path)
+        return cls(str(path), st.st_size, st.st_mtime, st.st_ino, budget)
+    def endswith(self, exts):
+        return self.name.endswith(exts)
+    @property
+    def data(self):
+        """Raw bytes (None if unreadable); first caller reads, other threads wait and reuse."""
+        data = self._data
+        if data is None:
+            with self._lock:
+                data = self._data
+                if data is None:
+                    try:
+                        with open(self.path,'rb') as f:
+                            data = f.read()
+                    except Exception:
+                        data = False
+                    self._data = data
+                    if data and self.budget is not None:
+                        self.budget.hold(self, len(data))
+        return None if data is False else data
+    @property
+    def text(self):
+        text = self._text
+        if text is None:
+            data = self.data
+            text = self._text = data.decode('utf-8', errors='ignore') if data is not None else False
+            if text and self.budget is not None:
+                self.budget.hold(self, len(text))
+        return None if text is False else text
+    @property
+    def digest(self):
+        """内容 SHA-256，FileScanner 元数据与持久化扫描缓存共用；大文件分块流式计算，不缓存内容"""
+        if self._digest is None:
+            if self._data is None and self.size > STREAM_THRESHOLD:
+                try:
+                    h = hashlib.sha256()
+                    with open(self.path,'rb') as f:
+                        for b in iter(lambda: f.read(STREAM_THRESHOLD), b''): h.update(b)
+                    self._digest = h.hexdigest()
+                except OSError:
+                    self._digest = False
+            else:
+                data = self.data
+                self._digest = hashlib.sha256(data).hexdigest() if data is not None else False
+        return None if self._digest is False else self._digest
+    def release(self):
+        """Drop cached content once every plugin is done with it (or the budget needs the room)."""
+        self._data = None; self._text = None
+        if self.budget is not None:
+            self.budget.forget(self)
+    def __repr__(self):
+        return f'FileRecord({self.path!r}, size={self.size})'
+
+def walk_files(paths, settings=None):
+    """Walk every root once and return FileRecords (stat taken from the scandir entry).
+
+    Ignored directories (defaults, scanner.exclude, .gitignore) are pruned before descending.
+    All records share one ContentBudget (scanner.max_retained_bytes), so content read for
+    the plugins never adds up to the whole tree.
+    """
+    from utils.ignore_rules import load_ignore_rules
+    limit = ((settings or {}).get('scanner', {}) or {}).get('max_retained_bytes', MAX_RETAINED_BYTES)
+    budget = ContentBudget(limit) if limit is not None else None
+    records=[]
+    for p in paths:
+        if os.path.isfile(p):
+            try: records.append(FileRecord.from_path(p, budget))
+            except OSError: pass
+            continue
+        rules = load_ignore_rules(str(p), settings)
+        stack=[str(p)]
+        while stack:
+            d = stack.pop()
+            try:
+                with os.scandir(d) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            if rules.gitignore and any(e.name == '.gitignore' for e in entries):
+                rules.load_gitignore(d)
+            subdirs=[]
+            for e in entries:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        if not rules.ignored(e.path, True): subdirs.append(e.path)
+                        continue
+                    if not e.is_file() or rules.ignored(e.path, False): continue
+                    st = e.stat()
+                except OSError:
+                    continue
+                records.append(FileRecord(e.path, st.st_size, st.st_mtime, st.st_ino, budget))
+            # keep os.walk-like top-down order
+            stack.extend(reversed(subdirs))
+    return records
+
+def record_paths(records):
+    return [r.path for r in records]
+
+def map_records(name, records, analyze, scan_cache=None, settings=None, load=None):
+    """对每个记录调用 analyze(path, load(record))，结果按 records 顺序返回（load 默认取 record.text）。
+
+    传入 scan_cache 时未变更文件直接复用上次结果，只对脏文件重新分析。
+    settings 中 scanner.executor 为 process 时，脏文件按 scanner.chunk_size 分片交给进程池
+    （analyze 必须是插件模块的顶层函数）。返回 (结果列表, {'hits':..,'misses':..})。
+    """
+    out=[None]*len(records); todo=[]; hits=0
+    for i, rec in enumerate(records):
+        if scan_cache is not None:
+            hit, res = scan_cache.lookup(name, rec)
+            if hit:
+                out[i] = res; hits += 1; continue
+        todo.append(i)
+    conf = (settings or {}).get('scanner',{})
+    load = load or (lambda rec: rec.text)
+    results = None
+    if conf.get('executor') == 'process' and len(todo) > 1:
+        results = _process_map(analyze, [(records[i].path, load(records[i])) for i in todo], conf)
+    if results is None:
+        results = (analyze(records[i].path, load(records[i])) for i in todo)
+    for i, res in zip(todo, results):
+        out[i] = res
+        if scan_cache is not None:
+            scan_cache.store(name, records[i], res)
+    return out, {'hits':hits,'misses':len(todo)}
+
+# 进程池按 worker 数复用；插件线程可并发提交
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+def _get_pool(workers):
+    with _POOLS_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None:
+            pool = _POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+        return pool
+
+def shutdown_process_pools():
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values()); _POOLS.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+def _process_map(analyze, items, conf):
+    """把 (path, text) 列表分片到进程池并按原顺序合并；失败返回 None 由调用方串行执行"""
+    workers = int(conf.get('process_workers') or os.cpu_count() or 1)
+    chunk = max(1, int(conf.get('chunk_size', 32)))
+    src = analyze.__code__.co_filename
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_run_chunk, src, analyze.__name__, items[k:k+chunk]) for k in range(0, len(items), chunk)]
+        results = []
+        for f in futures:
+            results.extend(f.result())
+        return results
+    except Exception as e:
+        print('process executor failed, falling back to serial', e)
+        with _POOLS_LOCK:
+            _POOLS.pop(workers, None)
+        return None
+
+# 子进程内按文件路径加载插件模块（插件由 spec_from_file_location 加载，不能按模块名 pickle）
+_WORKER_FUNCS = {}
+def _run_chunk(src, func_name, items):
+    fn = _WORKER_FUNCS.get((src, func_name))
+    if fn is None:
+        spec = importlib.util.spec_from_file_location(f'_scan_worker_{Path(src).stem}', src)
+        mod = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(mod)
+        fn = _WORKER_FUNCS[(src, func_name)] = getattr(mod, func_name)
+    return [fn(p, t) for p, t in items]
+
+if __name__ == "__main__":
+    print("file_index 仅作为模块使用，不建议直接运行。")
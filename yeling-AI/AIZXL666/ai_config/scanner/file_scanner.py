@@ -1,30 +1,40 @@
 """List files and basic metadata under given paths."""
-import os, hashlib
+import os, time
 from pathlib import Path
+from scanner.file_index import walk_files, STREAM_THRESHOLD
+from utils.file_hasher import FileHasher
 class FileScanner:
     name = 'file_scanner'
     def _hash(self, path):
-        try:
-            h = hashlib.sha256()
-            with open(path,'rb') as f:
-                while True:
-                    b = f.read(8192)
-                    if not b: break
-                    h.update(b)
-            return h.hexdigest()
-        except Exception:
-            return None
-    def run(self, paths, cache, settings):
-        files=[]; meta={}
+        return FileHasher().hash_file(path)[0]
+    def _hash_record(self, rec, hasher):
+        """小文件复用 FileRecord 的一次性读取；sha256 时直接复用扫描缓存也会用到的 rec.digest"""
+        if hasher.algorithm == 'sha256': return rec.digest
+        data = rec.data
+        return hasher.hash_bytes(data) if data is not None else None
+    def run_on_files(self, records, cache, settings):
+        files=[]; meta={}; large=[]
         exts = settings.get('file_types') if settings else None
-        for p in paths:
-            for root,dirs,fs in os.walk(p):
-                for f in fs:
-                    fp = str(Path(root)/f)
-                    if exts and not any(fp.endswith(e) for e in exts): continue
-                    files.append(fp)
-                    meta[fp] = {'size': Path(fp).stat().st_size if Path(fp).exists() else 0, 'hash': self._hash(fp)}
-        return {'files':files,'meta':meta,'nodes':[],'edges':[]}
+        exts = tuple(exts) if exts else None
+        hasher = FileHasher.from_settings(settings)
+        t0 = time.perf_counter(); read = 0
+        for rec in records:
+            if exts and not rec.endswith(exts): continue
+            files.append(rec.path)
+            meta[rec.path] = {'size': rec.size, 'hash': None}
+            if rec.size > STREAM_THRESHOLD:
+                large.append((rec.path, rec.size))
+            else:
+                meta[rec.path]['hash'] = self._hash_record(rec, hasher); read += rec.size
+        # 大文件（模型、数据集等）交给线程池按块/抽样计算，不载入内存
+        hashed, stats = hasher.hash_many(large)
+        for path, (digest, sampled) in hashed.items():
+            meta[path]['hash'] = digest
+            if sampled: meta[path]['sampled'] = True
+        stats = hasher.stats(len(files), read + stats['bytes_read'], time.perf_counter() - t0, stats['sampled_files'])
+        return {'files':files,'meta':meta,'hash_stats':stats,'nodes':[],'edges':[]}
+    def run(self, paths, cache, settings):
+        return self.run_on_files(walk_files(paths, settings), cache, settings)
 def register(): return FileScanner()
 if __name__ == "__main__":
     print("FileScanner 仅作为模块使用，不建议直接运行。")
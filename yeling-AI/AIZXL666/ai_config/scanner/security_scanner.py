@@ -1,28 +1,133 @@
-"""Search for secret-like patterns in files."""
+"""Search for secret-like patterns in files (single combined regex, streamed in overlapping chunks for large files)."""
 import re, os
 from pathlib import Path
+from scanner.file_index import walk_files, map_records
+# 扫描缓存中的结果格式版本（finding 增加 line，二进制文件返回 skipped 记录）
+CACHE_VERSION = 2
 class SecurityScanner:
     name = 'security_scanner'
+    EXTENSIONS = ('.py','.env','.yaml','.yml','.ini','.txt')
     PATTERNS = [
         re.compile(r"(?i)api[_-]?key\s*[:=]\s*['\"]([0-9a-zA-Z_\-]{8,})['\"]"),
         re.compile(r"(?i)secret[_-]?key\s*[:=]\s*['\"]([0-9a-zA-Z_\-]{8,})['\"]"),
         re.compile(r"(?i)sk_live_[0-9a-zA-Z_]{8,}")
     ]
+    # 超过该大小的文件不再使用共享的整文件读取，改为分块流式扫描
+    STREAM_THRESHOLD = 1 << 20
+    # 超过该大小的文件直接跳过（scanner.security.max_file_size 可覆盖，null 表示不限）
+    MAX_FILE_SIZE = 512 << 20
+    def run_on_files(self, records, cache, settings, scan_cache=None):
+        conf = ((settings or {}).get('scanner', {}) or {}).get('security', {}) or {}
+        max_size = conf.get('max_file_size', self.MAX_FILE_SIZE)
+        threshold = conf.get('stream_threshold', self.STREAM_THRESHOLD)
+        records = [r for r in records if r.endswith(self.EXTENSIONS)]
+        files = [r.path for r in records]
+        skipped = [{'file': r.path, 'reason': 'too_large', 'size': r.size} for r in records if max_size is not None and r.size > max_size]
+        if skipped:
+            records = [r for r in records if max_size is None or r.size <= max_size]
+        # 小文件复用 FileRecord 的一次性读取；大文件传 None，由 find_secrets 自行流式读取
+        per_file, stats = map_records(f'{self.name}@{CACHE_VERSION}', records, find_secrets, scan_cache, settings,
+                                      load=lambda r: r.text if r.size <= threshold else None)
+        findings = []
+        for fs in per_file:
+            for f in fs:
+                if 'skipped' in f: skipped.append({'file': f['file'], 'reason': f['skipped']})
+                else: findings.append(f)
+        return {'files':files,'security_findings':findings,'skipped':skipped,'cache_stats':stats,'nodes':[],'edges':[]}
     def run(self, paths, cache, settings):
-        findings=[]; files=[]
-        for p in paths:
-            for root,dirs,fs in os.walk(p):
-                for f in fs:
-                    if any(f.endswith(ext) for ext in ('.py','.env','.yaml','.yml','.ini','.txt')):
-                        fp = str(Path(root)/f); files.append(fp)
-                        try:
-                            txt = open(fp,'r',encoding='utf-8',errors='ignore').read()
-                        except Exception:
-                            continue
-                        for pat in self.PATTERNS:
-                            for m in pat.finditer(txt):
-                                findings.append({'file':fp,'match':m.group(0),'pattern':pat.pattern})
-        return {'files':files,'security_findings':findings,'nodes':[],'edges':[]}
+        return self.run_on_files(walk_files(paths, settings), cache, settings)
+
+def _combine(patterns, to_bytes):
+    """把所有模式合并成一个带命名分组的交替表达式，开头的 (?i) 改写为局部 (?i:...)。
+
+    所有模式都以字母开头时，在最前面加上首字符集合的前瞻，sre 可以据此快速跳过不可能匹配的位置（约快一倍）。
+    """
+    parts = []; first = set()
+    for i, pat in enumerate(patterns):
+        src = pat.pattern
+        icase = src.startswith('(?i)')
+        if icase: src = src[4:]
+        if first is not None and src[:1].isalnum():
+            first.update({src[0].lower(), src[0].upper()} if icase else {src[0]})
+        else:
+            first = None
+        if icase: src = '(?i:' + src + ')'
+        # 原模式里的捕获分组改为非捕获，lastgroup 才能准确指向外层分组
+        src = re.sub(r'(?<!\\)\((?!\?)', '(?:', src)
+        parts.append(f'(?P<p{i}>{src})')
+    src = '|'.join(parts)
+    if first: src = f'(?=[{"".join(sorted(first))}])(?:{src})'
+    return re.compile(src.encode() if to_bytes else src)
+COMBINED = _combine(SecurityScanner.PATTERNS, False)
+COMBINED_BYTES = _combine(SecurityScanner.PATTERNS, True)
+BYTES_PATTERNS = [re.compile(p.pattern.encode()) for p in SecurityScanner.PATTERNS]
+CHUNK_SIZE = 4 << 20
+# 相邻块的重叠字节数，也是跨块匹配的最大长度
+OVERLAP = 64 << 10
+SNIFF_SIZE = 8192
+
+def _matches(buf, start, end, combined, patterns, boundary=None):
+    """一次扫描得到所有模式的匹配，返回 ([(起点, 文本, 模式序号)], 最后一个匹配的终点)。
+
+    交替是最左优先，所以再在每个匹配范围内补查其他模式（如 api_key 值里的 sk_live_）。
+    给定 boundary 时只接受起点在 boundary 之前的匹配。
+    """
+    out = []; last_end = start
+    for m in combined.finditer(buf, start, end):
+        if boundary is not None and m.start() >= boundary: break
+        idx = int(m.lastgroup[1:])
+        out.append((m.start(), m.group(0), idx))
+        for j, pat in enumerate(patterns):
+            if j == idx: continue
+            out.extend((m2.start(), m2.group(0), j) for m2 in pat.finditer(buf, m.start(), m.end()))
+        last_end = m.end()
+    out.sort()
+    return out, last_end
+
+def _finding(fp, match, idx, line):
+    if isinstance(match, bytes): match = match.decode('utf-8', errors='ignore')
+    return {'file':fp,'match':match,'pattern':SecurityScanner.PATTERNS[idx].pattern,'line':line}
+
+def find_secrets(fp, txt):
+    """txt 为 None 时按路径流式扫描；返回的 finding 带 1 起始的行号"""
+    if txt is None: return stream_secrets(fp)
+    if '\0' in txt[:SNIFF_SIZE]: return [{'file': fp, 'skipped': 'binary'}]
+    findings = []; pos = 0; line = 1
+    for start, match, idx in _matches(txt, 0, len(txt), COMBINED, SecurityScanner.PATTERNS)[0]:
+        line += txt.count('\n', pos, start); pos = start
+        findings.append(_finding(fp, match, idx, line))
+    return findings
+
+def stream_secrets(fp, chunk_size=CHUNK_SIZE, overlap=OVERLAP):
+    """按块读取文件，内存占用上限约为 chunk_size + overlap。
+
+    只接受起点落在块边界之前的匹配；下一块从边界与最后一个匹配终点中较大者开始，
+    与新读入的数据拼接后继续扫描，因此跨块的匹配不会丢失也不会重复（匹配长度不超过 overlap）。
+    开头含 NUL 字节的文件视为二进制文件跳过。
+    """
+    findings = []
+    try:
+        f = open(fp, 'rb')
+    except OSError:
+        return findings
+    with f:
+        buf = f.read(max(chunk_size, SNIFF_SIZE))
+        if b'\0' in buf[:SNIFF_SIZE]:
+            return [{'file': fp, 'skipped': 'binary'}]
+        line_base = 1
+        while buf:
+            more = f.read(chunk_size)
+            boundary = len(buf) if not more else max(1, len(buf) - overlap)
+            matches, last_end = _matches(buf, 0, len(buf), COMBINED_BYTES, BYTES_PATTERNS, boundary)
+            pos = 0; line = line_base
+            for start, match, idx in matches:
+                line += buf.count(b'\n', pos, start); pos = start
+                findings.append(_finding(fp, match, idx, line))
+            if not more: break
+            resume = max(boundary, last_end)
+            line_base += buf.count(b'\n', 0, resume)
+            buf = buf[resume:] + more
+    return findings
 def register(): return SecurityScanner()
 if __name__ == "__main__":
     print("SecurityScanner 仅作为模块使用，不建议直接运行。")
@@ -0,0 +1,39 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scanner import dependency_scanner
+from scanner.dependency_scanner import DependencyScanner
+from scanner.file_index import walk_files
+
+def test_classifies_without_importing_or_installing(tmp_path, monkeypatch):
+    marker = tmp_path / 'imported.txt'
+    (tmp_path / 'pkg').mkdir()
+    (tmp_path / 'pkg' / 'helpers.py').write_text(f"open({str(marker)!r}, 'w').write('x')\n")
+    (tmp_path / 'pkg' / 'main.py').write_text(
+        "import os, json\nimport os.path\nfrom . import helpers\nfrom .helpers import x\nimport helpers\n"
+        "import pytest\nimport no_such_pkg_abc\nfrom no_such_pkg_abc.sub import y\n")
+    def no_install(*a, **kw): raise AssertionError('pip must not run')
+    monkeypatch.setattr(dependency_scanner.subprocess, 'run', no_install)
+    res = DependencyScanner().run_on_files(walk_files([str(tmp_path)], {}), None, {})
+    assert res['dependencies'][str(tmp_path / 'pkg' / 'main.py')][3:5] == ['.helpers', '.helpers']
+    assert res['missing'] == ['no_such_pkg_abc']
+    assert res['modules']['stdlib'] == ['json', 'os'] and res['modules']['local'] == ['helpers']
+    assert res['modules']['third_party'] == ['pytest']
+    assert res['resolution']['imports'] == 9 and res['resolution']['top_level'] == 5
+    assert not marker.exists()
+
+def test_resolves_file_level_edges(tmp_path):
+    (tmp_path / 'app' / 'core').mkdir(parents=True)
+    (tmp_path / 'app' / '__init__.py').write_text("from .core import engine\n")
+    (tmp_path / 'app' / 'core' / '__init__.py').write_text("")
+    (tmp_path / 'app' / 'core' / 'engine.py').write_text("from ..util import helper\nfrom . import missing_attr\n")
+    (tmp_path / 'app' / 'util.py').write_text("import app.core.engine\nimport os\n")
+    (tmp_path / 'main.py').write_text("from app.util import helper\nimport app\n")
+    res = DependencyScanner().run([str(tmp_path)], None, {})
+    rel = lambda p: os.path.relpath(p, tmp_path)
+    edges = sorted((rel(e['src']), rel(e['tgt'])) for e in res['edges'])
+    assert edges == [('app/__init__.py', 'app/core/__init__.py'), ('app/core/engine.py', 'app/core/__init__.py'),
+                     ('app/core/engine.py', 'app/util.py'), ('app/util.py', 'app/core/engine.py'),
+                     ('main.py', 'app/__init__.py'), ('main.py', 'app/util.py')]
+    g = res['graph']
+    assert len(g['offsets']) == len(g['nodes']) + 1 and len(g['targets']) == len(edges)
@@ -0,0 +1,83 @@
+import asyncio
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from scanner import file_index
+from scanner.dispatcher import ScannerDispatcher
+
+def _make_tree(root):
+    (root / 'pkg').mkdir()
+    (root / 'pkg' / 'a.py').write_text("import os\ndef f(x):\n    if x:\n        return 1\n")
+    (root / 'pkg' / 'b.py').write_text("api_key = 'ABCDEFGH12345678'\n")
+    (root / 'notes.txt').write_text("nothing here\n")
+
+def test_run_all_reads_each_file_once(tmp_path, monkeypatch):
+    _make_tree(tmp_path)
+    opened = []
+    real_open = open
+    def counting_open(path, *a, **kw):
+        opened.append(str(path))
+        return real_open(path, *a, **kw)
+    monkeypatch.setattr(file_index, 'open', counting_open, raising=False)
+    d = ScannerDispatcher(os.path.dirname(__file__), settings={'scanner': {'parallel_workers': 4}})
+    asyncio.run(d.load_plugins())
+    results = asyncio.run(d.run_all([str(tmp_path)]))
+    assert sorted(opened) == sorted(set(opened))
+    assert len(opened) == 3
+    assert any('api_key' in f['match'] for f in results['security_scanner']['security_findings'])
+    assert str(tmp_path / 'pkg' / 'a.py') in results['dependency_parser']['dependencies']
+
+def test_run_fallback_matches_run_on_files(tmp_path):
+    _make_tree(tmp_path)
+    d = ScannerDispatcher(os.path.dirname(__file__))
+    asyncio.run(d.load_plugins())
+    assert not any(name.startswith('test_') for name in d.plugin_files)
+    plug = d.plugins['file_scanner']
+    records = file_index.walk_files([str(tmp_path)])
+    a, b = plug.run([str(tmp_path)], None, {}), plug.run_on_files(records, None, {})
+    # hash_stats 含耗时，只比较确定性字段
+    assert a.pop('hash_stats')['files'] == b.pop('hash_stats')['files'] == 3
+    assert a == b
+
+def test_process_executor_matches_serial(tmp_path):
+    for i in range(7):
+        (tmp_path / f'm{i}.py').write_text(f"import os\ndef f{i}():\n    for x in y:\n        pass\n")
+    from scanner.complexity_scanner import ComplexityScanner
+    records = file_index.walk_files([str(tmp_path)])
+    serial = ComplexityScanner().run_on_files(records, None, {})
+    settings = {'scanner': {'executor': 'process', 'process_workers': 2, 'chunk_size': 3}}
+    try:
+        parallel = ComplexityScanner().run_on_files(records, None, settings)
+    finally:
+        file_index.shutdown_process_pools()
+    assert parallel['complexity'] == serial['complexity']
+    assert parallel['cache_stats']['misses'] == 7
+
+def test_walk_files_prunes_ignored_dirs(tmp_path):
+    _make_tree(tmp_path)
+    for rel in ('.git/HEAD', '.venv/lib/x.py', 'pkg/__pycache__/a.pyc', 'build/out.py'):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text('x')
+    paths = file_index.record_paths(file_index.walk_files([str(tmp_path)], {}))
+    assert sorted(os.path.relpath(p, tmp_path) for p in paths) == ['notes.txt', 'pkg/a.py', 'pkg/b.py']
+
+def test_retained_content_is_capped(tmp_path, monkeypatch):
+    for i in range(20):
+        (tmp_path / f'm{i}.py').write_text(f"import os\nVALUE_{i} = '{'x' * 1000}'\n")
+    settings = {'scanner': {'parallel_workers': 4, 'max_retained_bytes': 5000}}
+    records = file_index.walk_files([str(tmp_path)], settings)
+    budget = records[0].budget
+    peak = []
+    real_hold = budget.hold
+    def tracking_hold(rec, nbytes):
+        real_hold(rec, nbytes)
+        peak.append(sum(len(r._data or b'') + len(r._text or '') for r in records))
+    monkeypatch.setattr(budget, 'hold', tracking_hold)
+    d = ScannerDispatcher(os.path.dirname(__file__), settings=settings)
+    asyncio.run(d.load_plugins())
+    d._run_plugin(d.plugins['complexity_analyzer'], None, records)
+    assert budget.evictions > 0 and max(peak) <= 5000 + 2100
+    assert len(d._run_plugin(d.plugins['dependency_parser'], None, records)['dependencies']) == 20
+    for rec in records:
+        rec.release()
+    assert budget.retained == 0
@@ -1,9 +1,14 @@
-import pytest
 import sys
 import os
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from scanner.security_scanner import SecurityScanner
+from scanner.file_index import walk_files
+from scanner.security_scanner import SecurityScanner, find_secrets, stream_secrets
+
+TEXT = ''.join(
+    f"line {i}\n" + (f"API_KEY = 'abcdefgh{i:04d}'\n" if i % 7 == 0 else '') +
+    ("token = 'sk_live_ABCDEFGH12'\n" if i % 11 == 0 else '') +
+    ("secret-key: 'sk_live_nested99'\n" if i % 13 == 0 else '')
+    for i in range(300))
 
 def test_run_detects_secrets(tmp_path):
     # 创建测试文件
@@ -15,3 +20,24 @@ def test_run_detects_secrets(tmp_path):
     assert any('secret_key' in f['match'] for f in result['security_findings'])
     assert any('sk_live_' in f['match'] for f in result['security_findings'])
     assert str(test_file) in result['files']
+
+def test_stream_matches_in_memory_across_chunk_boundaries(tmp_path):
+    fp = tmp_path / 'big.txt'
+    fp.write_text(TEXT)
+    expected = find_secrets(str(fp), TEXT)
+    # 与逐个模式 finditer 的结果一致（顺序改为按位置）
+    legacy = sorted((m.group(0), p.pattern) for p in SecurityScanner.PATTERNS for m in p.finditer(TEXT))
+    assert sorted((f['match'], f['pattern']) for f in expected) == legacy and len(legacy) == 43 + 28 + 24 * 2
+    assert expected[0]['line'] == 2 and TEXT.splitlines()[expected[0]['line'] - 1].startswith('API_KEY')
+    for chunk, overlap in ((64, 48), (100, 60), (4096, 64)):
+        assert stream_secrets(str(fp), chunk_size=chunk, overlap=overlap) == expected
+
+def test_binary_and_oversize_skipped(tmp_path):
+    (tmp_path / 'blob.txt').write_bytes(b"\0\1\2api_key='ABCDEFGH12345678'")
+    (tmp_path / 'big.txt').write_text(TEXT)
+    (tmp_path / 'ok.env').write_text("SECRET_KEY='ABCDEFGH12345678'\n")
+    settings = {'scanner': {'security': {'max_file_size': 4096, 'stream_threshold': 0}}}
+    res = SecurityScanner().run_on_files(walk_files([str(tmp_path)]), None, settings)
+    reasons = {os.path.basename(s['file']): s['reason'] for s in res['skipped']}
+    assert reasons == {'blob.txt': 'binary', 'big.txt': 'too_large'}
+    assert [(os.path.basename(f['file']), f['line']) for f in res['security_findings']] == [('ok.env', 1)]
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""Production entry point: pre-fork worker processes serve server.app from a bounded thread pool, with keep-alive, request timeouts, a dedicated executor for slow endpoints and graceful reload on SIGHUP."""
+import os
+import sys
+import time
+import errno
+import select
+import signal
+import socket
+import logging
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+# 获取当前脚本所在目录
+BASE_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BASE_DIR))
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from utils.wsgi_lanes import SlowLane
+LOG = logging.getLogger('ai_assistant.serve')
+
+DEFAULTS = {
+    'host': '127.0.0.1',
+    'port': 5000,
+    'workers': 1,             # 工作进程数；0 表示不 fork，直接在当前进程中服务（不支持热重载）
+    'threads': 8,             # 每个工作进程处理连接的线程数
+    'keepalive': 2,           # 空闲长连接保持秒数；0 关闭长连接（HTTP/1.0）
+    'request_timeout': 120,   # 慢接口最长等待秒数，超时返回 504
+    'graceful_timeout': 30,   # 退出或重载时等待进行中请求的秒数
+    'slow_lane': {
+        'routes': ['/self_heal', '/structure', '/model_check', '/tasks', 'POST /pipeline'],
+        'workers': 2,
+        'max_pending': 4,
+    },
+}
+
+def load_serving_settings(path=None):
+    """读取 settings.yaml 的 server 段并补全默认值；不导入 server.py，主进程因此不加载应用代码"""
+    import yaml
+    path = Path(path) if path else BASE_DIR / 'config' / 'settings.yaml'
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            section = (yaml.safe_load(f) or {}).get('server') or {}
+    except Exception as e:
+        LOG.warning('Could not load %s: %s', path, e)
+        section = {}
+    options = {k: section.get(k, v) for k, v in DEFAULTS.items() if k != 'slow_lane'}
+    options['slow_lane'] = dict(DEFAULTS['slow_lane'], **(section.get('slow_lane') or {}))
+    return options
+
+def make_handler(keepalive, read_timeout):
+    """长连接开启时使用 HTTP/1.1；timeout 同时限制空闲长连接与读取请求的每次等待"""
+    class Handler(WSGIRequestHandler):
+        protocol_version = 'HTTP/1.1' if keepalive > 0 else 'HTTP/1.0'
+        timeout = keepalive if keepalive > 0 else read_timeout
+
+        def handle_one_request(self):
+            super().handle_one_request()
+            # 正在退出时不再复用长连接，让客户端重新连接到新的工作进程
+            if getattr(self.server, 'draining', False):
+                self.close_connection = True
+    return Handler
+
+class PooledWSGIServer(BaseWSGIServer):
+    """连接交给固定大小的线程池处理；线程全忙时不再 accept，新连接留在内核队列中由其他工作进程接走"""
+    multithread = True
+
+    def __init__(self, host, port, app, handler=None, threads=8, fd=None):
+        self.threads = max(1, int(threads))
+        self.draining = False
+        self._slots = threading.BoundedSemaphore(self.threads)
+        self._pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='http')
+        super().__init__(host, port, app, handler, fd=fd)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            self._pool.submit(self._process, request, client_address)
+        except RuntimeError:
+            self._slots.release()
+            self.shutdown_request(request)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+    def drain(self, graceful_timeout):
+        """停止 accept，等待进行中的请求结束；超过 graceful_timeout 直接退出进程"""
+        self.draining = True
+        timer = threading.Timer(graceful_timeout, os._exit, args=(0,))
+        timer.daemon = True
+        timer.start()
+        threading.Thread(target=self.shutdown, daemon=True, name='drain').start()
+
+    def serve_forever(self, poll_interval=0.5):
+        # 线程池在服务循环结束后才关闭：父类 __init__ 使用已有套接字时也会调用 server_close()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self._pool.shutdown(wait=True)
+
+def bind_socket(host, port, backlog=128):
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, int(port)))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def build_app(options):
+    """在工作进程中导入应用：每次重载都会重新读取代码"""
+    import server
+    lane_cfg = options['slow_lane']
+    app = SlowLane(server.app, lane_cfg['routes'], workers=lane_cfg['workers'], max_pending=lane_cfg['max_pending'],
+                   timeout=options['request_timeout'])
+    server.STARTUP.start()
+    return app
+
+def run_worker(options, sock, ready_fd=None, managed=False):
+    """工作进程主体：SIGTERM 平滑退出；managed 时 SIGINT/SIGHUP 交给主进程处理，否则 SIGINT 同样平滑退出"""
+    if managed:
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    app = build_app(options)
+    handler = make_handler(float(options['keepalive']), float(options['request_timeout']))
+    httpd = PooledWSGIServer(options['host'], options['port'], app, handler, threads=options['threads'], fd=sock.fileno())
+    drain = lambda *_: httpd.drain(float(options['graceful_timeout']))
+    signal.signal(signal.SIGTERM, drain)
+    if not managed:
+        signal.signal(signal.SIGINT, drain)
+    if ready_fd is not None:
+        os.write(ready_fd, b'1')
+        os.close(ready_fd)
+    LOG.info('worker %s serving on %s:%s (%s threads)', os.getpid(), options['host'], httpd.port, httpd.threads)
+    try:
+        httpd.serve_forever()
+    finally:
+        app.shutdown(wait=False)
+
+class Arbiter:
+    """主进程：绑定端口后 fork 工作进程并守护。
+
+    - 工作进程异常退出时自动补齐；
+    - SIGHUP：先启动一批新工作进程（重新导入代码），全部就绪后再让旧进程平滑退出；新进程启动失败则保留旧进程；
+    - SIGTERM/SIGINT：通知所有工作进程平滑退出，超过 graceful_timeout 仍未退出的强制结束。
+    """
+    def __init__(self, options):
+        self.options = options
+        self.workers = {}   # pid -> 启动时间
+        self.sock = None
+        self._reload = False
+        self._stop = False
+
+    def run(self):
+        self.sock = bind_socket(self.options['host'], self.options['port'])
+        LOG.info('master %s listening on %s:%s', os.getpid(), self.options['host'], self.sock.getsockname()[1])
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, '_reload', True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, '_stop', True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, '_stop', True))
+        self.spawn_generation()
+        while not self._stop:
+            self.reap()
+            if self._reload:
+                self._reload = False
+                self.reload()
+            while not self._stop and len(self.workers) < self.options['workers']:
+                self.spawn()
+            time.sleep(0.2)
+        self.stop()
+
+    def spawn(self, ready_fd=None):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.options, self.sock, ready_fd, managed=True)
+            except BaseException:
+                LOG.exception('worker %s failed', os.getpid())
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.time()
+        return pid
+
+    def spawn_generation(self):
+        """启动一批工作进程，返回 (pid 列表, 是否全部在 graceful_timeout 内就绪)"""
+        pids, pipes = [], []
+        for _ in range(self.options['workers']):
+            r, w = os.pipe()
+            pid = self.spawn(ready_fd=w)
+            os.close(w)
+            pids.append(pid)
+            pipes.append(r)
+        deadline = time.time() + float(self.options['graceful_timeout'])
+        pending = list(pipes)
+        while pending and time.time() < deadline:
+            readable, _, _ = select.select(pending, [], [], max(0.0, deadline - time.time()))
+            for r in readable:
+                # 读到 EOF（进程未就绪就退出）时视为失败
+                if os.read(r, 1) != b'1':
+                    deadline = 0
+                pending.remove(r)
+        for r in pipes:
+            os.close(r)
+        return pids, not pending and deadline != 0
+
+    def reload(self):
+        old = list(self.workers)
+        LOG.info('reloading: starting %s new workers', self.options['workers'])
+        new, ok = self.spawn_generation()
+        if not ok:
+            LOG.error('new workers failed to start, keeping the current ones')
+            self.terminate(new)
+            return
+        self.terminate(old)
+
+    def terminate(self, pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.time() + float(self.options['graceful_timeout']) + 5
+        while any(pid in self.workers for pid in pids) and time.time() < deadline:
+            self.reap()
+            time.sleep(0.05)
+        for pid in pids:
+            if pid in self.workers:
+                LOG.warning('worker %s did not exit in time, killing it', pid)
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                    os.waitpid(pid, 0)
+                except (ProcessLookupError, ChildProcessError):
+                    pass
+                self.workers.pop(pid, None)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            except OSError as e:
+                if e.errno == errno.EINTR:
+                    continue
+                raise
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is not None and not self._stop and time.time() - started < 1:
+                # 启动即退出（例如代码有误）时稍作等待，避免频繁重启
+                time.sleep(1)
+
+    def stop(self):
+        LOG.info('shutting down %s workers', len(self.workers))
+        self.terminate(list(self.workers))
+        self.sock.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='以多进程 / 线程池方式运行 AI 助手服务')
+    parser.add_argument('--host')
+    parser.add_argument('--port', type=int)
+    parser.add_argument('--workers', type=int, help='工作进程数，0 表示单进程')
+    parser.add_argument('--threads', type=int, help='每个工作进程的连接线程数')
+    parser.add_argument('--keepalive', type=float, help='长连接空闲秒数，0 关闭')
+    parser.add_argument('--request-timeout', type=float, help='慢接口超时秒数')
+    parser.add_argument('--graceful-timeout', type=float, help='平滑退出等待秒数')
+    parser.add_argument('--config', help='settings.yaml 路径')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    args = parse_args(argv)
+    options = load_serving_settings(args.config)
+    for key in ('host', 'port', 'workers', 'threads', 'keepalive', 'request_timeout', 'graceful_timeout'):
+        value = getattr(args, key)
+        if value is not None:
+            options[key] = value
+    if options['workers'] > 0 and hasattr(os, 'fork'):
+        Arbiter(options).run()
+        return
+    sock = bind_socket(options['host'], options['port'])
+    try:
+        run_worker(options, sock)
+    finally:
+        sock.close()
+
+if __name__ == '__main__':
+    main()
@@ -23,58 +23,6 @@ logging.basicConfig(level=logging.INFO)
 app = Flask(__name__, static_folder='reports')
 BASE = BASE_DIR
 
-# 新增：统一模型元数据与健康状态 API
-@app.route('/models', methods=['GET'])
-def models():
-    try:
-        from ai.model_loader import ModelLoader
-        loader = ModelLoader()
-        models_result = loader.find_all_models()
-        if not models_result.get('success'):
-            return jsonify({'error': models_result.get('error')}), 400
-        model_list = []
-        for m in models_result.get('models', []):
-            meta = loader.get_model_metadata(m)
-            # 健康状态联动
-            try:
-                check = loader.auto_infer_and_check(m['path'])
-                meta['health'] = check.get('status', 'unknown')
-                meta['check_report'] = check
-            except Exception as e:
-                meta['health'] = 'error'
-                meta['check_report'] = {'error': str(e)}
-            model_list.append(meta)
-        return jsonify({'models': model_list})
-    except BadRequest as br:
-        return jsonify({'error': '参数校验失败', 'detail': str(br)}), 400
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-# 新增：模型健康检查与推理测试 API
-@app.route('/model_check', methods=['GET'])
-def model_check():
-    try:
-        from ai.model_loader import ModelLoader
-        loader = ModelLoader()
-        check_report = loader.self_check()
-        infer_report = loader.auto_infer_and_check()
-        # 结构化日志写入
-        log_entry = {
-            'event': 'model_check',
-            'timestamp': __import__('datetime').datetime.utcnow().isoformat() + 'Z',
-            'self_check': check_report,
-            'inference_check': infer_report
-        }
-        try:
-            with open('server_dependency.log', 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
-        except Exception as logerr:
-            logging.error(f"日志写入失败: {logerr}")
-        return jsonify({'self_check': check_report, 'inference_check': infer_report})
-    except BadRequest as br:
-        return jsonify({'error': '参数校验失败', 'detail': str(br)}), 400
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
 #!/usr/bin/env python3
 import os, sys
 # 自动检测并切换到虚拟环境
@@ -87,7 +35,7 @@ if sys.executable != os.path.abspath(VENV_PATH) and os.path.exists(VENV_PATH):
 import logging
 logging.basicConfig(filename='server_dependency.log', level=logging.INFO)
 try:
-    from flask import Flask, request, jsonify, send_from_directory
+    from flask import Flask, Response, request, jsonify, send_from_directory
 except ImportError as e:
     logging.error(f"缺失依赖: {e}")
     raise
@@ -98,7 +46,7 @@ import sys
 import subprocess
 import time
 import select
-import importlib
+import importlib.util
 import threading
 import shutil
 
@@ -113,61 +61,65 @@ DEFAULT_MODEL_DIRS = [
     os.path.join(os.path.dirname(__file__), "models"),
 ]
 
-def find_models():
-    found_models = []
-    for mdir in DEFAULT_MODEL_DIRS:
-        if os.path.exists(mdir):
-            for root, dirs, files in os.walk(mdir):
-                for file in files:
-                    if file.lower().endswith((".bin", ".gguf", ".pt", ".pth", ".onnx", ".pb", ".h5", ".tflite")):
-                        found_models.append(os.path.join(root, file))
-    return found_models
-
-MODEL_FILES = find_models()
-if MODEL_FILES:
-    logging.info(f"已识别到AI模型: {MODEL_FILES}")
-    print(f"[模型识别] 已识别到AI模型: {MODEL_FILES}")
-else:
-    logging.warning("未检测到可用AI模型，请将模型文件放入 models 相关目录")
-    print("[模型识别] 未检测到可用AI模型，请将模型文件放入 ~/models 或 ai_config/models 目录")
-WORKSPACE_DIR = "/home/xiedaima/桌面/GZQ"
-
-# 自动检测并安装依赖
-for pkg in REQUIRED_PACKAGES:
+# 解析结果按文件 (mtime, size) 缓存；各处只读取、不修改返回的 dict
+_SETTINGS_CACHE = {'key': None, 'value': {}}
+def load_settings():
+    import yaml
+    path = BASE / 'config' / 'settings.yaml'
     try:
-        __import__(pkg.lower())
-    except ImportError:
-        logging.warning(f"缺失依赖: {pkg}, 正在自动安装...")
-        subprocess.run([sys.executable, "-m", "pip", "install", pkg])
-        logging.info(f"已自动安装依赖: {pkg}")
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        if _SETTINGS_CACHE['key'] != key:
+            with open(path, 'r', encoding='utf-8') as f:
+                # 有 libyaml 时使用 C 解析器，比纯 Python 实现快一个数量级
+                _SETTINGS_CACHE['value'] = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader)) or {}
+            _SETTINGS_CACHE['key'] = key
+        return _SETTINGS_CACHE['value']
     except Exception as e:
-        logging.error(f"依赖安装异常: {e}")
-
-logging.info(f"工作区目录: {WORKSPACE_DIR}")
-# 检查工作区文件夹
-if not os.path.exists(WORKSPACE_DIR):
-    logging.error(f"工作区目录不存在: {WORKSPACE_DIR}")
-    print(f"工作区目录不存在: {WORKSPACE_DIR}")
-else:
-    logging.info(f"工作区目录已找到: {WORKSPACE_DIR}")
+        LOG.warning('Could not load settings.yaml: %s', e)
+        return {}
 
-# 自动发现并集成所有 scanner、utils、ai 子模块
-MODULE_PATHS = [
-    'ai_assistant_full_package.scanner',
-    'ai_assistant_full_package.utils',
-    'ai_assistant_full_package.ai'
-]
-for mod_path in MODULE_PATHS:
-    mod_dir = os.path.join(os.path.dirname(__file__), mod_path.split('.')[-1])
-    if os.path.exists(mod_dir):
-        for fname in os.listdir(mod_dir):
-            if fname.endswith('.py') and not fname.startswith('__'):
-                mname = f"{mod_path}.{fname[:-3]}"
-                try:
-                    importlib.import_module(mname)
-                    logging.info(f"已自动集成模块: {mname}")
-                except Exception as e:
-                    logging.error(f"模块集成失败: {mname}, 错误: {e}")
+def find_models():
+    # 与 ModelLoader 共用同一个 scandir 索引（按后缀一次分类，目录列表按 mtime 缓存）
+    from ai.model_index import get_model_index, discovery_settings
+    max_depth, index_path = discovery_settings(load_settings(), BASE)
+    return [m['path'] for m in get_model_index(index_path).scan(DEFAULT_MODEL_DIRS, max_depth)]
+
+# 工作区：环境变量 AI_ASSISTANT_WORKSPACE > settings.yaml 的 workspace > 默认路径
+WORKSPACE_DIR = os.environ.get('AI_ASSISTANT_WORKSPACE') or load_settings().get('workspace') or "/home/xiedaima/桌面/GZQ"
+# 以下启动工作（模型发现、依赖检查、工作区扫描、模块集成、全局建议、智能部署、模型预加载）在导入时只登记，
+# 由 STARTUP.start() 在后台依次执行，结果写回这些模块级变量；进度见 /status，就绪探针见 /ready
+MODEL_FILES = []
+supported_files = []
+global_suggestions = []
+
+def report_models():
+    global MODEL_FILES
+    MODEL_FILES = find_models()
+    if MODEL_FILES:
+        logging.info(f"已识别到AI模型: {MODEL_FILES}")
+        print(f"[模型识别] 已识别到AI模型: {MODEL_FILES}")
+    else:
+        logging.warning("未检测到可用AI模型，请将模型文件放入 models 相关目录")
+        print("[模型识别] 未检测到可用AI模型，请将模型文件放入 ~/models 或 ai_config/models 目录")
+    return {'models': len(MODEL_FILES)}
+
+# 发行包名 -> 导入名
+PACKAGE_MODULES = {'Flask': 'flask', 'PyYAML': 'yaml', 'pygments': 'pygments'}
+
+def ensure_dependencies():
+    """自动检测并安装依赖：只查找模块规格，不导入模块"""
+    installed = []
+    for pkg in REQUIRED_PACKAGES:
+        try:
+            if importlib.util.find_spec(PACKAGE_MODULES.get(pkg, pkg.lower())) is None:
+                logging.warning(f"缺失依赖: {pkg}, 正在自动安装...")
+                subprocess.run([sys.executable, "-m", "pip", "install", pkg])
+                logging.info(f"已自动安装依赖: {pkg}")
+                installed.append(pkg)
+        except Exception as e:
+            logging.error(f"依赖安装异常: {e}")
+    return {'installed': installed}
 
 # 内容识别优化：支持多类型文件自动识别与处理
 SUPPORTED_FILE_TYPES = ['.py', '.js', '.html', '.md', '.json', '.yaml', '.yml']
@@ -175,17 +127,51 @@ def is_supported_file(filename):
     return any(filename.endswith(ext) for ext in SUPPORTED_FILE_TYPES)
 
 def scan_workspace_for_supported_files(workspace_dir):
+    from utils.ignore_rules import walk
     supported_files = []
-    for root, dirs, files in os.walk(workspace_dir):
+    for root, dirs, files in walk(workspace_dir):
         for file in files:
             if is_supported_file(file):
                 supported_files.append(os.path.join(root, file))
     logging.info(f"识别到支持的文件: {len(supported_files)} 个")
     return supported_files
 
-# 在主流程中调用
-supported_files = scan_workspace_for_supported_files(WORKSPACE_DIR)
-logging.info(f"已优化内容识别，支持文件类型: {SUPPORTED_FILE_TYPES}")
+def scan_workspace():
+    global supported_files
+    logging.info(f"工作区目录: {WORKSPACE_DIR}")
+    # 检查工作区文件夹
+    if not os.path.exists(WORKSPACE_DIR):
+        logging.error(f"工作区目录不存在: {WORKSPACE_DIR}")
+        print(f"工作区目录不存在: {WORKSPACE_DIR}")
+        supported_files = []
+        return {'workspace_exists': False, 'supported_files': 0}
+    logging.info(f"工作区目录已找到: {WORKSPACE_DIR}")
+    supported_files = scan_workspace_for_supported_files(WORKSPACE_DIR)
+    logging.info(f"已优化内容识别，支持文件类型: {SUPPORTED_FILE_TYPES}")
+    return {'workspace_exists': True, 'supported_files': len(supported_files)}
+
+# 自动发现并集成所有 scanner、utils、ai 子模块
+MODULE_PATHS = [
+    'ai_assistant_full_package.scanner',
+    'ai_assistant_full_package.utils',
+    'ai_assistant_full_package.ai'
+]
+def integrate_modules():
+    loaded, failed = 0, 0
+    for mod_path in MODULE_PATHS:
+        mod_dir = os.path.join(os.path.dirname(__file__), mod_path.split('.')[-1])
+        if os.path.exists(mod_dir):
+            for fname in os.listdir(mod_dir):
+                if fname.endswith('.py') and not fname.startswith('__'):
+                    mname = f"{mod_path}.{fname[:-3]}"
+                    try:
+                        importlib.import_module(mname)
+                        logging.info(f"已自动集成模块: {mname}")
+                        loaded += 1
+                    except Exception as e:
+                        logging.error(f"模块集成失败: {mname}, 错误: {e}")
+                        failed += 1
+    return {'loaded': loaded, 'failed': failed}
 
 # 智能学习与自我优化建议模块（扩展：联动性、兼容性、容错率、安全性、多项化发展）
 def generate_global_suggestions(supported_files):
@@ -218,69 +204,69 @@ def generate_global_suggestions(supported_files):
     suggestions.append("建议：可集成更多 AI 模型或插件，提升智能化和自动化能力。")
     return suggestions
 
-# 每次启动自动生成全局建议
-global_suggestions = generate_global_suggestions(supported_files)
-for s in global_suggestions:
-    logging.info(f"智能建议: {s}")
-    print(f"[AI智能建议] {s}")
+def report_global_suggestions():
+    """每次启动自动生成全局建议（基于 scan_workspace 的结果）"""
+    global global_suggestions
+    global_suggestions = generate_global_suggestions(supported_files)
+    for s in global_suggestions:
+        logging.info(f"智能建议: {s}")
+        print(f"[AI智能建议] {s}")
+    return {'suggestions': len(global_suggestions)}
 
 # 集成智能分析和自动化测试流程
-try:
-    from utils.script_analyzer import ScriptAnalyzer
-    from utils.connectivity_tester import GlobalConnectivityTester
-    from utils.system_logic_validator import SystemLogicValidator
-
-    def smart_deployment_manager():
-        """智能部署管理器 - 根据脚本修改规模自动选择测试策略"""
-        try:
-            analyzer = ScriptAnalyzer(WORKSPACE_DIR)
-            connectivity_tester = GlobalConnectivityTester(WORKSPACE_DIR)
-            logic_validator = SystemLogicValidator(WORKSPACE_DIR)
+def smart_deployment_manager():
+    """智能部署管理器 - 根据脚本修改规模自动选择测试策略"""
+    try:
+        from utils.script_analyzer import ScriptAnalyzer
+        from utils.connectivity_tester import GlobalConnectivityTester
+        from utils.system_logic_validator import SystemLogicValidator
+    except ImportError as e:
+        logging.warning(f"智能分析模块导入失败，跳过高级功能: {e}")
+        print(f"[警告] 智能分析模块导入失败，使用基础功能: {e}")
+        return 'skipped'
+    try:
+        analyzer = ScriptAnalyzer(WORKSPACE_DIR)
+        connectivity_tester = GlobalConnectivityTester(WORKSPACE_DIR)
+        logic_validator = SystemLogicValidator(WORKSPACE_DIR)
+        
+        # 分析所有脚本的影响级别
+        interaction_map = analyzer.get_global_interaction_map()
+        
+        # 判断是否需要进行全局测试
+        high_impact_count = len(interaction_map['high_impact_scripts'])
+        medium_impact_count = len(interaction_map['medium_impact_scripts'])
+        
+        if high_impact_count > 0 or medium_impact_count > 2:
+            logging.info("检测到大脚本修改，执行全局连通性和逻辑验证...")
+            print("[智能部署] 检测到大脚本修改，正在进行全局测试...")
             
-            # 分析所有脚本的影响级别
-            interaction_map = analyzer.get_global_interaction_map()
+            # 执行全局连通性测试
+            connectivity_results = connectivity_tester.run_comprehensive_test()
+            logging.info(f"连通性测试完成，健康度: {connectivity_results['overall_health']:.1f}%")
             
-            # 判断是否需要进行全局测试
-            high_impact_count = len(interaction_map['high_impact_scripts'])
-            medium_impact_count = len(interaction_map['medium_impact_scripts'])
+            # 执行整体逻辑验证
+            validation_results = logic_validator.validate_system_logic()
+            logging.info(f"系统逻辑验证完成，状态: {validation_results['system_status']}")
             
-            if high_impact_count > 0 or medium_impact_count > 2:
-                logging.info("检测到大脚本修改，执行全局连通性和逻辑验证...")
-                print("[智能部署] 检测到大脚本修改，正在进行全局测试...")
-                
-                # 执行全局连通性测试
-                connectivity_results = connectivity_tester.run_comprehensive_test()
-                logging.info(f"连通性测试完成，健康度: {connectivity_results['overall_health']:.1f}%")
+            # 输出详细建议
+            for recommendation in validation_results['recommendations']:
+                logging.info(f"系统建议: {recommendation}")
+                print(f"[系统建议] {recommendation}")
                 
-                # 执行整体逻辑验证
-                validation_results = logic_validator.validate_system_logic()
-                logging.info(f"系统逻辑验证完成，状态: {validation_results['system_status']}")
-                
-                # 输出详细建议
-                for recommendation in validation_results['recommendations']:
-                    logging.info(f"系统建议: {recommendation}")
-                    print(f"[系统建议] {recommendation}")
+        else:
+            logging.info("检测到小脚本修改，执行轻量级检查...")
+            print("[智能部署] 检测到小脚本修改，执行轻量级检查...")
+            
+            # 只对修改的脚本进行单独验证
+            for script_path in interaction_map['low_impact_scripts']:
+                script_analysis = analyzer.analyze_script_impact(script_path)
+                if script_analysis['impact_level'] == 'low':
+                    logging.info(f"脚本 {script_path} 通过轻量级检查")
                     
-            else:
-                logging.info("检测到小脚本修改，执行轻量级检查...")
-                print("[智能部署] 检测到小脚本修改，执行轻量级检查...")
-                
-                # 只对修改的脚本进行单独验证
-                for script_path in interaction_map['low_impact_scripts']:
-                    script_analysis = analyzer.analyze_script_impact(script_path)
-                    if script_analysis['impact_level'] == 'low':
-                        logging.info(f"脚本 {script_path} 通过轻量级检查")
-                        
-        except Exception as e:
-            logging.error(f"智能部署管理器异常: {e}")
-            print(f"[警告] 智能部署管理器异常: {e}")
+    except Exception as e:
+        logging.error(f"智能部署管理器异常: {e}")
+        print(f"[警告] 智能部署管理器异常: {e}")
 
-    # 执行智能部署管理
-    smart_deployment_manager()
-    
-except ImportError as e:
-    logging.warning(f"智能分析模块导入失败，跳过高级功能: {e}")
-    print(f"[警告] 智能分析模块导入失败，使用基础功能: {e}")
 
 # 10秒无响应自动继续（示例，实际可用于交互流程）
 def wait_for_input(prompt, timeout=10):
@@ -294,6 +280,109 @@ def wait_for_input(prompt, timeout=10):
             print("超时，自动继续...")
             return None
 
+# 进程级共享缓存：L1 在本进程，L2 为与扫描进程、cli.py 共用的 SQLite 后端
+from utils.memory_cache import create_cache
+CACHE = create_cache(load_settings())
+
+# 请求合并：并发的相同请求（接口 + 规范化参数 + 工作区指纹）只计算一次，其余请求等待并共享结果
+from utils.single_flight import SingleFlight, RecentValue, make_key
+from utils.suggestion_engine import workspace_fingerprint
+FLIGHTS = SingleFlight()
+# 指纹需要遍历整个工作区，只在后台线程刷新；请求线程读取最近一次的值（O(1)）
+WORKSPACE_FINGERPRINT = RecentValue(lambda: workspace_fingerprint(WORKSPACE_DIR), background=True,
+                                    ttl=float(((load_settings().get('server') or {}).get('coalescing') or {}).get('fingerprint_ttl', 2.0)))
+WORKSPACE_FINGERPRINT.refresh_async()
+
+def coalesced(endpoint, compute, fingerprint):
+    """返回 (结果, 是否共享了其他请求的计算)"""
+    key = make_key(endpoint, request.args.items(multi=True) if request else (), fingerprint)
+    return FLIGHTS.do(key, compute, group=endpoint)
+
+def coalesced_response(result, shared):
+    response = jsonify(result)
+    response.headers['X-Coalesced'] = '1' if shared else '0'
+    return response
+
+# 新增：统一模型元数据与健康状态 API
+# 元数据与健康状态来自 ModelRegistry 的缓存快照；健康检查在后台线程池中进行，请求内不加载模型
+@app.route('/models', methods=['GET'])
+def models():
+    try:
+        # 模型发现配置来自 settings.yaml，以其 (mtime, size) 作为指纹；注册表内部按目录 mtime 跟踪模型文件
+        load_settings()
+        result, shared = coalesced('/models', compute_models, str(_SETTINGS_CACHE['key']))
+        if result.get('index_error') and not result.get('models'):
+            return jsonify({'error': result['index_error']}), 400
+        return coalesced_response(result, shared)
+    except BadRequest as br:
+        return jsonify({'error': '参数校验失败', 'detail': str(br)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def compute_models():
+    from ai.model_registry import get_registry
+    registry = get_registry(load_settings())
+    if request.args.get('refresh'):
+        registry.refresh(recheck=request.args.get('refresh') == 'recheck')
+    snapshot = registry.snapshot()
+    if registry.loader.pool is not None:
+        snapshot['pool'] = registry.loader.pool.metrics()
+    return snapshot
+
+def compute_model_check(progress=lambda *a: None):
+    from ai.model_loader import ModelLoader
+    loader = ModelLoader.from_settings(load_settings())
+    progress(10, '检查模型目录与依赖')
+    check_report = loader.self_check()
+    progress(50, '加载模型并进行推理测试')
+    infer_report = loader.auto_infer_and_check()
+    # 结构化日志写入
+    log_entry = {
+        'event': 'model_check',
+        'timestamp': __import__('datetime').datetime.utcnow().isoformat() + 'Z',
+        'self_check': check_report,
+        'inference_check': infer_report
+    }
+    try:
+        with open('server_dependency.log', 'a', encoding='utf-8') as f:
+            f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
+    except Exception as logerr:
+        logging.error(f"日志写入失败: {logerr}")
+    return {'self_check': check_report, 'inference_check': infer_report}
+
+# 新增：模型健康检查与推理测试 API（?async=1 时提交为后台任务）
+@app.route('/model_check', methods=['GET'])
+def model_check():
+    if wants_async():
+        return submit_job('model_check')
+    try:
+        return jsonify(compute_model_check())
+    except BadRequest as br:
+        return jsonify({'error': '参数校验失败', 'detail': str(br)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# 常驻模型池：加载耗时、命中率与常驻模型；POST {"action": "clear"} 卸载空闲模型
+@app.route('/model_pool', methods=['GET', 'POST'])
+def model_pool():
+    from ai.model_pool import get_model_pool
+    pool = get_model_pool(load_settings())
+    if request.method == 'POST':
+        action = (request.get_json(silent=True) or {}).get('action')
+        if action != 'clear':
+            return jsonify({'error': f'unknown action: {action}'}), 400
+        pool.clear()
+    return jsonify(pool.metrics())
+
+def warm_up_models():
+    """服务启动时在后台把 settings['model']['pool']['warm_up'] 个最近修改的模型预加载进模型池"""
+    settings = load_settings()
+    count = int(((settings.get('model') or {}).get('pool') or {}).get('warm_up') or 0)
+    if count <= 0:
+        return None
+    from ai.model_loader import ModelLoader
+    return ModelLoader.from_settings(settings).warm_up(count)
+
 @app.route('/ask', methods=['POST'])
 def ask():
     data = request.get_json(force=True) or {}
@@ -301,10 +390,7 @@ def ask():
     if not q:
         return jsonify({'error':'no query provided'}), 400
     try:
-        from utils.memory_cache import MemoryCache
-        cache = MemoryCache()
-        from ai.context_manager import ContextManager
-        ctx = cache.get('latest_context') or {}
+        ctx = CACHE.get('latest_context') or {}
         from ai.responder import Responder
         r = Responder().respond(ctx, q)
         return jsonify({'answer': r})
@@ -333,30 +419,40 @@ def rules():
             # 可扩展更多字段校验
             with open(rules_path, 'w', encoding='utf-8') as f:
                 yaml.safe_dump(new_rules, f, allow_unicode=True)
-            # 全局联动建议
-            from ai_config.server import global_auto_optimization_suggestion
-            suggestions = global_auto_optimization_suggestion()
-            print(f"[全局建议] {suggestions[-1] if suggestions else '无建议'}")
-            return jsonify({'status': 'updated', 'suggestion': suggestions[-1] if suggestions else '无建议'})
+            # 全局联动建议：规则变更后后台重新计算，本次返回缓存结果
+            SUGGESTIONS.invalidate()
+            return jsonify(dict({'status': 'updated'}, **suggestion_fields()))
         except Exception as e:
             return jsonify({'error': str(e), 'code': 'update_failed'}), 500
 
-# 新增：结构可视化 API
+def compute_structure(progress=lambda *a: None):
+    from utils.structure_visualizer import StructureVisualizer
+    visualizer = StructureVisualizer(WORKSPACE_DIR)
+    progress(10, '分析项目结构')
+    structure_data = visualizer.get_project_structure()
+    # 全局联动建议（缓存）
+    structure_data.update(suggestion_fields())
+    return structure_data
+
+# 新增：结构可视化 API（?async=1 时提交为后台任务）
 @app.route('/structure', methods=['GET'])
 def structure():
+    if wants_async():
+        return submit_job('structure')
     try:
-        from utils.structure_visualizer import StructureVisualizer
-        visualizer = StructureVisualizer(WORKSPACE_DIR)
-        structure_data = visualizer.get_project_structure()
-        # 全局联动建议
-        from ai_config.server import global_auto_optimization_suggestion
-        suggestions = global_auto_optimization_suggestion()
-        print(f"[全局建议] {suggestions[-1] if suggestions else '无建议'}")
-        structure_data['suggestion'] = suggestions[-1] if suggestions else '无建议'
-        return jsonify(structure_data)
+        return coalesced_response(*coalesced_structure())
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def coalesced_structure(progress=lambda *a: None):
+    """与执行中的相同结构分析（含后台任务）合并"""
+    return coalesced('/structure', lambda: compute_structure(progress), WORKSPACE_FINGERPRINT.get())
+
+# 请求合并统计：各接口的调用、实际执行与被合并的次数
+@app.route('/coalescing', methods=['GET'])
+def coalescing_metrics():
+    return jsonify(FLIGHTS.metrics())
+
 # 新增：团队协作与任务分派 API
 @app.route('/tasks', methods=['GET', 'POST'])
 def tasks():
@@ -371,30 +467,31 @@ def tasks():
             if not isinstance(task_info, dict) or 'description' not in task_info:
                 return jsonify({'error': '任务数据格式错误或缺少描述', 'code': 'invalid_task'}), 400
             result = tester.assign_task(task_info)
-            # 全局联动建议
-            from ai_config.server import global_auto_optimization_suggestion
-            suggestions = global_auto_optimization_suggestion()
-            print(f"[全局建议] {suggestions[-1] if suggestions else '无建议'}")
-            result['suggestion'] = suggestions[-1] if suggestions else '无建议'
+            # 全局联动建议（缓存）
+            result.update(suggestion_fields())
             return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e), 'code': 'assign_failed'}), 500
 
-# 新增：智能守护与自愈机制 API
+def compute_self_heal(progress=lambda *a: None, strategy='notify'):
+    """安全扫描 + 自愈；strategy 见 SystemLogicValidator.custom_self_heal，默认 notify 只报告不改文件"""
+    from utils.system_logic_validator import SystemLogicValidator
+    validator = SystemLogicValidator(WORKSPACE_DIR)
+    progress(10, '扫描安全问题')
+    issues = validator.detect_exceptions()['exceptions']
+    progress(60, '执行自愈')
+    heal_result = validator.custom_self_heal(strategy, issues)
+    # 全局联动建议（缓存）
+    return dict({'heal_result': heal_result, 'issues': issues}, **suggestion_fields())
+
+# 新增：智能守护与自愈机制 API（?async=1 时提交为后台任务）
 @app.route('/self_heal', methods=['POST'])
 def self_heal():
+    if wants_async():
+        return submit_job('self_heal')
     try:
-        from utils.system_logic_validator import SystemLogicValidator
-        from scanner.security_scanner import SecurityScanner
-        validator = SystemLogicValidator(WORKSPACE_DIR)
-        scanner = SecurityScanner(WORKSPACE_DIR)
-        issues = scanner.scan_security_issues()
-        heal_result = validator.auto_heal(issues)
-        # 全局联动建议
-        from ai_config.server import global_auto_optimization_suggestion
-        suggestions = global_auto_optimization_suggestion()
-        print(f"[全局建议] {suggestions[-1] if suggestions else '无建议'}")
-        return jsonify({'heal_result': heal_result, 'issues': issues, 'suggestion': suggestions[-1] if suggestions else '无建议'})
+        strategy = (request.get_json(silent=True) or {}).get('strategy', 'notify')
+        return jsonify(compute_self_heal(strategy=strategy))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -463,74 +560,127 @@ pipeline_state = {
 }
 pipeline_lock = Lock()
 
+def compute_pipeline_suggestions(progress=lambda *a: None):
+    """生成优化建议并写回流水线状态；计算在锁外进行，只在写回时加锁"""
+    from ai.refactor_suggester import RefactorSuggester
+    ctx = CACHE.get('latest_context') or {}
+    scan_results = ctx.get('scan_results', {})
+    progress(10, '生成优化建议')
+    suggestions = RefactorSuggester().suggest(scan_results, ctx)
+    with pipeline_lock:
+        pipeline_state['suggestions'] = suggestions
+    return {'suggestions': suggestions}
+
 @app.route('/pipeline', methods=['GET', 'POST'])
 def pipeline():
     global pipeline_state
-    with pipeline_lock:
-        if request.method == 'GET':
+    if request.method == 'GET':
+        with pipeline_lock:
             return jsonify(pipeline_state)
-        if request.method == 'POST':
-            data = request.get_json(force=True) or {}
-            event = data.get('event')
-            task = data.get('task')
-            # 表单安全校验：event 必须为字符串，task（如有）必须为 dict
-            if not isinstance(event, str) or (task and not isinstance(task, dict)):
-                return jsonify({'error': '流水线参数格式错误', 'code': 'invalid_pipeline'}), 400
-            # 事件驱动：根据 event 类型自动联动
-            pipeline_state['last_event'] = event
-            if event == 'start':
-                pipeline_state['status'] = 'running'
-                if task:
-                    pipeline_state['tasks'].append(task)
-            elif event == 'stop':
-                pipeline_state['status'] = 'stopped'
-            elif event == 'reset':
-                pipeline_state = {'tasks': [], 'status': 'idle', 'last_event': None, 'suggestions': []}
-            elif event == 'suggest':
-                # 联动优化建议输出
-                from ai.refactor_suggester import RefactorSuggester
-                from utils.memory_cache import MemoryCache
-                cache = MemoryCache()
-                ctx = cache.get('latest_context') or {}
-                scan_results = ctx.get('scan_results', {})
-                suggester = RefactorSuggester()
-                suggestions = suggester.suggest(scan_results, ctx)
-                pipeline_state['suggestions'] = suggestions
-            return jsonify({'status': pipeline_state['status'], 'tasks': pipeline_state['tasks'], 'suggestions': pipeline_state.get('suggestions', [])})
+    data = request.get_json(force=True) or {}
+    event = data.get('event')
+    task = data.get('task')
+    # 表单安全校验：event 必须为字符串，task（如有）必须为 dict
+    if not isinstance(event, str) or (task and not isinstance(task, dict)):
+        return jsonify({'error': '流水线参数格式错误', 'code': 'invalid_pipeline'}), 400
+    if event == 'suggest':
+        # 联动优化建议输出：耗时计算不占用流水线锁，?async=1 时提交为后台任务
+        if wants_async():
+            with pipeline_lock:
+                pipeline_state['last_event'] = event
+            return submit_job('pipeline_suggest')
+        compute_pipeline_suggestions()
+    # 事件驱动：根据 event 类型自动联动
+    with pipeline_lock:
+        pipeline_state['last_event'] = event
+        if event == 'start':
+            pipeline_state['status'] = 'running'
+            if task:
+                pipeline_state['tasks'].append(task)
+        elif event == 'stop':
+            pipeline_state['status'] = 'stopped'
+        elif event == 'reset':
+            pipeline_state = {'tasks': [], 'status': 'idle', 'last_event': None, 'suggestions': []}
+        return jsonify({'status': pipeline_state['status'], 'tasks': pipeline_state['tasks'], 'suggestions': pipeline_state.get('suggestions', [])})
 
 
 # 全局自动优化建议机制
+from utils.suggestion_engine import SuggestionEngine, collect_global_suggestions
+
 def global_auto_optimization_suggestion():
-    from utils.project_logic_optimizer import ProjectLogicOptimizer
-    from utils.global_coordination_tester import GlobalCoordinationTester
-    from utils.system_logic_validator import SystemLogicValidator
-    from utils.structure_visualizer import StructureVisualizer
-    optimizer = ProjectLogicOptimizer(WORKSPACE_DIR)
-    coordination = GlobalCoordinationTester(WORKSPACE_DIR)
-    validator = SystemLogicValidator(WORKSPACE_DIR)
-    visualizer = StructureVisualizer(WORKSPACE_DIR)
-    # 1. 项目逻辑优化建议
-    logic_report = optimizer.generate_optimization_report()
-    # 2. 协调性建议
-    coord_report = coordination.generate_coordination_report()
-    # 3. 系统自愈与安全建议
-    sys_report = validator.validate_system_logic()
-    # 4. 结构分析建议
-    struct_data = visualizer.get_project_structure()
-    struct_analysis = struct_data.get('analysis', {})
-    # 汇总建议
-    suggestions = []
-    suggestions.extend(logic_report.get('recommendations', []))
-    suggestions.extend(coord_report.get('recommendations', []))
-    suggestions.extend(sys_report.get('recommendations', []))
-    suggestions.extend(struct_analysis.get('suggestions', []))
-    # 保证每次执行后至少有一条建议
-    if not suggestions:
-        suggestions.append('项目结构与逻辑良好，无需优化。建议持续关注安全与协作。')
+    """同步计算全局建议（耗时），请求处理中请使用 SUGGESTIONS.latest()"""
+    suggestions = collect_global_suggestions(WORKSPACE_DIR)
     print(f"[全局优化建议] {suggestions[-1]}")
     logging.info(f"[全局优化建议] {suggestions[-1]}")
     return suggestions
 
+# 后台计算 + 按工作区指纹缓存，接口直接返回最近一次结果
+SUGGESTIONS = SuggestionEngine(WORKSPACE_DIR, compute=lambda ws: global_auto_optimization_suggestion())
+
+def suggestion_fields():
+    s = SUGGESTIONS.latest()
+    return {'suggestion': s['suggestion'], 'suggestion_stale': s['stale'], 'suggestion_generated_at': s['generated_at']}
+
+# 后台任务：耗时分析提交到有界任务队列，POST /jobs 或在原接口加 ?async=1（或 Prefer: respond-async）立即返回任务 ID
+from utils.job_queue import JobQueue, QueueFull, PRIORITIES
+JOBS = JobQueue.from_settings(load_settings())
+JOB_TYPES = {
+    'structure': (lambda progress: coalesced_structure(progress)[0], 'normal'),
+    'self_heal': (compute_self_heal, 'low'),
+    'model_check': (compute_model_check, 'normal'),
+    'pipeline_suggest': (compute_pipeline_suggestions, 'normal'),
+}
+
+def wants_async():
+    if request.args.get('async', '').lower() in ('1', 'true', 'yes'):
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+def submit_job(kind, priority=None):
+    """提交任务并返回 202；同一工作区上执行中的同类任务会被复用"""
+    func, default_priority = JOB_TYPES[kind]
+    priority = priority or request.args.get('priority') or default_priority
+    if priority not in PRIORITIES:
+        return jsonify({'error': f'未知优先级: {priority}', 'code': 'invalid_priority'}), 400
+    try:
+        job, created = JOBS.submit(kind, func, params={'workspace': WORKSPACE_DIR}, priority=priority,
+                                   dedupe_key=f'{kind}:{WORKSPACE_DIR}')
+    except QueueFull as e:
+        return jsonify({'error': '任务队列已满，请稍后重试', 'detail': str(e)}), 503, {'Retry-After': '5'}
+    location = f"/jobs/{job['id']}"
+    body = {'job_id': job['id'], 'status': job['status'], 'deduplicated': not created, 'location': location}
+    return jsonify(body), 202, {'Location': location}
+
+@app.route('/jobs', methods=['GET', 'POST'])
+def jobs():
+    if request.method == 'GET':
+        return jsonify({'jobs': JOBS.list(), 'metrics': JOBS.metrics()})
+    data = request.get_json(silent=True) or {}
+    kind = data.get('type')
+    if kind not in JOB_TYPES:
+        return jsonify({'error': f'未知任务类型: {kind}', 'types': sorted(JOB_TYPES), 'code': 'invalid_job'}), 400
+    return submit_job(kind, data.get('priority'))
+
+# 查询任务状态与结果；?wait=秒 时最多等待任务结束再返回
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    wait = request.args.get('wait', type=float)
+    job = JOBS.wait(job_id, min(wait, 60.0)) if wait else JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': '任务不存在或结果已过期'}), 404
+    return jsonify(job)
+
+# 以 Server-Sent Events 推送任务进度，任务结束时最后一条消息包含结果
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    if JOBS.get(job_id) is None:
+        return jsonify({'error': '任务不存在或结果已过期'}), 404
+    timeout = min(request.args.get('timeout', 60.0, type=float), 600.0)
+    def stream():
+        for snapshot in JOBS.events(job_id, timeout):
+            yield f"event: {snapshot['status']}\ndata: {json.dumps(snapshot, ensure_ascii=False)}\n\n"
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
 # 每次任务完成或无任务时自动调用
 def on_task_complete():
     suggestions = global_auto_optimization_suggestion()
@@ -552,8 +702,7 @@ CUSTOM_API_CONFIG = os.path.join(BASE, 'config/settings.yaml')
 def register_custom_apis(app):
     if not os.path.exists(CUSTOM_API_CONFIG):
         return
-    with open(CUSTOM_API_CONFIG, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
+    config = load_settings()
     for api in config.get('api', {}).get('group', []):
         route = api.get('route')
         name = api.get('name')
@@ -588,21 +737,15 @@ for rule in app.url_map.iter_rules():
 
 # 日志与监控模块联动扩展
 import threading
-MONITOR_LOG_PATH = os.path.join(BASE, 'reports/monitor_log.json')
-monitor_data = []
+# 监控日志：请求线程只写入内存，后台线程批量写入 reports/monitor_log.json（JSON Lines），按大小/时间轮转压缩
+from utils.monitor_log import MonitorLog
+MONITOR = MonitorLog.from_settings(load_settings(), str(BASE))
+MONITOR_LOG_PATH = MONITOR.path
+# 兼容：最近的监控事件（有界环形缓冲）
+monitor_data = MONITOR.recent
 
 def log_monitor_event(event, detail=None):
-    entry = {
-        'event': event,
-        'detail': detail,
-        'timestamp': __import__('datetime').datetime.utcnow().isoformat() + 'Z'
-    }
-    monitor_data.append(entry)
-    try:
-        with open(MONITOR_LOG_PATH, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
-    except Exception as e:
-        LOG.error(f'监控日志写入失败: {e}')
+    MONITOR.append(event, detail)
 
 @app.before_request
 def before_any_request():
@@ -613,15 +756,22 @@ def handle_any_exception(e):
     log_monitor_event('error', {'error': str(e), 'path': request.path})
     return jsonify({'error': str(e)}), 500
 
+# 查询监控日志：since/until（ISO 时间或 Unix 秒）、path（结尾 * 为前缀匹配）、event 过滤；
+# 默认返回最近 limit 条，prev_cursor 作为 before 继续向前翻页；指定 since 或 after 时向后翻页（next_cursor）
 @app.route('/monitor', methods=['GET'])
 def get_monitor_data():
+    args = request.args
     try:
-        with open(MONITOR_LOG_PATH, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        data = [json.loads(line) for line in lines]
-        return jsonify({'monitor': data})
+        limit = min(max(args.get('limit', 100, type=int), 1), 1000)
+        result = MONITOR.query(since=args.get('since'), until=args.get('until'), path=args.get('path'),
+                               event=args.get('event'), limit=limit, after=args.get('after', type=int),
+                               before=args.get('before', type=int), source=args.get('source', 'file'))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'code': 'invalid_query'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    return jsonify({'monitor': result['entries'], 'count': len(result['entries']), 'next_cursor': result['next_cursor'],
+                    'prev_cursor': result['prev_cursor'], 'stats': MONITOR.metrics()})
 
 # 权限与安全管理扩展
 from functools import wraps
@@ -648,9 +798,48 @@ def run_security_scan():
     # 可集成 bandit/safety 命令行自动检测
     pass
 
+# 启动任务：导入 server 时只登记，开始服务后在后台依次执行
+from utils.startup_jobs import StartupJobs
+STARTUP = StartupJobs()
+STARTUP.add('model_discovery', report_models, '识别模型目录中的模型文件')
+STARTUP.add('dependencies', ensure_dependencies, '检查并安装缺失依赖')
+STARTUP.add('workspace_scan', scan_workspace, '检查工作区并识别支持的文件')
+STARTUP.add('module_integration', integrate_modules, '导入 scanner、utils、ai 子模块')
+STARTUP.add('global_suggestions', report_global_suggestions, '生成启动建议')
+STARTUP.add('smart_deployment', smart_deployment_manager, '按脚本修改规模执行连通性与逻辑验证')
+STARTUP.add('model_warm_up', lambda: bool(warm_up_models()), '预加载模型到模型池')
+
+def fast_start_enabled():
+    env = os.environ.get('AI_ASSISTANT_FAST_START')
+    if env is not None:
+        return env.lower() not in ('0', 'false', 'no', 'off')
+    return bool((load_settings().get('server') or {}).get('fast_start', True))
+
+FAST_START = fast_start_enabled()
+if not FAST_START:
+    # 兼容旧行为：导入时同步完成全部启动工作
+    STARTUP.start(background=False)
+
+@app.before_request
+def ensure_startup_jobs():
+    # 以 WSGI 等方式加载、未经过 __main__ 时，在首个请求时开始后台启动任务（已开始则立即返回）
+    STARTUP.start()
+
+@app.route('/status', methods=['GET'])
+def startup_status():
+    return jsonify(STARTUP.status())
+
+# 就绪探针：能响应即为 serving；启动任务全部结束后为 warm（200），之前返回 503
+@app.route('/ready', methods=['GET'])
+def ready():
+    status = STARTUP.status()
+    body = {'serving': True, 'warm': status['warm'], 'state': status['state']}
+    return jsonify(body), 200 if status['warm'] else 503
+
 if __name__ == '__main__':
     print('[DEBUG] 仅启动 Flask 服务，无其他逻辑')
     logging.info('仅启动 Flask 服务，无其他逻辑')
+    STARTUP.start()
     app.run(port=5000)
     print('[DEBUG] Flask 服务已启动')
     logging.info('Flask 服务已启动')
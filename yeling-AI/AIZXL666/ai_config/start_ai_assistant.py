@@ -13,7 +13,7 @@ LOG = logging.getLogger('ai_assistant')
 logging.basicConfig(level=logging.INFO)
 PROJECT_ROOT = Path(__file__).parent
 DEFAULT_WORKSPACE = Path('/home/xiedaima/桌面/GZQ')
-from utils.memory_cache import MemoryCache
+from utils.memory_cache import create_cache
 from scanner.dispatcher import ScannerDispatcher
 from ai.context_manager import ContextManager
 from ai.model_loader import ModelLoader
@@ -29,13 +29,14 @@ async def main():
             settings = yaml.safe_load(f) or {}
     except Exception as e:
         LOG.warning('Could not load settings.yaml: %s', e)
-    cache = MemoryCache(max_items=settings.get('cache',{}).get('max_items',2000),
-                        default_ttl=settings.get('cache',{}).get('default_ttl',600))
+    cache = create_cache(settings)
     # model loader: auto-detect in nomic path if available
     model_loader = ModelLoader(preferred_dir=settings.get('model',{}).get('auto_dir'))
-    model = model_loader.load_model()
+    model, release_model = model_loader.acquire_model()
     if model:
         LOG.info('Model ready: %s', model.get('meta','(unknown)'))
+    # 启动流程后续不再使用模型，立即归还
+    release_model()
     # dispatcher -> scan
     dispatcher = ScannerDispatcher(scanner_folder=PROJECT_ROOT / 'scanner', cache=cache, settings=settings)
     await dispatcher.load_plugins()
@@ -46,7 +47,7 @@ async def main():
     LOG.info('Scanning workspace: %s', workspace)
     scan_results = await dispatcher.run_all(paths=[str(workspace)], parallel=True)
     # build context
-    ctxm = ContextManager(cache=cache)
+    ctxm = ContextManager(cache=cache, dispatcher=dispatcher)
     context = await ctxm.build_context(scan_results, workspace=str(workspace))
     # suggestions (refactor + security combined)
     from ai.refactor_suggester import RefactorSuggester
@@ -65,6 +66,16 @@ async def main():
         import json as _json
         fh.write(_json.dumps(vis.to_json(scan_results), indent=2, ensure_ascii=False))
     LOG.info('Reports written to %s', report_dir)
+    watch_conf = settings.get('watcher',{})
+    if watch_conf.get('enabled'):
+        # 监听工作区变更并增量刷新上下文，直到进程被中断
+        ctxm.watch([str(workspace)], interval=watch_conf.get('interval',1.0), debounce=watch_conf.get('debounce',0.5))
+        LOG.info('Watching %s for changes (Ctrl+C to stop)...', workspace)
+        try:
+            while True:
+                await asyncio.sleep(3600)
+        finally:
+            ctxm.watcher.stop()
     LOG.info('Done.')
 if __name__ == '__main__':
     asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Process-wide parsed-module cache: every .py file is ast.parse'd at most once per content version."""
+import ast, os, threading
+from collections import OrderedDict
+class ASTCache:
+    """按绝对路径缓存 (源码, AST)，LRU 淘汰，内存按源码长度估算。
+
+    命中判断：stat (mtime_ns, size) 一致直接命中；不一致或直接传入源码时比较内容哈希。
+    解析失败（SyntaxError 等）同样缓存，避免每个分析器重复解析坏文件。
+    返回的 AST 为共享对象，调用方只能读取（ast.walk），不能修改。
+    """
+    # AST 节点对象约为源码体积的十倍
+    AST_OVERHEAD = 10
+    def __init__(self, max_bytes=64*1024*1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # path -> [stat_ver, content_ver, source, tree_or_exc, cost]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    def _lookup(self, path, stat_ver=None, content_ver=None):
+        with self._lock:
+            e = self._entries.get(path)
+            if e is None: return None
+            if (stat_ver is not None and e[0] == stat_ver) or (content_ver is not None and e[1] == content_ver):
+                if stat_ver is not None: e[0] = stat_ver
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return e
+        return None
+    def _store(self, path, stat_ver, source):
+        try:
+            tree = ast.parse(source)
+        except (SyntaxError, ValueError) as exc:
+            tree = exc
+        cost = len(source) * (1 + self.AST_OVERHEAD)
+        e = [stat_ver, (len(source), hash(source)), source, tree, cost]
+        with self._lock:
+            self.misses += 1
+            old = self._entries.pop(path, None)
+            if old: self._bytes -= old[4]
+            if cost <= self.max_bytes:
+                self._entries[path] = e
+                self._bytes += cost
+                while self._bytes > self.max_bytes:
+                    _, ev = self._entries.popitem(last=False)
+                    self._bytes -= ev[4]
+        return e
+    def load(self, path):
+        """返回 (源码, AST)；读取失败抛 OSError/UnicodeDecodeError，语法错误抛 SyntaxError"""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stat_ver = (st.st_mtime_ns, st.st_size)
+        e = self._lookup(path, stat_ver=stat_ver)
+        if e is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                source = f.read()
+            e = self._lookup(path, stat_ver=stat_ver, content_ver=(len(source), hash(source))) or self._store(path, stat_ver, source)
+        return e[2], e[3]
+    def parse_file(self, path):
+        tree = self.load(path)[1]
+        if isinstance(tree, Exception): raise tree.with_traceback(None)
+        return tree
+    def read_source(self, path):
+        return self.load(path)[0]
+    def parse_source(self, path, source):
+        """源码已在内存中（如扫描器的 FileRecord）时使用，按内容哈希命中"""
+        path = os.path.abspath(path)
+        e = self._lookup(path, content_ver=(len(source), hash(source))) or self._store(path, None, source)
+        if isinstance(e[3], Exception): raise e[3].with_traceback(None)
+        return e[3]
+    def clear(self):
+        with self._lock:
+            self._entries.clear(); self._bytes = 0
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'hits': self.hits, 'misses': self.misses}
+
+AST_CACHE = ASTCache()
+def parse_file(path): return AST_CACHE.parse_file(path)
+def parse_source(path, source): return AST_CACHE.parse_source(path, source)
+def read_source(path): return AST_CACHE.read_source(path)
+
+if __name__ == "__main__":
+    print("ASTCache 仅作为模块使用，不建议直接运行。")
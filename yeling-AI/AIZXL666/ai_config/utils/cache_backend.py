@@ -0,0 +1,54 @@
+"""Cross-process cache backend (SQLite WAL) shared by the scanner run, the Flask server and cli.py."""
+import json, sqlite3, threading, time
+class SQLiteCacheBackend:
+    """键值 + 过期时间存储，值以 JSON 保存；多个进程可同时打开同一个库文件。
+
+    作为 MemoryCache 的二级存储使用：MemoryCache 在本进程内充当 L1，未命中时回源到这里。
+    """
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS kv_cache ('
+                           'key TEXT PRIMARY KEY, value TEXT NOT NULL, expire REAL, updated REAL)')
+        self._conn.commit()
+    def get(self, key):
+        """返回 (是否存在, 值, 过期时间)；过期时间为 None 表示永不过期"""
+        with self._lock:
+            row = self._conn.execute('SELECT value, expire FROM kv_cache WHERE key=?', (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return False, None, None
+        return True, json.loads(row[0]), row[1]
+    def set(self, key, value, expire=None):
+        """value 必须可 JSON 序列化，否则抛 TypeError/ValueError"""
+        data = json.dumps(value, ensure_ascii=False)
+        expire = None if expire == float('inf') else expire
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO kv_cache VALUES (?,?,?,?)', (key, data, expire, time.time()))
+            self._conn.commit()
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute('DELETE FROM kv_cache WHERE key=?', (key,))
+            self._conn.commit()
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM kv_cache')
+            self._conn.commit()
+    def purge_expired(self):
+        with self._lock:
+            n = self._conn.execute('DELETE FROM kv_cache WHERE expire IS NOT NULL AND expire < ?', (time.time(),)).rowcount
+            self._conn.commit()
+        return n
+    def keys(self, prefix=''):
+        with self._lock:
+            rows = self._conn.execute('SELECT key FROM kv_cache WHERE key >= ? AND key < ? AND (expire IS NULL OR expire >= ?)',
+                                      (prefix, prefix + '\uffff', time.time())).fetchall()
+        return [r[0] for r in rows]
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+if __name__ == "__main__":
+    print("SQLiteCacheBackend 仅作为模块使用，不建议直接运行。")
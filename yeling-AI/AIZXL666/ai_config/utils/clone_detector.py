@@ -0,0 +1,229 @@
+"""
+近似重复代码检测 - 规范化 AST token、winnowing 指纹、MinHash + LSH 分桶，一次遍历完成
+"""
+import ast
+import hashlib
+import operator
+import time
+import zlib
+from array import array
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+# 节点类型 / 常量类型 -> 稳定的整数编号（crc32，跨进程一致，k-gram 哈希因此可复现）
+_TOKEN_IDS: Dict = {}
+_MASK32 = 0xFFFFFFFF
+# 空桶借用右侧非空桶时按距离加上的偏移（黄金分割常数，保证不同距离得到不同值）
+_ROTATION = 0x9E3779B1
+_OPERATORS = (ast.boolop, ast.operator, ast.unaryop, ast.cmpop)
+_DEFINITIONS = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+def _token_id(key) -> int:
+    tid = _TOKEN_IDS.get(key)
+    if tid is None:
+        tid = _TOKEN_IDS[key] = zlib.crc32(str(key).encode())
+    return tid
+
+def function_tokens(node: ast.AST) -> Tuple[List[int], List[str]]:
+    """前序遍历函数节点，返回 (规范化 token, 标识符与常量)。
+
+    规范化 token 只保留节点类型（常量保留其类型），变量名、属性名、常量值都被抽象掉，
+    因此改名或改常量后的副本得到相同的序列；第二个列表用于区分完全相同的副本。
+    嵌套定义不展开，每个节点只被遍历一次。
+    """
+    tokens: List[int] = []
+    names: List[str] = []
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        kind = type(n).__name__
+        if isinstance(n, ast.Constant):
+            tokens.append(_token_id((kind, type(n.value).__name__)))
+            names.append(repr(n.value)[:200])
+        else:
+            tokens.append(_token_id(kind))
+            if isinstance(n, ast.Name): names.append(n.id)
+            elif isinstance(n, ast.Attribute): names.append(n.attr)
+            elif isinstance(n, ast.arg): names.append(n.arg)
+            elif isinstance(n, _DEFINITIONS):
+                names.append(n.name)
+                # 嵌套的函数/类是独立的检测单元，外层只记一个占位 token
+                if n is not node: continue
+        children = []
+        # 直接按 _fields 取子节点，比 ast.iter_child_nodes 的两层生成器快约一倍
+        for field in n._fields:
+            v = getattr(n, field, None)
+            for c in (v if isinstance(v, list) else (v,)):
+                if not isinstance(c, ast.AST) or isinstance(c, ast.expr_context): continue
+                if isinstance(c, _OPERATORS):
+                    # 运算符不单独入栈，直接跟在父节点之后：序列更短，且保留运算种类
+                    tokens.append(_token_id(type(c).__name__))
+                else:
+                    children.append(c)
+        stack.extend(reversed(children))
+    return tokens, names
+
+def winnow(tokens: List[int], k: int = 4, window: int = 4) -> set:
+    """k-gram 哈希后按窗口取最小值（winnowing），得到位置无关的指纹集合"""
+    if len(tokens) < k:
+        return {hash(tuple(tokens))} if tokens else set()
+    hashes = [hash(g) for g in zip(*(tokens[j:] for j in range(k)))]
+    if len(hashes) <= window:
+        return {min(hashes)}
+    return {min(hashes[i:i + window]) for i in range(len(hashes) - window + 1)}
+
+def minhash_signature(fingerprints: set, num_perm: int = 64) -> array:
+    """单次置换 MinHash（按哈希低位分桶取最小值）+ 旋转补齐空桶，代价 O(指纹数 + num_perm)"""
+    bits = num_perm.bit_length() - 1
+    empty = _MASK32 + 1
+    sig = [empty] * num_perm
+    for h in fingerprints:
+        h &= 0xFFFFFFFFFFFFFFFF
+        b = h & (num_perm - 1)
+        v = (h >> bits) & _MASK32
+        if v < sig[b]: sig[b] = v
+    if empty in sig:
+        filled = [i for i, v in enumerate(sig) if v != empty]
+        if not filled: return array('I', [0] * num_perm)
+        nxt = filled[0] + num_perm
+        for i in range(num_perm - 1, -1, -1):
+            if sig[i] != empty: nxt = i
+            else:
+                d = nxt - i
+                sig[i] = (sig[nxt % num_perm] + d * _ROTATION) & _MASK32
+    return array('I', sig)
+
+class _UnionFind:
+    def __init__(self):
+        self.parent: Dict[int, int] = {}
+    def find(self, x: int) -> int:
+        p = self.parent
+        root = x
+        while p.get(root, root) != root: root = p[root]
+        while p.get(x, x) != root:
+            p[x], x = root, p[x]
+        return root
+    def union(self, a: int, b: int) -> bool:
+        ra, rb = self.find(a), self.find(b)
+        if ra == rb: return False
+        self.parent[max(ra, rb)] = min(ra, rb)
+        return True
+
+class CloneDetector:
+    """函数级重复检测：边遍历文件边 add_tree，最后一次性分桶比较。
+
+    - 完全相同（同名同参数、代码一致）的函数按原始 token 摘要分组；
+    - 改名、改常量或少量编辑的副本：规范化 token -> winnowing 指纹 -> MinHash 签名，
+      LSH 分段分桶后只比较同桶候选，相似度（签名估计的 Jaccard）不低于 threshold 的归为一簇。
+    每个函数只保留定长签名（num_perm 个 32 位整数，存放在一个连续数组中）与少量元数据，
+    分桶按段逐个建立和释放，内存与函数个数成正比，与代码总量无关。
+    """
+    def __init__(self, threshold: float = 0.7, min_tokens: int = 40, k: int = 4, window: int = 4,
+                 num_perm: int = 64, rows: int = 4, max_bucket: int = 64):
+        if num_perm & (num_perm - 1) or num_perm % rows:
+            raise ValueError('num_perm 必须是 2 的幂且能被 rows 整除')
+        self.threshold = threshold
+        self.min_tokens = min_tokens
+        self.k = k
+        self.window = window
+        self.num_perm = num_perm
+        self.rows = rows
+        self.max_bucket = max_bucket
+        self.functions: List[Tuple[str, str, int, str, int]] = []   # (文件, 函数名, 行号, 签名, token 数)
+        self.exact_groups: Dict[str, List[int]] = defaultdict(list)  # 同名同参数且代码一致
+        self._normalized: Dict[bytes, int] = {}                      # 规范化摘要 -> 代表（进入 LSH 的单元）
+        self._copies: Dict[int, List[int]] = defaultdict(list)       # 代表 -> 规范化后完全相同的其他函数
+        self._reps: List[int] = []
+        self._signatures = array('I')
+        self.seconds = 0.0
+
+    def add_tree(self, file_path: str, tree: ast.AST):
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.add_function(file_path, node)
+
+    def add_function(self, file_path: str, node):
+        """已在遍历 AST 的调用方可逐个传入函数节点，避免再遍历一次整棵树"""
+        t0 = time.perf_counter()
+        tokens, names = function_tokens(node)
+        args = [a.arg for a in node.args.args]
+        signature = f"{node.name}({', '.join(args)})"
+        fid = len(self.functions)
+        self.functions.append((file_path, node.name, node.lineno, signature, len(tokens)))
+        norm = hashlib.blake2b(array('I', tokens).tobytes(), digest_size=16).digest()
+        raw = hashlib.blake2b(norm + '\x1f'.join(names).encode('utf-8', 'surrogatepass'), digest_size=4).hexdigest()
+        self.exact_groups[f'{signature}_{raw}'].append(fid)
+        if len(tokens) >= self.min_tokens:
+            rep = self._normalized.get(norm)
+            if rep is not None:
+                self._copies[rep].append(fid)
+            else:
+                self._normalized[norm] = fid
+                self._reps.append(fid)
+                self._signatures.extend(minhash_signature(winnow(tokens, self.k, self.window), self.num_perm))
+        self.seconds += time.perf_counter() - t0
+
+    def _occurrence(self, fid: int) -> Dict:
+        file_path, name, line, signature, ntokens = self.functions[fid]
+        return {'file': file_path, 'name': name, 'line': line, 'signature': signature, 'tokens': ntokens}
+
+    def exact_duplicates(self) -> Dict[str, List[Dict]]:
+        """同名同参数、代码完全一致的函数（与原检测器的输出格式相同）"""
+        return {key: [self._occurrence(f) for f in fids] for key, fids in self.exact_groups.items() if len(fids) > 1}
+
+    def similarity(self, a: int, b: int) -> float:
+        """两个 LSH 单元（代表序号）的估计 Jaccard 相似度"""
+        k = self.num_perm
+        sa = self._signatures[a * k:(a + 1) * k]
+        sb = self._signatures[b * k:(b + 1) * k]
+        return sum(map(operator.eq, sa, sb)) / k
+
+    def near_duplicates(self) -> Tuple[List[Dict], Dict]:
+        """返回 (重复簇列表, 统计)。每簇给出成员、簇内连边的最低相似度，以及是否全部规范化后完全相同"""
+        t0 = time.perf_counter()
+        k, rows = self.num_perm, self.rows
+        sig = self._signatures
+        uf = _UnionFind()
+        edge_sim: Dict[int, float] = {}
+        compared = 0
+        for band in range(k // rows):
+            buckets: Dict[int, List[int]] = {}
+            for i in range(len(self._reps)):
+                off = i * k + band * rows
+                buckets.setdefault(hash(tuple(sig[off:off + rows])), []).append(i)
+            for members in buckets.values():
+                if len(members) < 2: continue
+                # 超大桶（常见的模板化结构）只与前 max_bucket 个成员比较，避免平方级开销；连通性由并查集传递
+                for pos, j in enumerate(members[1:], 1):
+                    for i in members[max(0, pos - self.max_bucket):pos]:
+                        if uf.find(i) == uf.find(j): continue
+                        compared += 1
+                        s = self.similarity(i, j)
+                        if s >= self.threshold:
+                            ra, rb = uf.find(i), uf.find(j)
+                            uf.union(ra, rb)
+                            edge_sim[uf.find(ra)] = min(s, edge_sim.pop(ra, 1.0), edge_sim.pop(rb, 1.0))
+            del buckets
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for i, fid in enumerate(self._reps):
+            clusters[uf.find(i)].append(i)
+        out = []
+        for root, members in clusters.items():
+            fids = []
+            for i in members:
+                rep = self._reps[i]
+                fids.append(rep); fids.extend(self._copies.get(rep, ()))
+            if len(fids) < 2: continue
+            fids.sort()
+            out.append({'functions': [self._occurrence(f) for f in fids],
+                        'similarity': round(edge_sim.get(root, 1.0), 3) if len(members) > 1 else 1.0,
+                        'exact': len(members) == 1,
+                        'files': len({self.functions[f][0] for f in fids})})
+        out.sort(key=lambda c: (-len(c['functions']), c['functions'][0]['file'], c['functions'][0]['line']))
+        self.seconds += time.perf_counter() - t0
+        stats = {'functions': len(self.functions), 'lsh_units': len(self._reps), 'comparisons': compared,
+                 'clusters': len(out), 'seconds': round(self.seconds, 3)}
+        return out, stats
+
+if __name__ == "__main__":
+    print("CloneDetector 仅作为模块使用，不建议直接运行。")
@@ -3,46 +3,79 @@
 """
 import os
 import ast
-import hashlib
 import logging
 from typing import Dict, List, Set, Tuple
 from collections import defaultdict
+from .ast_cache import AST_CACHE
+from .clone_detector import CloneDetector
+from .ignore_rules import walk
 
 class CodeDuplicationDetector:
-    def __init__(self, workspace_dir: str):
+    def __init__(self, workspace_dir: str, similarity_threshold: float = 0.7, min_tokens: int = 40):
         self.workspace_dir = workspace_dir
         self.logger = logging.getLogger(__name__)
+        self.similarity_threshold = similarity_threshold
+        self.min_tokens = min_tokens
+        self.files_scanned = 0
         self.duplicate_functions = {}
         self.duplicate_imports = {}
         self.execution_conflicts = []
         
     def scan_all_files(self) -> Dict:
-        """扫描所有文件，检测重复和冲突"""
+        """扫描所有文件，检测重复和冲突；每个文件只读取、解析一次，所有检测在同一次遍历中完成"""
         results = {
             'duplicate_functions': {},
+            'near_duplicate_functions': [],
             'duplicate_imports': {},
             'execution_conflicts': [],
             'main_execution_scripts': [],
             'import_conflicts': [],
+            'clone_stats': {},
             'recommendations': []
         }
         
         python_files = self._find_python_files()
+        self.files_scanned = len(python_files)
+        clones = CloneDetector(threshold=self.similarity_threshold, min_tokens=self.min_tokens)
+        import_statements = defaultdict(list)
+        all_imports = set()
         
-        # 检测重复函数
-        results['duplicate_functions'] = self._detect_duplicate_functions(python_files)
-        
-        # 检测重复导入
-        results['duplicate_imports'] = self._detect_duplicate_imports(python_files)
+        for file_path in python_files:
+            try:
+                content, tree = AST_CACHE.load(file_path)
+            except Exception as e:
+                self.logger.warning(f"读取文件失败 {file_path}: {e}")
+                continue
+            
+            # 检测执行冲突（只需源码，语法错误的文件同样检查）
+            results['execution_conflicts'].extend(self._detect_execution_conflicts(file_path, content))
+            if isinstance(tree, Exception):
+                self.logger.warning(f"解析文件失败 {file_path}: {tree}")
+                continue
+            
+            # 函数指纹（完全重复与近似重复）、导入语句、主执行脚本在同一次 AST 遍历中收集
+            main_check = {'has_main_check': False, 'has_execution_code': False}
+            for node in ast.walk(tree):
+                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    clones.add_function(file_path, node)
+                self._collect_imports(file_path, node, import_statements, all_imports)
+                self._check_main_execution(node, main_check)
+            
+            if main_check['has_main_check'] or main_check['has_execution_code']:
+                results['main_execution_scripts'].append({
+                    'file': file_path,
+                    **main_check,
+                    'is_entry_point': main_check['has_main_check'] and main_check['has_execution_code']
+                })
         
-        # 检测执行冲突
-        results['execution_conflicts'] = self._detect_execution_conflicts(python_files)
+        results['duplicate_functions'] = clones.exact_duplicates()
+        results['near_duplicate_functions'], results['clone_stats'] = clones.near_duplicates()
         
-        # 检测主执行脚本
-        results['main_execution_scripts'] = self._find_main_execution_scripts(python_files)
+        # 检测重复导入
+        results['duplicate_imports'] = self._detect_duplicate_imports(import_statements)
         
         # 检测导入冲突
-        results['import_conflicts'] = self._detect_import_conflicts(python_files)
+        results['import_conflicts'] = self._detect_import_conflicts(all_imports)
         
         # 生成建议
         results['recommendations'] = self._generate_recommendations(results)
@@ -52,87 +85,37 @@ class CodeDuplicationDetector:
     def _find_python_files(self) -> List[str]:
         """查找所有Python文件"""
         python_files = []
-        for root, dirs, files in os.walk(self.workspace_dir):
-            # 跳过 __pycache__ 和 .git 目录
-            dirs[:] = [d for d in dirs if not d.startswith(('.git', '__pycache__', '.venv'))]
-            
+        # .git、__pycache__、虚拟环境等目录由忽略规则在遍历时剪枝
+        for root, dirs, files in walk(self.workspace_dir):
             for file in files:
                 if file.endswith('.py'):
                     python_files.append(os.path.join(root, file))
         return python_files
     
-    def _detect_duplicate_functions(self, python_files: List[str]) -> Dict:
-        """检测重复函数定义"""
-        function_signatures = defaultdict(list)
-        
-        for file_path in python_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                tree = ast.parse(content)
-                
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.FunctionDef):
-                        # 创建函数签名
-                        args = [arg.arg for arg in node.args.args]
-                        signature = f"{node.name}({', '.join(args)})"
-                        
-                        # 计算函数体的哈希值
-                        body_code = ast.unparse(node) if hasattr(ast, 'unparse') else str(node.lineno)
-                        body_hash = hashlib.md5(body_code.encode()).hexdigest()[:8]
-                        
-                        function_signatures[f"{signature}_{body_hash}"].append({
-                            'file': file_path,
-                            'name': node.name,
-                            'line': node.lineno,
-                            'signature': signature
-                        })
-                        
-            except Exception as e:
-                self.logger.warning(f"解析文件失败 {file_path}: {e}")
-        
-        # 找出重复的函数
-        duplicates = {}
-        for sig, occurrences in function_signatures.items():
-            if len(occurrences) > 1:
-                duplicates[sig] = occurrences
-                
-        return duplicates
+    def _collect_imports(self, file_path: str, node: ast.AST, import_statements: Dict, all_imports: Set[str]):
+        """记录导入语句及其顶层模块名"""
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                import_stmt = f"import {alias.name}"
+                import_statements[import_stmt].append({
+                    'file': file_path,
+                    'line': node.lineno,
+                    'statement': import_stmt
+                })
+                all_imports.add(alias.name.split('.')[0])
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                for alias in node.names:
+                    import_stmt = f"from {node.module} import {alias.name}"
+                    import_statements[import_stmt].append({
+                        'file': file_path,
+                        'line': node.lineno,
+                        'statement': import_stmt
+                    })
+                all_imports.add(node.module.split('.')[0])
     
-    def _detect_duplicate_imports(self, python_files: List[str]) -> Dict:
+    def _detect_duplicate_imports(self, import_statements: Dict) -> Dict:
         """检测重复导入"""
-        import_statements = defaultdict(list)
-        
-        for file_path in python_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                tree = ast.parse(content)
-                
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            import_stmt = f"import {alias.name}"
-                            import_statements[import_stmt].append({
-                                'file': file_path,
-                                'line': node.lineno,
-                                'statement': import_stmt
-                            })
-                    elif isinstance(node, ast.ImportFrom):
-                        if node.module:
-                            for alias in node.names:
-                                import_stmt = f"from {node.module} import {alias.name}"
-                                import_statements[import_stmt].append({
-                                    'file': file_path,
-                                    'line': node.lineno,
-                                    'statement': import_stmt
-                                })
-                                
-            except Exception as e:
-                self.logger.warning(f"解析导入失败 {file_path}: {e}")
-        
         # 找出在同一文件中重复的导入
         file_duplicates = {}
         for stmt, occurrences in import_statements.items():
@@ -151,80 +134,46 @@ class CodeDuplicationDetector:
         
         return file_duplicates
     
-    def _detect_execution_conflicts(self, python_files: List[str]) -> List[Dict]:
+    def _detect_execution_conflicts(self, file_path: str, content: str) -> List[Dict]:
         """检测执行冲突"""
         conflicts = []
         
-        for file_path in python_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # 检测可能的冲突模式
-                conflict_patterns = [
-                    ('Flask app.run', 'app.run'),
-                    ('服务器启动', 'server.'),
-                    ('主循环', 'while True'),
-                    ('全局变量修改', 'global '),
-                    ('配置文件写入', 'open(.*w')
-                ]
-                
-                for pattern_name, pattern in conflict_patterns:
-                    if pattern in content:
-                        conflicts.append({
-                            'file': file_path,
-                            'type': pattern_name,
-                            'pattern': pattern,
-                            'potential_conflict': True
-                        })
-                        
-            except Exception as e:
-                self.logger.warning(f"检测执行冲突失败 {file_path}: {e}")
+        # 检测可能的冲突模式
+        conflict_patterns = [
+            ('Flask app.run', 'app.run'),
+            ('服务器启动', 'server.'),
+            ('主循环', 'while True'),
+            ('全局变量修改', 'global '),
+            ('配置文件写入', 'open(.*w')
+        ]
+        
+        for pattern_name, pattern in conflict_patterns:
+            if pattern in content:
+                conflicts.append({
+                    'file': file_path,
+                    'type': pattern_name,
+                    'pattern': pattern,
+                    'potential_conflict': True
+                })
         
         return conflicts
     
-    def _find_main_execution_scripts(self, python_files: List[str]) -> List[Dict]:
-        """查找主执行脚本"""
-        main_scripts = []
+    def _check_main_execution(self, node: ast.AST, main_check: Dict):
+        """判断节点是否为 __name__ 检查或执行代码，结果累积到 main_check"""
+        # 检查 if __name__ == '__main__'
+        if (isinstance(node, ast.If) and 
+            isinstance(node.test, ast.Compare) and
+            isinstance(node.test.left, ast.Name) and
+            node.test.left.id == '__name__'):
+            main_check['has_main_check'] = True
         
-        for file_path in python_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                tree = ast.parse(content)
-                
-                has_main_check = False
-                has_execution_code = False
-                
-                for node in ast.walk(tree):
-                    # 检查 if __name__ == '__main__'
-                    if (isinstance(node, ast.If) and 
-                        isinstance(node.test, ast.Compare) and
-                        isinstance(node.test.left, ast.Name) and
-                        node.test.left.id == '__name__'):
-                        has_main_check = True
-                    
-                    # 检查是否有执行代码
-                    if (isinstance(node, (ast.FunctionDef, ast.ClassDef)) or
-                        (isinstance(node, ast.Expr) and 
-                         isinstance(node.value, ast.Call))):
-                        has_execution_code = True
-                
-                if has_main_check or has_execution_code:
-                    main_scripts.append({
-                        'file': file_path,
-                        'has_main_check': has_main_check,
-                        'has_execution_code': has_execution_code,
-                        'is_entry_point': has_main_check and has_execution_code
-                    })
-                    
-            except Exception as e:
-                self.logger.warning(f"分析主执行脚本失败 {file_path}: {e}")
-        
-        return main_scripts
+        # 检查是否有执行代码
+        if (isinstance(node, (ast.FunctionDef, ast.ClassDef)) or
+            (isinstance(node, ast.Expr) and 
+             isinstance(node.value, ast.Call))):
+            main_check['has_execution_code'] = True
     
-    def _detect_import_conflicts(self, python_files: List[str]) -> List[Dict]:
+    def _detect_import_conflicts(self, all_imports: Set[str]) -> List[Dict]:
         """检测导入冲突"""
         conflicts = []
         
@@ -235,25 +184,6 @@ class CodeDuplicationDetector:
             (['numpy', 'tensorflow'], '需要确保版本兼容'),
         ]
         
-        all_imports = set()
-        for file_path in python_files:
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                tree = ast.parse(content)
-                
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        for alias in node.names:
-                            all_imports.add(alias.name.split('.')[0])
-                    elif isinstance(node, ast.ImportFrom):
-                        if node.module:
-                            all_imports.add(node.module.split('.')[0])
-                            
-            except Exception as e:
-                continue
-        
         for conflict_group, message in conflicting_imports:
             found_conflicts = [imp for imp in conflict_group if imp in all_imports]
             if len(found_conflicts) > 1:
@@ -283,6 +213,14 @@ class CodeDuplicationDetector:
                 "建议清理重复的import语句"
             )
         
+        # 近似重复函数建议
+        near = results.get('near_duplicate_functions', [])
+        if near:
+            recommendations.append(
+                f"发现 {len(near)} 组相似度不低于 {self.similarity_threshold:.0%} 的近似重复函数"
+                "（改名或少量修改的副本），建议合并为共享实现"
+            )
+        
         # 执行冲突建议
         execution_conflicts = len(results['execution_conflicts'])
         if execution_conflicts > 0:
@@ -313,8 +251,9 @@ class CodeDuplicationDetector:
         
         # 统计信息
         stats = {
-            'total_files_scanned': len(self._find_python_files()),
+            'total_files_scanned': self.files_scanned,
             'duplicate_functions_found': len(results['duplicate_functions']),
+            'near_duplicate_clusters_found': len(results['near_duplicate_functions']),
             'duplicate_imports_found': len(results['duplicate_imports']),
             'execution_conflicts_found': len(results['execution_conflicts']),
             'main_scripts_found': len(results['main_execution_scripts']),
@@ -4,8 +4,40 @@
 import os
 import ast
 import logging
-from typing import Dict, List, Set, Tuple
+from collections import Counter
+from typing import Dict, List, Sequence, Set, Tuple
 from .code_duplication_detector import CodeDuplicationDetector
+from .ast_cache import parse_file
+from .ignore_rules import walk
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def build_coupling_matrix(names: Sequence[str], histograms: Sequence[Tuple[Counter, int]]):
+    """由各模块的 (导入直方图, 导入语句数) 聚合出耦合矩阵，matrix[i][j] 为模块 i 对模块 j 的耦合强度。
+
+    模块 j 的名字出现在导入名中即计为一次耦合（与原实现的子串匹配一致）。每个不同的导入名只与
+    模块名比较一次，之后按计数累加，总代价 O(不同导入名数 × 模块数 + 直方图总大小)，不再重复解析文件。
+    安装了 numpy 时返回 ndarray，否则返回嵌套列表。
+    """
+    n = len(names)
+    matches: Dict[str, List[int]] = {}
+    for histogram, _ in histograms:
+        for imported in histogram:
+            if imported not in matches:
+                matches[imported] = [j for j, name in enumerate(names) if name in imported]
+    counts = np.zeros((n, n)) if np is not None else [[0.0] * n for _ in range(n)]
+    for i, (histogram, _) in enumerate(histograms):
+        row = counts[i]
+        for imported, count in histogram.items():
+            for j in matches[imported]:
+                row[j] += count
+    totals = [total for _, total in histograms]
+    if np is not None:
+        totals = np.asarray(totals, dtype=float)
+        return np.divide(counts, totals[:, None], out=np.zeros_like(counts), where=totals[:, None] > 0)
+    return [[c / totals[i] if totals[i] else 0.0 for c in counts[i]] for i in range(n)]
 
 class FunctionalIndependenceValidator:
     def __init__(self, workspace_dir: str):
@@ -33,8 +65,8 @@ class FunctionalIndependenceValidator:
         # 分析模块间耦合
         results['coupling_analysis'] = self._analyze_module_coupling(modules)
         
-        # 分析职责分离
-        results['responsibility_analysis'] = self._analyze_responsibility_separation(modules)
+        # 分析职责分离（复用上面的单模块分析结果）
+        results['responsibility_analysis'] = self._analyze_responsibility_separation(modules, results['module_analysis'])
         
         # 计算独立性分数
         results['independence_score'] = self._calculate_independence_score(results)
@@ -81,7 +113,7 @@ class FunctionalIndependenceValidator:
         if os.path.isdir(module_path):
             # 分析目录模块
             python_files = []
-            for root, dirs, files in os.walk(module_path):
+            for root, dirs, files in walk(module_path):
                 for file in files:
                     if file.endswith('.py'):
                         python_files.append(os.path.join(root, file))
@@ -123,10 +155,7 @@ class FunctionalIndependenceValidator:
         }
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            tree = ast.parse(content)
+            tree = parse_file(file_path)
             
             for node in ast.walk(tree):
                 if isinstance(node, ast.FunctionDef):
@@ -180,80 +209,79 @@ class FunctionalIndependenceValidator:
         
         return module_name.split('.')[0] in external_modules
     
+    def _module_python_files(self, module_path: str) -> List[str]:
+        """模块包含的 Python 文件：目录模块递归查找，单文件模块即其本身"""
+        if os.path.isdir(module_path):
+            python_files = []
+            for root, dirs, files in walk(module_path):
+                for file in files:
+                    if file.endswith('.py'):
+                        python_files.append(os.path.join(root, file))
+            return python_files
+        return [module_path] if module_path.endswith('.py') else []
+    
+    def _import_histogram(self, python_files: List[str]) -> Tuple[Counter, int]:
+        """统计模块内导入的模块名出现次数，返回 (名字 -> 次数, 导入语句总数)。
+
+        与原两两比较的计数方式一致：from x import ... 计一次 x，import a, b 中每个名字各计一次。
+        """
+        histogram = Counter()
+        total_imports = 0
+        for py_file in python_files:
+            try:
+                tree = parse_file(py_file)
+            except Exception:
+                continue
+            for node in ast.walk(tree):
+                if isinstance(node, ast.ImportFrom):
+                    total_imports += 1
+                    if node.module:
+                        histogram[node.module] += 1
+                elif isinstance(node, ast.Import):
+                    total_imports += 1
+                    for alias in node.names:
+                        histogram[alias.name] += 1
+        return histogram, total_imports
+    
     def _analyze_module_coupling(self, modules: Dict[str, str]) -> Dict:
-        """分析模块间耦合"""
+        """分析模块间耦合：每个模块的文件只解析一次，耦合矩阵由导入直方图一次聚合得到"""
+        names = list(modules)
+        histograms = [self._import_histogram(self._module_python_files(modules[name])) for name in names]
+        matrix = build_coupling_matrix(names, histograms)
+        
         coupling_analysis = {
             'coupling_matrix': {},
+            'coupling_compact': {'modules': names, 'entries': []},
             'high_coupling_pairs': [],
             'coupling_score': 0.0
         }
         
-        # 构建耦合矩阵
-        for module1_name, module1_path in modules.items():
-            coupling_analysis['coupling_matrix'][module1_name] = {}
-            
-            for module2_name, module2_path in modules.items():
-                if module1_name != module2_name:
-                    coupling_strength = self._calculate_coupling_strength(
-                        module1_path, module2_path, module2_name
-                    )
-                    coupling_analysis['coupling_matrix'][module1_name][module2_name] = coupling_strength
-                    
-                    if coupling_strength > 0.7:  # 高耦合阈值
-                        coupling_analysis['high_coupling_pairs'].append({
-                            'module1': module1_name,
-                            'module2': module2_name,
-                            'strength': coupling_strength
-                        })
-        
-        # 计算整体耦合分数
-        all_couplings = []
-        for module1_couplings in coupling_analysis['coupling_matrix'].values():
-            all_couplings.extend(module1_couplings.values())
-        
-        coupling_analysis['coupling_score'] = sum(all_couplings) / len(all_couplings) if all_couplings else 0.0
-        
-        return coupling_analysis
-    
-    def _calculate_coupling_strength(self, module1_path: str, module2_path: str, module2_name: str) -> float:
-        """计算两个模块间的耦合强度"""
-        coupling_count = 0
-        total_imports = 0
-        
-        if os.path.isdir(module1_path):
-            python_files = []
-            for root, dirs, files in os.walk(module1_path):
-                for file in files:
-                    if file.endswith('.py'):
-                        python_files.append(os.path.join(root, file))
-        else:
-            python_files = [module1_path] if module1_path.endswith('.py') else []
+        total = 0.0
+        for i, module1_name in enumerate(names):
+            row = [float(v) for v in matrix[i]]
+            coupling_analysis['coupling_matrix'][module1_name] = {
+                module2_name: row[j] for j, module2_name in enumerate(names) if j != i
+            }
+            for j, coupling_strength in enumerate(row):
+                if j == i or not coupling_strength:
+                    continue
+                total += coupling_strength
+                # 紧凑形式只保存非零项 [行, 列, 强度]
+                coupling_analysis['coupling_compact']['entries'].append([i, j, round(coupling_strength, 4)])
+                if coupling_strength > 0.7:  # 高耦合阈值
+                    coupling_analysis['high_coupling_pairs'].append({
+                        'module1': module1_name,
+                        'module2': names[j],
+                        'strength': coupling_strength
+                    })
         
-        for py_file in python_files:
-            try:
-                with open(py_file, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                tree = ast.parse(content)
-                
-                for node in ast.walk(tree):
-                    if isinstance(node, (ast.Import, ast.ImportFrom)):
-                        total_imports += 1
-                        
-                        if isinstance(node, ast.ImportFrom) and node.module:
-                            if module2_name in node.module:
-                                coupling_count += 1
-                        elif isinstance(node, ast.Import):
-                            for alias in node.names:
-                                if module2_name in alias.name:
-                                    coupling_count += 1
-                                    
-            except Exception as e:
-                continue
+        # 计算整体耦合分数（所有有序模块对的平均值）
+        pairs = len(names) * (len(names) - 1)
+        coupling_analysis['coupling_score'] = total / pairs if pairs else 0.0
         
-        return coupling_count / total_imports if total_imports > 0 else 0.0
+        return coupling_analysis
     
-    def _analyze_responsibility_separation(self, modules: Dict[str, str]) -> Dict:
+    def _analyze_responsibility_separation(self, modules: Dict[str, str], module_analysis: Dict = None) -> Dict:
         """分析职责分离情况"""
         responsibility_analysis = {
             'module_responsibilities': {},
@@ -263,8 +291,8 @@ class FunctionalIndependenceValidator:
         
         # 收集每个模块的职责
         for module_name, module_path in modules.items():
-            module_analysis = self._analyze_single_module(module_path)
-            responsibility_analysis['module_responsibilities'][module_name] = module_analysis['responsibilities']
+            analysis = (module_analysis or {}).get(module_name) or self._analyze_single_module(module_path)
+            responsibility_analysis['module_responsibilities'][module_name] = analysis['responsibilities']
         
         # 检查职责重叠
         all_modules = list(modules.keys())
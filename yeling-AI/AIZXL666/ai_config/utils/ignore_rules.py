@@ -0,0 +1,154 @@
+"""
+工作区忽略规则 - .gitignore 风格匹配 + settings.yaml 中的 scanner.exclude，在目录层面剪枝
+"""
+import os
+import re
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# 任何工作区都不需要扫描的目录（版本库、虚拟环境、依赖、缓存、构建产物）
+DEFAULT_EXCLUDES = (
+    '.git/', '.hg/', '.svn/', '.venv/', 'venv/', '.tox/', '.nox/', 'node_modules/', '__pycache__/',
+    '.mypy_cache/', '.pytest_cache/', '.ruff_cache/', '.idea/', 'build/', 'dist/', '*.egg-info/',
+)
+SETTINGS_PATH = Path(__file__).resolve().parent.parent / 'config' / 'settings.yaml'
+
+def _translate(pattern: str) -> str:
+    """把一条 gitignore 模式（已去掉 ! 与结尾 /）转换为匹配相对路径的正则"""
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+    i, out = 0, []
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?'); i += 3; continue
+        if pattern.startswith('/**', i) and i + 3 == len(pattern):
+            out.append('/.*'); i += 3; continue
+        if pattern.startswith('**', i):
+            out.append('.*'); i += 2; continue
+        if c == '*': out.append('[^/]*')
+        elif c == '?': out.append('[^/]')
+        elif c == '[':
+            j = pattern.find(']', i + 1)
+            if j == -1: out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:j]
+                if body.startswith('!'): body = '^' + body[1:]
+                out.append('[' + body.replace('\\', '\\\\') + ']'); i = j
+        elif c == '\\' and i + 1 < len(pattern):
+            i += 1; out.append(re.escape(pattern[i]))
+        else: out.append(re.escape(c))
+        i += 1
+    body = ''.join(out)
+    # 不含 / 的模式匹配任意层级的同名条目；含 / 的模式相对规则所在目录锚定
+    return ('' if anchored else '(?:.*/)?') + body + '$'
+
+@lru_cache(maxsize=256)
+def compile_patterns(patterns: Tuple[str, ...], base: str = '') -> Tuple[tuple, ...]:
+    """编译一组模式，返回 (基准目录, 正则, 是否取反, 是否只匹配目录) 元组；相同输入只编译一次"""
+    rules = []
+    for raw in patterns:
+        line = raw.rstrip('\n').rstrip()
+        if not line or line.startswith('#'): continue
+        negate = line.startswith('!')
+        if negate: line = line[1:]
+        if line.startswith('\\'): line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line: continue
+        rules.append((base, re.compile(_translate(line)), negate, dir_only))
+    return tuple(rules)
+
+class IgnoreRules:
+    """某个根目录下的忽略规则；规则按顺序匹配，后出现的覆盖先出现的（与 git 一致）。
+
+    子目录中的 .gitignore 在遍历到该目录时加载，只作用于该目录以下。
+    被忽略的目录不会再进入，因此其中的文件无法用 ! 重新包含（与 git 行为相同）。
+    """
+    def __init__(self, root: str, patterns: Iterable[str] = (), gitignore: bool = True):
+        self.root = os.path.abspath(root)
+        self.gitignore = gitignore
+        self._rules = list(compile_patterns(tuple(patterns)))
+        self._loaded = set()
+        self._lock = threading.Lock()
+        if gitignore:
+            self.load_gitignore(self.root)
+
+    def load_gitignore(self, dirpath: str):
+        dirpath = os.path.abspath(dirpath)
+        with self._lock:
+            if dirpath in self._loaded: return
+            self._loaded.add(dirpath)
+        try:
+            with open(os.path.join(dirpath, '.gitignore'), 'r', encoding='utf-8', errors='ignore') as f:
+                lines = tuple(f)
+        except OSError:
+            return
+        base = os.path.relpath(dirpath, self.root).replace(os.sep, '/')
+        rules = compile_patterns(lines, '' if base == '.' else base)
+        with self._lock:
+            self._rules.extend(rules)
+
+    def ignored(self, path: str, is_dir: bool) -> bool:
+        rel = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+        if rel == '.' or rel.startswith('../'): return False
+        for base, regex, negate, dir_only in reversed(self._rules):
+            if dir_only and not is_dir: continue
+            if base:
+                if not rel.startswith(base + '/'): continue
+                sub = rel[len(base) + 1:]
+            else:
+                sub = rel
+            if regex.match(sub):
+                return not negate
+        return False
+
+    def prune(self, dirpath: str, dirnames: List[str], filenames: Optional[List[str]] = None):
+        """供 os.walk(topdown=True) 使用：原地删除被忽略的子目录与文件"""
+        if self.gitignore and filenames is not None and '.gitignore' in filenames:
+            self.load_gitignore(dirpath)
+        dirnames[:] = [d for d in dirnames if not self.ignored(os.path.join(dirpath, d), True)]
+        if filenames is not None:
+            filenames[:] = [f for f in filenames if not self.ignored(os.path.join(dirpath, f), False)]
+
+_SETTINGS_EXCLUDES = None
+def settings_excludes() -> Tuple[str, ...]:
+    """settings.yaml 中 scanner.exclude（只读取一次）"""
+    global _SETTINGS_EXCLUDES
+    if _SETTINGS_EXCLUDES is None:
+        excludes = ()
+        try:
+            import yaml
+            with open(SETTINGS_PATH, 'r', encoding='utf-8') as f:
+                excludes = tuple(((yaml.safe_load(f) or {}).get('scanner', {}) or {}).get('exclude') or ())
+        except Exception:
+            pass
+        _SETTINGS_EXCLUDES = excludes
+    return _SETTINGS_EXCLUDES
+
+def load_ignore_rules(root: str, settings: Optional[dict] = None) -> IgnoreRules:
+    """默认排除 + scanner.exclude（传入 settings 时以其为准，否则读取 settings.yaml）+ 根目录 .gitignore"""
+    if settings is not None:
+        conf = settings.get('scanner', {}) or {}
+        excludes, gitignore = tuple(conf.get('exclude') or ()), conf.get('gitignore', True)
+    else:
+        excludes, gitignore = settings_excludes(), True
+    return IgnoreRules(root, DEFAULT_EXCLUDES + excludes, gitignore=gitignore)
+
+def walk(top: str, rules: Optional[IgnoreRules] = None, settings: Optional[dict] = None) -> Iterator[Tuple[str, List[str], List[str]]]:
+    """与 os.walk 相同的产出，但被忽略的目录不会进入，被忽略的文件不会出现"""
+    rules = rules or load_ignore_rules(top, settings)
+    for dirpath, dirnames, filenames in os.walk(top):
+        rules.prune(dirpath, dirnames, filenames)
+        yield dirpath, dirnames, filenames
+
+def iter_files(top: str, suffix: Optional[str] = None, rules: Optional[IgnoreRules] = None) -> Iterator[str]:
+    for dirpath, _, filenames in walk(top, rules):
+        for name in filenames:
+            if suffix is None or name.endswith(suffix):
+                yield os.path.join(dirpath, name)
+
+if __name__ == "__main__":
+    print("IgnoreRules 仅作为模块使用，不建议直接运行。")
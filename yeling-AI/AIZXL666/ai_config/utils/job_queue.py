@@ -0,0 +1,193 @@
+"""
+后台任务队列 - 耗时分析提交后立即返回任务 ID，在有界线程池中按优先级执行，结果按 TTL 保留；执行期间相同的请求合并为同一个任务
+"""
+import time
+import uuid
+import heapq
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+FINISHED = ('done', 'failed')
+
+class QueueFull(Exception):
+    """排队中的任务数已达上限"""
+
+class JobQueue:
+    """workers 个后台线程按优先级（high > normal > low，同级先进先出）执行任务。
+
+    - submit() 立即返回任务快照；dedupe_key 相同且尚未结束的任务直接复用，requests 计数加一；
+    - 任务函数接收 progress(percent, message) 回调，用于 /jobs/<id> 轮询与 events() 推送进度；
+    - 结束的任务保留 result_ttl 秒（最多 max_finished 个），之后查询返回 None；
+    - 排队任务超过 max_queued 时 submit() 抛出 QueueFull。
+    """
+    def __init__(self, workers: int = 2, max_queued: int = 64, result_ttl: float = 600.0, max_finished: int = 256):
+        self.workers = max(1, int(workers))
+        self.max_queued = max(1, int(max_queued))
+        self.result_ttl = result_ttl
+        self.max_finished = max_finished
+        self._cond = threading.Condition()
+        self._heap: List[Tuple[int, int, str]] = []
+        self._seq = 0
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._funcs: Dict[str, Callable] = {}
+        self._dedupe: Dict[str, str] = {}
+        self._threads: List[threading.Thread] = []
+        self._stopped = False
+        self.stats = {'submitted': 0, 'deduplicated': 0, 'rejected': 0, 'done': 0, 'failed': 0, 'expired': 0}
+        self.logger = logging.getLogger(__name__)
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]]) -> 'JobQueue':
+        cfg = (settings or {}).get('jobs') or {}
+        return cls(workers=cfg.get('workers', 2), max_queued=cfg.get('max_queued', 64),
+                   result_ttl=cfg.get('result_ttl', 600), max_finished=cfg.get('max_finished', 256))
+
+    def submit(self, kind: str, func: Callable[[Callable], Any], params: Optional[Dict[str, Any]] = None,
+               priority: str = 'normal', dedupe_key: Optional[str] = None) -> Tuple[Dict[str, Any], bool]:
+        """返回 (任务快照, 是否为新建任务)"""
+        if priority not in PRIORITIES:
+            raise ValueError(f'unknown priority: {priority}')
+        with self._cond:
+            self._sweep()
+            job_id = self._dedupe.get(dedupe_key) if dedupe_key else None
+            if job_id is not None:
+                job = self._jobs[job_id]
+                job['requests'] += 1
+                self.stats['deduplicated'] += 1
+                return self._snapshot(job), False
+            queued = sum(1 for j in self._jobs.values() if j['status'] == 'queued')
+            if queued >= self.max_queued:
+                self.stats['rejected'] += 1
+                raise QueueFull(f'{queued} jobs already queued')
+            job_id = uuid.uuid4().hex
+            job = {'id': job_id, 'kind': kind, 'params': params or {}, 'priority': priority, 'status': 'queued',
+                   'progress': 0.0, 'message': '', 'requests': 1, 'created_at': time.time(), 'started_at': None,
+                   'finished_at': None, 'result': None, 'error': None, 'version': 0, 'dedupe_key': dedupe_key}
+            self._jobs[job_id] = job
+            self._funcs[job_id] = func
+            if dedupe_key:
+                self._dedupe[dedupe_key] = job_id
+            self._seq += 1
+            heapq.heappush(self._heap, (PRIORITIES[priority], self._seq, job_id))
+            self.stats['submitted'] += 1
+            self._ensure_workers()
+            self._cond.notify_all()
+            return self._snapshot(job), True
+
+    def _ensure_workers(self):
+        # 首次提交时才启动线程，导入 server 不产生后台线程
+        while len(self._threads) < self.workers:
+            t = threading.Thread(target=self._worker, daemon=True, name=f'job-worker-{len(self._threads)}')
+            self._threads.append(t)
+            t.start()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                _, _, job_id = heapq.heappop(self._heap)
+                job = self._jobs.get(job_id)
+                func = self._funcs.pop(job_id, None)
+                if job is None or func is None:
+                    continue
+                self._update(job, status='running', started_at=time.time())
+            try:
+                result = func(lambda percent=None, message='': self._progress(job, percent, message))
+                outcome = {'status': 'done', 'result': result, 'progress': 100.0}
+            except Exception as e:
+                self.logger.error('job %s (%s) failed: %s', job_id, job['kind'], e)
+                outcome = {'status': 'failed', 'error': str(e)}
+            with self._cond:
+                if self._dedupe.get(job['dedupe_key']) == job_id:
+                    del self._dedupe[job['dedupe_key']]
+                self.stats[outcome['status']] += 1
+                self._update(job, finished_at=time.time(), **outcome)
+
+    def _progress(self, job, percent, message):
+        with self._cond:
+            fields = {'message': message}
+            if percent is not None:
+                fields['progress'] = float(percent)
+            self._update(job, **fields)
+
+    def _update(self, job, **fields):
+        """调用方持有 self._cond"""
+        job.update(fields)
+        job['version'] += 1
+        self._cond.notify_all()
+
+    def _sweep(self):
+        """清理过期或超出数量上限的已结束任务；调用方持有 self._cond"""
+        now = time.time()
+        finished = sorted((j['finished_at'], j['id']) for j in self._jobs.values() if j['status'] in FINISHED)
+        overflow = len(finished) - self.max_finished
+        for i, (finished_at, job_id) in enumerate(finished):
+            if i < overflow or now - finished_at > self.result_ttl:
+                del self._jobs[job_id]
+                self.stats['expired'] += 1
+
+    @staticmethod
+    def _snapshot(job) -> Dict[str, Any]:
+        return {k: v for k, v in job.items() if k not in ('version', 'dedupe_key')}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._cond:
+            self._sweep()
+            job = self._jobs.get(job_id)
+            return self._snapshot(job) if job else None
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """等待任务结束（或超时），返回最新快照"""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            self._cond.wait_for(lambda: job['status'] in FINISHED, timeout)
+            return self._snapshot(job)
+
+    def events(self, job_id: str, timeout: float = 60.0) -> Iterator[Dict[str, Any]]:
+        """每次状态或进度变化产出一个快照，任务结束或超时后停止"""
+        deadline = time.time() + timeout
+        seen = -1
+        while True:
+            with self._cond:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    return
+                self._cond.wait_for(lambda: job['version'] != seen, max(0.0, deadline - time.time()))
+                if job['version'] == seen:
+                    return
+                seen = job['version']
+                snapshot = self._snapshot(job)
+            yield snapshot
+            if snapshot['status'] in FINISHED:
+                return
+
+    def list(self) -> List[Dict[str, Any]]:
+        """不含结果的任务摘要，按创建时间倒序"""
+        with self._cond:
+            self._sweep()
+            jobs = sorted(self._jobs.values(), key=lambda j: j['created_at'], reverse=True)
+            return [{k: v for k, v in self._snapshot(j).items() if k != 'result'} for j in jobs]
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            by_status: Dict[str, int] = {}
+            for j in self._jobs.values():
+                by_status[j['status']] = by_status.get(j['status'], 0) + 1
+            return dict(self.stats, workers=self.workers, max_queued=self.max_queued, result_ttl=self.result_ttl,
+                        jobs=by_status)
+
+    def shutdown(self):
+        """停止工作线程（正在执行的任务会执行完毕）"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+if __name__ == "__main__":
+    print("JobQueue 仅作为模块使用，不建议直接运行。")
@@ -1,41 +1,274 @@
-"""Thread-safe TTL memory cache with simple cleanup."""
-import time, threading
+"""Thread-safe LRU + TTL memory cache: O(1) get/set/evict, background expiry wheel, byte and namespace budgets,
+optional sharding and an optional shared (cross-process) backend behind it."""
+import time, threading, heapq, sys, weakref, logging
+from pathlib import Path
+from collections import OrderedDict
+NEVER = float('inf')
+def namespace_of(key):
+    """'complexity:/a.py' -> 'complexity'；无冒号的键（如 latest_context）自成一个命名空间"""
+    return key.split(':', 1)[0] if isinstance(key, str) else ''
+class _Janitor:
+    """所有缓存实例共用一个后台线程，按时间轮批量清理过期条目"""
+    interval = 1.0
+    _caches = weakref.WeakSet()
+    _thread = None
+    _lock = threading.Lock()
+    @classmethod
+    def register(cls, cache):
+        with cls._lock:
+            cls._caches.add(cache)
+            if cls._thread is None:
+                cls._thread = threading.Thread(target=cls._run, daemon=True, name='memory-cache-janitor')
+                cls._thread.start()
+    @classmethod
+    def _run(cls):
+        while True:
+            time.sleep(cls.interval)
+            for cache in list(cls._caches):
+                try: cache.sweep()
+                except Exception: pass
 class MemoryCache:
-    def __init__(self, max_items=2000, default_ttl=600):
+    # 时间轮粒度（秒）
+    RESOLUTION = 1.0
+    def __init__(self, max_items=2000, default_ttl=600, max_bytes=None, namespace_limits=None, sizeof=None, background_expiry=True,
+                 backend=None, l1_ttl=5.0, backend_namespaces=None):
         self._max = max_items
         self._ttl = default_ttl
-        self._store = {}
+        self._max_bytes = max_bytes
+        self._ns_limits = dict(namespace_limits or {})
+        self._sizeof = sizeof or sys.getsizeof
+        self._store = OrderedDict()   # key -> (expire, value, size)；顺序即 LRU 顺序
+        self._ns_order = {}           # 有配额的命名空间 -> OrderedDict(key -> None)
+        self._wheel = {}              # 时间轮桶 -> set(key)
+        self._buckets = []            # 桶编号小顶堆
+        self._bytes = 0
         self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'sets': 0, 'evictions': 0, 'expirations': 0, 'backend_hits': 0}
+        # 共享后端（L2）：set 写穿，L1 未命中时回源；L1 条目最多保留 l1_ttl 秒，以便看到其他进程的更新
+        self.backend = backend
+        self._l1_ttl = l1_ttl
+        # 只有这些命名空间写入后端（None 表示全部），避免扫描期间的大量 complexity: 写放大
+        self._backend_ns = set(backend_namespaces) if backend_namespaces else None
+        if background_expiry:
+            _Janitor.register(self)
+    def _shared(self, key):
+        return self.backend is not None and (self._backend_ns is None or namespace_of(key) in self._backend_ns)
+    def _expire_at(self, ttl):
+        ttl = self._ttl if ttl is None else ttl
+        return NEVER if ttl is None or ttl == NEVER else time.time() + ttl
+    def _remove(self, key):
+        """调用方持锁；时间轮中的残留键在清理时自动跳过"""
+        expire, value, size = self._store.pop(key)
+        self._bytes -= size
+        order = self._ns_order.get(namespace_of(key))
+        if order is not None: order.pop(key, None)
+    def _evict_lru(self, order=None):
+        key = next(iter(order if order is not None else self._store))
+        self._remove(key)
+        self.stats['evictions'] += 1
     def set(self, key, value, ttl=None):
-        expire = time.time() + (ttl if ttl is not None else self._ttl)
+        expire = self._expire_at(ttl)
+        if self._shared(key):
+            try:
+                self.backend.set(key, value, expire)
+            except Exception as e:
+                logging.getLogger(__name__).warning(f'cache backend set failed for {key}: {e}')
+        self._set_local(key, value, expire)
+    def _set_local(self, key, value, expire):
+        l1_expire = expire if not self._shared(key) or self._l1_ttl is None else min(expire, time.time() + self._l1_ttl)
+        self._put(key, value, l1_expire)
+    def _put(self, key, value, expire):
+        size = self._sizeof(value) if self._max_bytes else 0
+        ns = namespace_of(key)
         with self._lock:
-            if len(self._store) >= self._max:
-                # evict oldest
-                oldest = min(self._store.items(), key=lambda kv: kv[1][0])[0]
-                del self._store[oldest]
-            self._store[key] = (expire, value)
-        def clear_cache(self):
-            cache_dir = os.path.join(os.path.dirname(__file__), '__pycache__')
-            if os.path.exists(cache_dir):
-                shutil.rmtree(cache_dir)
-            # 可扩展更多缓存目录
+            if key in self._store:
+                self._remove(key)
+            self._store[key] = (expire, value, size)
+            self._bytes += size
+            self.stats['sets'] += 1
+            if ns in self._ns_limits:
+                order = self._ns_order.setdefault(ns, OrderedDict())
+                order[key] = None
+                while len(order) > self._ns_limits[ns]:
+                    self._evict_lru(order)
+            if expire != NEVER:
+                b = int(expire // self.RESOLUTION)
+                bucket = self._wheel.get(b)
+                if bucket is None:
+                    bucket = self._wheel[b] = set()
+                    heapq.heappush(self._buckets, b)
+                bucket.add(key)
+            while len(self._store) > self._max or (self._max_bytes and self._bytes > self._max_bytes and len(self._store) > 1):
+                self._evict_lru()
     def get(self, key, default=None):
-        with self._lock:
-            v = self._store.get(key)
-            if not v: return default
-            if v[0] < time.time():
-                del self._store[key]; return default
-            return v[1]
+        # 读路径不持锁：OrderedDict.get 在 GIL 下是原子操作；LRU 位置只在锁空闲时顺手更新，
+        # 锁被占用时跳过这次提升（近似 LRU），命中/未命中计数在高并发下也只是近似值
+        v = self._store.get(key)
+        if v is None:
+            return self._miss(key, default)
+        if v[0] < time.time():
+            with self._lock:
+                if self._store.get(key) is v: self._remove(key)
+                self.stats['expirations'] += 1
+            return self._miss(key, default)
+        if self._lock.acquire(blocking=False):
+            try:
+                if key in self._store:
+                    self._store.move_to_end(key)
+                    order = self._ns_order.get(namespace_of(key))
+                    if order is not None and key in order: order.move_to_end(key)
+            finally:
+                self._lock.release()
+        self.stats['hits'] += 1
+        return v[1]
+    def _miss(self, key, default):
+        if self._shared(key):
+            try:
+                found, value, expire = self.backend.get(key)
+            except Exception as e:
+                logging.getLogger(__name__).warning(f'cache backend get failed for {key}: {e}')
+                found = False
+            if found:
+                self._set_local(key, value, NEVER if expire is None else expire)
+                self.stats['backend_hits'] += 1
+                self.stats['hits'] += 1
+                return value
+        self.stats['misses'] += 1
+        return default
     def delete(self,key):
+        if self._shared(key):
+            try:
+                self.backend.delete(key)
+            except Exception as e:
+                logging.getLogger(__name__).warning(f'cache backend delete failed for {key}: {e}')
         with self._lock:
-            if key in self._store: del self._store[key]
+            if key in self._store: self._remove(key)
     def clear(self):
-        with self._lock: self._store.clear()
+        _clear_backend(self.backend)
+        self._clear_local()
+    def _clear_local(self):
+        with self._lock:
+            self._store.clear(); self._ns_order.clear(); self._wheel.clear(); self._buckets.clear()
+            self._bytes = 0
+    def sweep(self):
+        """处理已经完全过去的时间轮桶，耗时只与过期条目数成正比"""
+        now = time.time()
+        current = int(now // self.RESOLUTION)
+        removed = 0
+        with self._lock:
+            while self._buckets and self._buckets[0] < current:
+                b = heapq.heappop(self._buckets)
+                for key in self._wheel.pop(b, ()):
+                    v = self._store.get(key)
+                    # 键被重新设置过期时间或已删除时跳过
+                    if v is None or v[0] == NEVER or int(v[0] // self.RESOLUTION) != b: continue
+                    self._remove(key)
+                    removed += 1
+            self.stats['expirations'] += removed
+        return removed
     def cleanup(self):
+        """立即删除所有已过期条目（包括当前时间轮桶）"""
+        removed = self.sweep()
         now = time.time()
         with self._lock:
-            to_del = [k for k,(exp,_) in self._store.items() if exp < now]
-            for k in to_del: del self._store[k]
+            to_del = [k for k,(exp,_,_) in self._store.items() if exp < now]
+            for k in to_del: self._remove(k)
+            self.stats['expirations'] += len(to_del)
+        return removed + len(to_del)
+    def __len__(self):
+        return len(self._store)
+    def __bool__(self):
+        # 有 __len__ 时空缓存会被判为假，`if cache:` 之类的判断会跳过写入；缓存对象本身始终为真
+        return True
+    def info(self):
+        with self._lock:
+            info = dict(self.stats)
+            info.update({'items': len(self._store), 'bytes': self._bytes, 'max_items': self._max, 'max_bytes': self._max_bytes,
+                         'namespaces': {ns: len(o) for ns, o in self._ns_order.items()}})
+        lookups = info['hits'] + info['misses']
+        info['hit_rate'] = round(info['hits'] / lookups, 4) if lookups else None
+        return info
+
+class ShardedMemoryCache:
+    """按键哈希分成 N 个独立 MemoryCache 段，各段各自持锁，接口与 MemoryCache 相同。
+
+    容量（max_items / max_bytes）平均分摊到各段，因此淘汰是段内 LRU；
+    配置了 namespace_limits 的命名空间整体路由到同一段，上限对整个缓存生效而不是每段一份。
+    """
+    def __init__(self, shards=16, max_items=2000, default_ttl=600, max_bytes=None, namespace_limits=None, sizeof=None, background_expiry=True,
+                 backend=None, l1_ttl=5.0, backend_namespaces=None):
+        n = max(1, int(shards))
+        per = lambda v: None if v is None else max(1, -(-v // n))
+        self._limited = frozenset(namespace_limits or ())
+        self._shards = [MemoryCache(max_items=per(max_items), default_ttl=default_ttl, max_bytes=per(max_bytes),
+                                    namespace_limits=namespace_limits, sizeof=sizeof, background_expiry=background_expiry,
+                                    backend=backend, l1_ttl=l1_ttl, backend_namespaces=backend_namespaces) for _ in range(n)]
+        self._n = n
+        self.backend = backend
+    def _shard(self, key):
+        ns = namespace_of(key)
+        return self._shards[hash(ns if ns in self._limited else key) % self._n]
+    def set(self, key, value, ttl=None):
+        self._shard(key).set(key, value, ttl)
+    def get(self, key, default=None):
+        return self._shard(key).get(key, default)
+    def delete(self, key):
+        self._shard(key).delete(key)
+    def clear(self):
+        _clear_backend(self.backend)
+        for s in self._shards: s._clear_local()
+    def sweep(self):
+        return sum(s.sweep() for s in self._shards)
+    def cleanup(self):
+        return sum(s.cleanup() for s in self._shards)
+    def __len__(self):
+        return sum(len(s) for s in self._shards)
+    def __bool__(self):
+        return True
+    def info(self):
+        infos = [s.info() for s in self._shards]
+        info = {k: sum(i[k] for i in infos) for k in ('hits', 'misses', 'sets', 'evictions', 'expirations', 'backend_hits', 'items', 'bytes')}
+        info['shards'] = self._n
+        info['namespaces'] = {}
+        for i in infos:
+            for ns, c in i['namespaces'].items(): info['namespaces'][ns] = info['namespaces'].get(ns, 0) + c
+        lookups = info['hits'] + info['misses']
+        info['hit_rate'] = round(info['hits'] / lookups, 4) if lookups else None
+        return info
+
+def _clear_backend(backend):
+    """清空共享后端；后端不可用（文件被锁、损坏）时只记录警告，与 set/get 一致不向调用方抛出"""
+    if backend is None: return
+    try:
+        backend.clear()
+    except Exception as e:
+        logging.getLogger(__name__).warning(f'cache backend clear failed: {e}')
+
+def open_backend(settings=None):
+    """按 cache.backend 配置打开共享后端；未配置或打开失败返回 None（只用进程内缓存）"""
+    conf = (settings or {}).get('cache', {}) or {}
+    if conf.get('backend') != 'sqlite':
+        return None
+    path = Path(conf.get('backend_path') or 'reports/cache.sqlite')
+    if not path.is_absolute():
+        path = Path(__file__).resolve().parent.parent / path
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        from .cache_backend import SQLiteCacheBackend
+        return SQLiteCacheBackend(path)
+    except Exception as e:
+        logging.getLogger(__name__).warning(f'shared cache backend disabled: {e}')
+        return None
+
+def create_cache(settings=None, backend=None):
+    """按 settings.yaml 的 cache 配置创建缓存；shards 大于 1 时使用分段缓存，配置了 backend 时挂共享后端"""
+    conf = (settings or {}).get('cache', {}) or {}
+    kw = dict(max_items=conf.get('max_items', 2000), default_ttl=conf.get('default_ttl', 600),
+              max_bytes=conf.get('max_bytes'), namespace_limits=conf.get('namespace_limits'),
+              backend=backend if backend is not None else open_backend(settings), l1_ttl=conf.get('l1_ttl', 5.0),
+              backend_namespaces=conf.get('backend_namespaces'))
+    shards = int(conf.get('shards') or 1)
+    return ShardedMemoryCache(shards=shards, **kw) if shards > 1 else MemoryCache(**kw)
 
 if __name__ == "__main__":
     print("MemoryCache 仅作为模块使用，不建议直接运行。")
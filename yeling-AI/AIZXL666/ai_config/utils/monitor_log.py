@@ -0,0 +1,373 @@
+"""
+监控日志 - 请求线程只写入内存，后台线程批量追加到 JSON Lines 文件；按大小/时间轮转并压缩；查询通过稀疏偏移索引定位，不解析整个文件
+"""
+import os
+import re
+import json
+import gzip
+import time
+import atexit
+import bisect
+import logging
+import shutil
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+_TS_RE = re.compile(rb'"timestamp":\s*"([^"]*)"')
+
+def utc_timestamp(t: Optional[float] = None) -> str:
+    """与原日志一致的 ISO 8601 UTC 时间戳（字典序即时间序）"""
+    dt = datetime.fromtimestamp(time.time() if t is None else t, tz=timezone.utc).replace(tzinfo=None)
+    return dt.isoformat(timespec='microseconds') + 'Z'
+
+def normalize_time(value: Optional[str]) -> Optional[str]:
+    """接受 ISO 时间戳或 Unix 秒数，返回可与日志时间戳按字典序比较的字符串（统一到微秒精度）"""
+    if value in (None, ''):
+        return None
+    try:
+        return utc_timestamp(float(value))
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value.rstrip('Z'))
+    except ValueError:
+        raise ValueError(f'无法解析的时间: {value}')
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat(timespec='microseconds') + 'Z'
+
+class MonitorLog:
+    """有界内存环形缓冲 + 异步批量写入 + 轮转压缩 + 稀疏索引查询。
+
+    - append() 只在内存中操作；积累 batch_size 条或 flush_interval 秒后由后台线程一次写入；
+    - 文件超过 max_bytes 或存在超过 max_age 秒后轮转为 <文件名>.<时间>.gz，保留最近 backups 个（压缩在单独线程进行，不阻塞写入）；
+    - 每 index_every 行记录一次 (时间戳, 字节偏移)，索引只增量读取新追加的字节，多进程同时写入同一文件时同样有效；
+    - query() 按时间定位起始段，或从末尾向前读取，只解析涉及的段；查询只覆盖当前文件，不含已压缩归档，
+      也不等待写入线程（尚未落盘的事件可用 source='memory' 查询）。
+    """
+    def __init__(self, path: str, max_bytes: int = 10 * 1024 * 1024, max_age: float = 86400.0, backups: int = 5,
+                 ring_size: int = 1000, flush_interval: float = 1.0, batch_size: int = 256, index_every: int = 64):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, int(batch_size))
+        self.index_every = max(1, int(index_every))
+        self.recent = deque(maxlen=ring_size)
+        self.logger = logging.getLogger(__name__)
+        self._cond = threading.Condition()
+        self._pending: List[Dict[str, Any]] = []
+        self._appended = 0
+        self._written = 0
+        self._flush_requested = False
+        self._stopped = False
+        self._writer: Optional[threading.Thread] = None
+        self._index_lock = threading.Lock()
+        self._archive_lock = threading.Lock()
+        self._compressors: List[threading.Thread] = []
+        self._reset_index(None)
+        self._started = (None, 0.0)
+        self.stats = {'appended': 0, 'written': 0, 'batches': 0, 'rotations': 0, 'write_errors': 0}
+
+    @classmethod
+    def from_settings(cls, settings: Optional[Dict[str, Any]], base_dir: str) -> 'MonitorLog':
+        cfg = (settings or {}).get('monitor') or {}
+        path = cfg.get('path', 'reports/monitor_log.json')
+        if not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        keys = ('max_bytes', 'max_age', 'backups', 'ring_size', 'flush_interval', 'batch_size', 'index_every')
+        return cls(path, **{k: cfg[k] for k in keys if cfg.get(k) is not None})
+
+    # ---- 写入 ----
+    def append(self, event: str, detail: Any = None) -> Dict[str, Any]:
+        entry = {'event': event, 'detail': detail, 'timestamp': utc_timestamp()}
+        with self._cond:
+            self.recent.append(entry)
+            self._pending.append(entry)
+            self._appended += 1
+            self.stats['appended'] += 1
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, daemon=True, name='monitor-log-writer')
+                self._writer.start()
+                atexit.register(self.close)
+            if len(self._pending) >= self.batch_size:
+                self._cond.notify_all()
+        return entry
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待当前已记录的事件全部写入文件"""
+        with self._cond:
+            target = self._appended
+            if self._written >= target or self._writer is None:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target, timeout)
+
+    def close(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._writer is not None and self._writer is not threading.current_thread():
+            self._writer.join(timeout=5)
+        self.wait_archived()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                deadline = time.monotonic() + self.flush_interval
+                while len(self._pending) < self.batch_size and not self._stopped and not self._flush_requested:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending, []
+                self._flush_requested = False
+                stopped = self._stopped
+            if batch:
+                self._write_batch(batch)
+            with self._cond:
+                self._written += len(batch)
+                self._cond.notify_all()
+                if stopped and not self._pending:
+                    return
+
+    def _write_batch(self, batch):
+        data = ''.join(json.dumps(e, ensure_ascii=False) + '\n' for e in batch).encode('utf-8')
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._maybe_rotate(len(data))
+            with open(self.path, 'ab') as f:
+                f.write(data)
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+        except Exception as e:
+            self.stats['write_errors'] += 1
+            self.logger.error(f'监控日志写入失败: {e}')
+
+    # ---- 轮转 ----
+    def _maybe_rotate(self, incoming: int):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        if st.st_size == 0:
+            return
+        too_big = self.max_bytes and st.st_size + incoming > self.max_bytes
+        too_old = self.max_age and time.time() - self._file_started(st) > self.max_age
+        if too_big or too_old:
+            self.rotate(background=True)
+
+    def _file_started(self, st) -> float:
+        """当前文件第一条事件的时间（读不到时退回文件的 ctime），按 inode 缓存"""
+        if self._started[0] == st.st_ino:
+            return self._started[1]
+        try:
+            with open(self.path, 'rb') as f:
+                m = _TS_RE.search(f.readline())
+            started = datetime.fromisoformat(m.group(1).decode().rstrip('Z')).replace(tzinfo=timezone.utc).timestamp()
+        except Exception:
+            started = st.st_ctime
+        self._started = (st.st_ino, started)
+        return started
+
+    def rotate(self, background: bool = False) -> Optional[str]:
+        """把当前文件改名后压缩为归档并清理过多的旧归档，返回归档路径。
+
+        background=True 时只做改名（写入线程调用），压缩与清理交给单独的线程；wait_archived() 等待其完成。
+        """
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+        rotated = f'{self.path}.{stamp}'
+        try:
+            os.replace(self.path, rotated)
+        except FileNotFoundError:
+            return None
+        self.stats['rotations'] += 1
+        if not background:
+            return self._compress(rotated)
+        t = threading.Thread(target=self._compress, args=(rotated,), daemon=True, name='monitor-log-gzip')
+        with self._archive_lock:
+            self._compressors = [c for c in self._compressors if c.is_alive()] + [t]
+        t.start()
+        return rotated + '.gz'
+
+    def _compress(self, rotated: str) -> Optional[str]:
+        archive = rotated + '.gz'
+        try:
+            with open(rotated, 'rb') as src, gzip.open(archive + '.tmp', 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(archive + '.tmp', archive)
+            os.remove(rotated)
+        except Exception as e:
+            self.logger.error(f'监控日志归档失败: {e}')
+            return None
+        with self._archive_lock:
+            for old in self.archives()[self.backups:]:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        return archive
+
+    def wait_archived(self, timeout: float = 5.0) -> bool:
+        """等待后台压缩全部完成"""
+        with self._archive_lock:
+            pending = list(self._compressors)
+        deadline = time.monotonic() + timeout
+        for t in pending:
+            t.join(max(0.0, deadline - time.monotonic()))
+        return not any(t.is_alive() for t in pending)
+
+    def archives(self) -> List[str]:
+        """已压缩的归档，新的在前"""
+        directory, name = os.path.split(self.path)
+        try:
+            files = [f for f in os.listdir(directory or '.') if f.startswith(name + '.') and f.endswith('.gz')]
+        except FileNotFoundError:
+            return []
+        return [os.path.join(directory, f) for f in sorted(files, reverse=True)]
+
+    # ---- 稀疏索引 ----
+    def _reset_index(self, inode):
+        self._inode = inode
+        self._offsets: List[int] = []
+        self._stamps: List[str] = []
+        self._indexed_end = 0
+        self._indexed_lines = 0
+
+    def _catch_up(self, f):
+        """只读取上次索引之后追加的完整行；f 为已打开的当前文件，索引总是对应 f 的 inode（被轮转或截断时重建）；
+        调用方持有 _index_lock"""
+        st = os.fstat(f.fileno())
+        if st.st_ino != self._inode or st.st_size < self._indexed_end:
+            self._reset_index(st.st_ino)
+        if st.st_size == self._indexed_end:
+            return
+        f.seek(self._indexed_end)
+        data = f.read(st.st_size - self._indexed_end)
+        data = data[:data.rfind(b'\n') + 1]
+        pos = self._indexed_end
+        for line in data.splitlines(keepends=True):
+            if self._indexed_lines % self.index_every == 0:
+                m = _TS_RE.search(line)
+                self._offsets.append(pos)
+                self._stamps.append(m.group(1).decode() if m else (self._stamps[-1] if self._stamps else ''))
+            self._indexed_lines += 1
+            pos += len(line)
+        self._indexed_end = pos
+
+    def _read_segment(self, f, start: int, end: int):
+        """读取 [start, end) 的行，返回 [(偏移, 条目)]"""
+        f.seek(start)
+        out, pos = [], start
+        for line in f.read(end - start).splitlines(keepends=True):
+            try:
+                out.append((pos, json.loads(line)))
+            except ValueError:
+                pass
+            pos += len(line)
+        return out
+
+    # ---- 查询 ----
+    @staticmethod
+    def _matches(entry, since, until, path, event) -> bool:
+        ts = entry.get('timestamp') or ''
+        if since and ts < since or until and ts > until:
+            return False
+        if event and entry.get('event') != event:
+            return False
+        if path:
+            detail = entry.get('detail')
+            entry_path = detail.get('path') if isinstance(detail, dict) else None
+            if not entry_path or not (entry_path == path or path.endswith('*') and entry_path.startswith(path[:-1])):
+                return False
+        return True
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None, path: Optional[str] = None,
+              event: Optional[str] = None, limit: int = 100, after: Optional[int] = None,
+              before: Optional[int] = None, source: str = 'file') -> Dict[str, Any]:
+        """按时间范围、路径（支持结尾 * 前缀匹配）和事件过滤。
+
+        - 指定 since 或 after（上一页的 next_cursor）时从前向后读取，返回 next_cursor；
+        - 否则从文件末尾（或 before 之前）向前读取最近的 limit 条，返回 prev_cursor 用于继续向前翻页；
+        - source='memory' 只查询内存中最近的 ring_size 条（含尚未写入文件的事件）。
+        """
+        since, until = normalize_time(since), normalize_time(until)
+        limit = max(1, int(limit))
+        if source == 'memory':
+            with self._cond:
+                entries = [e for e in self.recent if self._matches(e, since, until, path, event)]
+            return {'entries': entries[:limit] if since else entries[-limit:], 'next_cursor': None, 'prev_cursor': None}
+        # 只提醒写入线程尽快落盘，不在请求线程上等待（写入可能包含轮转）
+        self.flush(timeout=0)
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return {'entries': [], 'next_cursor': None, 'prev_cursor': None}
+        with f:
+            # 先打开文件再按其 inode 更新索引：期间发生轮转时偏移仍对应这个已打开的文件
+            with self._index_lock:
+                self._catch_up(f)
+                offsets, stamps, end = list(self._offsets), list(self._stamps), self._indexed_end
+            if not offsets:
+                return {'entries': [], 'next_cursor': None, 'prev_cursor': None}
+            bounds = offsets + [end]
+            if since is not None or after is not None:
+                return self._scan_forward(f, bounds, stamps, since, until, path, event, limit, after)
+            return self._scan_backward(f, bounds, stamps, since, until, path, event, limit, before)
+
+    def _scan_forward(self, f, bounds, stamps, since, until, path, event, limit, after):
+        if after is not None:
+            seg = max(0, bisect.bisect_right(bounds, after) - 1)
+            start = max(after, bounds[0])
+        else:
+            # 多个进程批量写入时时间戳只是近似有序，多退一段保证不漏
+            seg = max(0, bisect.bisect_left(stamps, since) - 2)
+            start = bounds[seg]
+        entries, next_cursor = [], None
+        while seg < len(stamps) and start < bounds[-1]:
+            if until and stamps[seg] > until:
+                break
+            for pos, entry in self._read_segment(f, start, bounds[seg + 1]):
+                if self._matches(entry, since, until, path, event):
+                    if len(entries) == limit:
+                        next_cursor = pos
+                        break
+                    entries.append(entry)
+            if next_cursor is not None:
+                break
+            seg += 1
+            start = bounds[seg]
+        return {'entries': entries, 'next_cursor': next_cursor, 'prev_cursor': None}
+
+    def _scan_backward(self, f, bounds, stamps, since, until, path, event, limit, before):
+        end = bounds[-1] if before is None else min(before, bounds[-1])
+        seg = bisect.bisect_left(bounds, end) - 1
+        collected: List[tuple] = []
+        while seg >= 0 and len(collected) < limit:
+            # 时间戳近似有序：前一段也晚于 until 时才整段跳过
+            if not (until and stamps[seg] > until and seg > 0 and stamps[seg - 1] > until):
+                matches = [(pos, e) for pos, e in self._read_segment(f, bounds[seg], min(bounds[seg + 1], end))
+                           if self._matches(e, since, until, path, event)]
+                collected = matches + collected
+            seg -= 1
+        more = seg >= 0 or len(collected) > limit
+        collected = collected[-limit:]
+        prev_cursor = collected[0][0] if collected and more else None
+        return {'entries': [e for _, e in collected], 'next_cursor': None, 'prev_cursor': prev_cursor}
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._cond:
+            pending = len(self._pending)
+        with self._index_lock:
+            indexed = {'lines': self._indexed_lines, 'bytes': self._indexed_end, 'checkpoints': len(self._offsets)}
+        return dict(self.stats, pending=pending, recent=len(self.recent), index=indexed,
+                    archives=[os.path.basename(a) for a in self.archives()])
+
+if __name__ == "__main__":
+    print("MonitorLog 仅作为模块使用，不建议直接运行。")
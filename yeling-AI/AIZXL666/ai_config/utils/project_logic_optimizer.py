@@ -9,6 +9,8 @@ from typing import Dict, List, Set, Tuple, Any
 from .code_duplication_detector import CodeDuplicationDetector
 from .functional_independence_validator import FunctionalIndependenceValidator
 from .global_coordination_tester import GlobalCoordinationTester
+from .ast_cache import parse_file
+from .ignore_rules import walk
 
 class ProjectLogicOptimizer:
     def __init__(self, workspace_dir: str):
@@ -140,10 +142,7 @@ class ProjectLogicOptimizer:
         issues = []
         
         try:
-            with open(script_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            tree = ast.parse(content)
+            tree = parse_file(script_path)
             
             # 检测可能的顺序问题
             import_after_execution = False
@@ -254,7 +253,7 @@ class ProjectLogicOptimizer:
             
             file_writers = {}
             
-            for root, dirs, files in os.walk(ai_package_path):
+            for root, dirs, files in walk(ai_package_path):
                 for file in files:
                     if file.endswith('.py'):
                         file_path = os.path.join(root, file)
@@ -286,10 +285,7 @@ class ProjectLogicOptimizer:
         writers = []
         
         try:
-            with open(script_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            tree = ast.parse(content)
+            tree = parse_file(script_path)
             
             for node in ast.walk(tree):
                 if isinstance(node, ast.Call):
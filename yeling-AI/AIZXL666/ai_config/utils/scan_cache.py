@@ -0,0 +1,58 @@
+"""Persistent per-file scan result cache (SQLite), validated by stat and content hash."""
+import json, sqlite3, threading, time
+class ScanCache:
+    """按 (插件, 路径) 保存单文件扫描结果。
+
+    命中规则：(mtime, size, inode) 与记录一致直接命中；不一致时比较内容哈希，
+    哈希相同也算命中（如 touch 或 git checkout 后内容未变），并刷新 stat。
+    """
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS scan_cache ('
+                           'plugin TEXT NOT NULL, path TEXT NOT NULL, mtime REAL, size INTEGER, ino INTEGER, '
+                           'digest TEXT, result TEXT, updated REAL, PRIMARY KEY (plugin, path))')
+        self._pending = []
+        self.hits = 0
+        self.misses = 0
+    def lookup(self, plugin, rec):
+        """返回 (是否命中, 结果)；rec 需提供 path/mtime/size/ino/digest"""
+        with self._lock:
+            row = self._conn.execute('SELECT mtime, size, ino, digest, result FROM scan_cache WHERE plugin=? AND path=?',
+                                     (plugin, rec.path)).fetchone()
+        hit = row is not None
+        if hit and tuple(row[:3]) != (rec.mtime, rec.size, rec.ino):
+            hit = row[3] is not None and row[3] == rec.digest
+            if hit:
+                # 内容未变，只刷新 stat
+                self._pending.append((plugin, rec.path, rec.mtime, rec.size, rec.ino, row[3], row[4], time.time()))
+        with self._lock:
+            if hit: self.hits += 1
+            else: self.misses += 1
+        return (True, json.loads(row[4])) if hit else (False, None)
+    def store(self, plugin, rec, result):
+        self._pending.append((plugin, rec.path, rec.mtime, rec.size, rec.ino, rec.digest,
+                              json.dumps(result, ensure_ascii=False), time.time()))
+    def commit(self):
+        """批量写入本轮新增/刷新的记录"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if pending:
+                self._conn.executemany('INSERT OR REPLACE INTO scan_cache VALUES (?,?,?,?,?,?,?,?)', pending)
+                self._conn.commit()
+        return len(pending)
+    def clear(self, plugin=None):
+        with self._lock:
+            if plugin: self._conn.execute('DELETE FROM scan_cache WHERE plugin=?', (plugin,))
+            else: self._conn.execute('DELETE FROM scan_cache')
+            self._conn.commit()
+    def close(self):
+        self.commit()
+        with self._lock:
+            self._conn.close()
+
+if __name__ == "__main__":
+    print("ScanCache 仅作为模块使用，不建议直接运行。")
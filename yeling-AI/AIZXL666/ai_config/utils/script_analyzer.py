@@ -5,6 +5,8 @@ import os
 import ast
 import logging
 from typing import Dict, List, Set, Tuple
+from .ast_cache import parse_source
+from .ignore_rules import walk
 
 class ScriptAnalyzer:
     def __init__(self, workspace_dir: str):
@@ -53,7 +55,7 @@ class ScriptAnalyzer:
         }
         
         try:
-            tree = ast.parse(content)
+            tree = parse_source(file_path, content)
             
             for node in ast.walk(tree):
                 # 分析导入语句
@@ -113,7 +115,7 @@ class ScriptAnalyzer:
         """扫描工作区所有脚本并分析影响"""
         results = []
         
-        for root, dirs, files in os.walk(self.workspace_dir):
+        for root, dirs, files in walk(self.workspace_dir):
             for file in files:
                 if file.endswith(('.py', '.js', '.ts')):
                     file_path = os.path.join(root, file)
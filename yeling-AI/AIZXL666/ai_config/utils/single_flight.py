@@ -0,0 +1,123 @@
+"""
+请求合并（single-flight）- 相同 key 的并发调用只执行一次，其余调用等待并共享结果；按接口统计合并次数
+"""
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# 不影响计算结果的查询参数，不参与 key
+IGNORED_PARAMS = frozenset({'async', 'priority', 'wait', 'timeout', '_'})
+
+def make_key(endpoint: str, params: Iterable[Tuple[str, str]] = (), fingerprint: Optional[str] = None) -> str:
+    """接口 + 规范化参数（排序、去掉无关参数）+ 工作区指纹"""
+    normalized = '&'.join(f'{k}={v}' for k, v in sorted(params) if k not in IGNORED_PARAMS)
+    return f'{endpoint}?{normalized}#{fingerprint or ""}'
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+class SingleFlight:
+    """do(key, fn)：同一 key 正在执行时，后来的调用等待其结束并拿到同一结果（或同一异常）。
+
+    只合并执行期间的并发调用，结束后的调用会重新执行；结果由多个请求共享，调用方不应修改。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def do(self, key: str, fn: Callable[[], Any], group: Optional[str] = None) -> Tuple[Any, bool]:
+        """返回 (结果, 是否为共享结果)；group 为统计分组（通常是接口路径），默认使用 key"""
+        with self._lock:
+            stats = self._stats.setdefault(group or key, {'calls': 0, 'executions': 0, 'coalesced': 0, 'errors': 0,
+                                                          'max_waiters': 0})
+            stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                stats['executions'] += 1
+            else:
+                call.waiters += 1
+                stats['coalesced'] += 1
+                stats['max_waiters'] = max(stats['max_waiters'], call.waiters)
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                stats['errors'] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'inflight': len(self._calls), 'groups': {g: dict(s) for g, s in self._stats.items()}}
+
+class RecentValue:
+    """ttl 秒内直接复用上次的值；过期后的并发调用经 SingleFlight 只计算一次（用于工作区指纹等较贵的键）
+
+    background=True 时 get() 从不在调用线程计算：过期后返回旧值并在后台线程刷新，尚未算出时返回 None。
+    """
+    def __init__(self, func: Callable[[], Any], ttl: float = 2.0, background: bool = False):
+        self.func = func
+        self.ttl = ttl
+        self.background = background
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._value = None
+        self._at = float('-inf')
+
+    def get(self) -> Any:
+        if time.monotonic() - self._at < self.ttl:
+            return self._value
+        if self.background:
+            self.refresh_async()
+            return self._value
+        value, _ = self._flight.do('value', self._compute)
+        return value
+
+    def refresh_async(self) -> bool:
+        """在后台线程刷新一次；已有刷新在进行时返回 False"""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._refresh, daemon=True, name='recent-value').start()
+        return True
+
+    def _refresh(self):
+        try:
+            self._flight.do('value', self._compute)
+        except Exception as e:
+            # 失败时保留旧值，ttl 后再试，避免每个请求都触发一次刷新
+            logging.getLogger(__name__).warning(f'background refresh failed: {e}')
+            self._at = time.monotonic()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _compute(self):
+        self._value = self.func()
+        self._at = time.monotonic()
+        return self._value
+
+if __name__ == "__main__":
+    print("SingleFlight 仅作为模块使用，不建议直接运行。")
@@ -0,0 +1,85 @@
+"""
+启动任务调度 - 服务导入时只登记启动任务，开始服务后在后台线程依次执行，状态供 /status 与 /ready 查询
+"""
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+class StartupJobs:
+    """按登记顺序在一个后台线程中执行启动任务（模型发现、依赖检查、工作区扫描、部署检查等）。
+
+    - start() 幂等，可以在 __main__、WSGI 入口或首个请求中调用；background=False 时在当前线程同步执行；
+    - 单个任务失败只记录错误，不影响后续任务；
+    - 所有任务结束后为 warm，有失败任务时为 degraded；服务在此之前就已可以处理请求（serving）。
+    """
+    def __init__(self):
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._funcs: Dict[str, Callable[[], Any]] = {}
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.logger = logging.getLogger(__name__)
+
+    def add(self, name: str, func: Callable[[], Any], description: str = ''):
+        """登记任务；func 的返回值（应可 JSON 序列化）作为任务详情展示"""
+        with self._lock:
+            self._funcs[name] = func
+            self._jobs[name] = {'name': name, 'description': description, 'status': 'pending', 'started_at': None,
+                                'finished_at': None, 'seconds': None, 'error': None, 'detail': None}
+
+    def start(self, background: bool = True) -> bool:
+        """开始执行所有任务；已开始过则直接返回 False"""
+        with self._lock:
+            if self.started_at is not None:
+                return False
+            self.started_at = time.time()
+            if background:
+                self._thread = threading.Thread(target=self._run_all, daemon=True, name='startup-jobs')
+                self._thread.start()
+                return True
+        self._run_all()
+        return True
+
+    def _run_all(self):
+        for name in list(self._jobs):
+            job = self._jobs[name]
+            job.update(status='running', started_at=time.time())
+            t0 = time.perf_counter()
+            try:
+                detail = self._funcs[name]()
+                job.update(status='done', detail=detail)
+            except Exception as e:
+                self.logger.error('startup job %s failed: %s', name, e)
+                job.update(status='failed', error=str(e))
+            job.update(finished_at=time.time(), seconds=round(time.perf_counter() - t0, 3))
+        self.finished_at = time.time()
+        self._done.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    @property
+    def state(self) -> str:
+        if self.started_at is None:
+            return 'pending'
+        if not self._done.is_set():
+            return 'warming'
+        return 'degraded' if any(j['status'] == 'failed' for j in self._jobs.values()) else 'warm'
+
+    @property
+    def warm(self) -> bool:
+        return self._done.is_set()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values()]
+        return {'state': self.state, 'serving': True, 'warm': self.warm, 'created_at': self.created_at,
+                'started_at': self.started_at, 'finished_at': self.finished_at, 'jobs': jobs}
+
+if __name__ == "__main__":
+    print("StartupJobs 仅作为模块使用，不建议直接运行。")
@@ -4,6 +4,12 @@ import os
 import json
 from pathlib import Path
 from flask import Flask, jsonify, request
+try:
+    from .ignore_rules import walk, iter_files
+    from .graph_algorithms import CSRGraph, strongly_connected_components, cycles, longest_path, high_degree_nodes
+except ImportError:
+    from ignore_rules import walk, iter_files
+    from graph_algorithms import CSRGraph, strongly_connected_components, cycles, longest_path, high_degree_nodes
 
 app = Flask(__name__)
 
@@ -16,6 +22,21 @@ def _uniq(seq):
     return out
 
 class StructureVisualizer:
+    # 入度 + 出度达到该值的节点视为耦合点；列表最多保留 COUPLING_LIMIT 个
+    COUPLING_THRESHOLD = 3
+    COUPLING_LIMIT = 50
+    def __init__(self, workspace=None):
+        self.workspace = workspace
+
+    def get_project_structure(self, view='dependency'):
+        """扫描工作区导入关系并生成结构数据（含最长链、循环、耦合点分析）"""
+        from scanner.dependency_scanner import DependencyScanner
+        workspace = self.workspace or os.getcwd()
+        deps = DependencyScanner().run([workspace], None, {})
+        result = self.to_json({'dependency_parser': deps}, view=view)
+        result['workspace'] = workspace
+        return result
+
     def to_json(self, scan_results, view='default', template='default'):
         nodes = []; edges = []
         for scanner, r in scan_results.items():
@@ -36,7 +57,7 @@ class StructureVisualizer:
 
         # 联动模型元数据
         try:
-            from ai_config.ai.model_loader import ModelLoader
+            from ai.model_loader import ModelLoader
             loader = ModelLoader()
             models_result = loader.find_all_models()
             if models_result.get('success'):
@@ -84,41 +105,47 @@ class StructureVisualizer:
         return [n for n in nodes if n.get('role')]
 
     def analyze_structure(self, result):
-        # 自动识别关键路径、耦合点、风险点，并联动AI建议模块
-        analysis = {'key_paths': [], 'coupling_points': [], 'risk_points': [], 'suggestions': []}
-        # 关键路径：最长依赖链
+        # 自动识别关键路径、耦合点、风险点，并联动AI建议模块（图算法均为线性时间）
+        analysis = {'key_paths': [], 'coupling_points': [], 'cycles': [], 'risk_points': [], 'suggestions': []}
+        edges = result.get('edges', [])
+        graph = CSRGraph.from_pairs((e.get('src'), e.get('tgt')) for e in edges)
+        # 关键路径：最长依赖链（依赖边即全部边时复用同一张图和同一次 SCC 结果）
         dep_graph = result.get('dependency_graph', [])
         if dep_graph:
-            analysis['key_paths'] = self._find_longest_chain(dep_graph)
+            dep = graph if len(dep_graph) == len(edges) else CSRGraph.from_pairs((e.get('src'), e.get('tgt')) for e in dep_graph)
+            comps = strongly_connected_components(dep)
+            analysis['key_paths'] = self._find_longest_chain(dep_graph, dep, comps)
         # 耦合点：节点度数大于阈值
-        node_degree = {}
-        for e in result.get('edges', []):
-            src, tgt = e.get('src'), e.get('tgt')
-            node_degree[src] = node_degree.get(src, 0) + 1
-            node_degree[tgt] = node_degree.get(tgt, 0) + 1
-        analysis['coupling_points'] = [n for n, d in node_degree.items() if d >= 3]
-        # 风险点：依赖链中断或循环
-        analysis['risk_points'] = [e for e in dep_graph if e.get('risk')]
+        degree = high_degree_nodes(graph, self.COUPLING_THRESHOLD, self.COUPLING_LIMIT)
+        analysis['coupling_points'] = [graph.labels[v] for v, _, _ in degree]
+        analysis['coupling_degrees'] = {graph.labels[v]: {'in': i, 'out': o} for v, i, o in degree}
+        # 风险点：依赖链中断或循环（每个强连通分量只报告一次）
+        if dep_graph:
+            analysis['cycles'] = [[dep.labels[v] for v in c] for c in cycles(dep, comps)]
+        analysis['risk_points'] = [e for e in dep_graph if e.get('risk')] + [{'cycle': c, 'risk': 'cycle'} for c in analysis['cycles']]
         # 联动AI建议模块
         if analysis['coupling_points']:
             analysis['suggestions'].append('建议优化高耦合模块，降低依赖复杂度。')
+        if analysis['cycles']:
+            analysis['suggestions'].append(f"检测到 {len(analysis['cycles'])} 组循环导入，建议拆分公共部分或改为延迟导入。")
         if analysis['risk_points']:
             analysis['suggestions'].append('建议修复依赖链风险，避免循环或断链。')
         if not analysis['key_paths']:
             analysis['suggestions'].append('建议补充关键路径，提升系统连通性。')
         return analysis
 
-    def _find_longest_chain(self, edges):
-        # 返回所有长度大于2的依赖链
-        chains = []
-        for e in edges:
-            if e.get('length', 0) > 2:
-                chains.append(e)
+    def _find_longest_chain(self, edges, graph=None, comps=None):
+        # 返回最长依赖链（长度大于2时），以及边上自带的长链信息
+        chains = [e for e in edges if e.get('length', 0) > 2]
+        graph = graph or CSRGraph.from_pairs((e.get('src'), e.get('tgt')) for e in edges)
+        path = longest_path(graph, comps)
+        if len(path) > 2:
+            chains.insert(0, {'path': [graph.labels[v] for v in path], 'length': len(path)})
         return chains
 
 def scan_project_structure(root_dir):
     structure = {}
-    for dirpath, dirnames, filenames in os.walk(root_dir):
+    for dirpath, dirnames, filenames in walk(root_dir):
         rel_path = os.path.relpath(dirpath, root_dir)
         structure[rel_path] = {
             'dirs': dirnames,
@@ -128,7 +155,7 @@ def scan_project_structure(root_dir):
 
 def get_module_dependencies(module_dir):
     deps = {}
-    for pyfile in Path(module_dir).rglob('*.py'):
+    for pyfile in iter_files(module_dir, '.py'):
         with open(pyfile, 'r', encoding='utf-8') as f:
             lines = f.readlines()
         imports = [l.strip() for l in lines if l.strip().startswith('import') or l.strip().startswith('from')]
@@ -0,0 +1,202 @@
+"""
+全局优化建议引擎 - 后台计算并缓存全局建议，按工作区指纹失效
+"""
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_SUGGESTION = '项目结构与逻辑良好，无需优化。建议持续关注安全与协作。'
+
+def collect_global_suggestions(workspace_dir: str) -> List[str]:
+    """同步运行四个分析器并汇总建议（耗时与工作区大小成正比）"""
+    from utils.project_logic_optimizer import ProjectLogicOptimizer
+    from utils.global_coordination_tester import GlobalCoordinationTester
+    from utils.system_logic_validator import SystemLogicValidator
+    from utils.structure_visualizer import StructureVisualizer
+    optimizer = ProjectLogicOptimizer(workspace_dir)
+    coordination = GlobalCoordinationTester(workspace_dir)
+    validator = SystemLogicValidator(workspace_dir)
+    visualizer = StructureVisualizer(workspace_dir)
+    # 1. 项目逻辑优化建议（架构、逻辑、依赖、队列化）
+    logic_report = optimizer.generate_optimization_report()
+    # 2. 协调性建议（协作、交互、分工）
+    coord_report = coordination.generate_coordination_report()
+    # 3. 系统自愈与安全建议（自愈、安全、兼容性）
+    sys_report = validator.validate_system_logic()
+    # 4. 结构分析建议（结构、关键路径、耦合点）
+    struct_data = visualizer.get_project_structure()
+    struct_analysis = struct_data.get('analysis', {})
+    suggestions = []
+    suggestions.extend(logic_report.get('recommendations', []))
+    suggestions.extend(coord_report.get('recommendations', []))
+    suggestions.extend(sys_report.get('recommendations', []))
+    suggestions.extend(struct_analysis.get('suggestions', []))
+    # 保证每次执行后至少有一条建议
+    if not suggestions:
+        suggestions.append(DEFAULT_SUGGESTION)
+    return suggestions
+
+def workspace_fingerprint(workspace_dir: str) -> str:
+    """只做 stat 的轻量遍历：路径 + mtime_ns + size 的摘要（忽略规则排除的目录不参与）"""
+    from .ignore_rules import load_ignore_rules
+    rules = load_ignore_rules(workspace_dir)
+    h = hashlib.sha1()
+    stack = [workspace_dir]
+    while stack:
+        d = stack.pop()
+        try:
+            with os.scandir(d) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        for e in entries:
+            try:
+                if e.is_dir(follow_symlinks=False):
+                    if not rules.ignored(e.path, True): stack.append(e.path)
+                    continue
+                if rules.ignored(e.path, False): continue
+                st = e.stat()
+            except OSError:
+                continue
+            h.update(f'{e.path}\0{st.st_mtime_ns}\0{st.st_size}\n'.encode('utf-8', 'surrogateescape'))
+    return h.hexdigest()
+
+class SuggestionEngine:
+    """请求线程只读缓存（O(1)），指纹检查与重新计算都在后台线程完成。
+
+    latest() 返回最近一次报告及 stale/generated_at 标记，并在后台触发一次指纹检查；
+    指纹未变则直接标记为最新，变化时才重新运行全部分析器。
+    计算失败时记录失败的指纹，同一指纹按 error_backoff 起指数退避（上限 max_error_backoff）后才重试。
+    """
+    def __init__(self, workspace_dir: str, compute: Optional[Callable[[str], List[str]]] = None,
+                 min_check_interval: float = 2.0, error_backoff: float = 30.0, max_error_backoff: float = 600.0):
+        self.workspace_dir = workspace_dir
+        self.compute = compute or collect_global_suggestions
+        self.min_check_interval = min_check_interval
+        self.error_backoff = error_backoff
+        self.max_error_backoff = max_error_backoff
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._report = None          # {'suggestions', 'generated_at', 'fingerprint', 'duration'}
+        self._stale = True
+        self._running = False
+        self._idle = threading.Event()   # 没有刷新在执行时置位，供同步 refresh 等待
+        self._idle.set()
+        self._rerun = False
+        self._last_check = 0.0
+        self._last_error = None
+        self._failure = None         # {'fingerprint', 'count', 'retry_at'}：最近一次失败的指纹与下次重试时间
+        self._poller = None
+
+    def latest(self) -> Dict:
+        with self._lock:
+            report = self._report
+            stale = self._stale
+            refreshing = self._running
+            error = self._last_error
+        self.refresh_async()
+        suggestions = report['suggestions'] if report else []
+        return {
+            'suggestions': suggestions,
+            'suggestion': suggestions[-1] if suggestions else '全局建议生成中，请稍后刷新',
+            'generated_at': report['generated_at'] if report else None,
+            'fingerprint': report['fingerprint'] if report else None,
+            'stale': stale,
+            'refreshing': refreshing,
+            'error': error
+        }
+
+    def invalidate(self):
+        """显式失效（例如规则更新后），下一次后台检查强制重新计算"""
+        with self._lock:
+            self._stale = True
+            if self._report: self._report['fingerprint'] = None
+            self._last_check = 0.0
+        self.refresh_async(force=True)
+
+    def refresh_async(self, force: bool = False) -> bool:
+        with self._lock:
+            if self._running:
+                if force: self._rerun = True
+                return False
+            if not force and time.time() - self._last_check < self.min_check_interval:
+                return False
+            self._running = True
+            self._idle.clear()
+            self._last_check = time.time()
+        threading.Thread(target=self._refresh, args=(force,), daemon=True, name='suggestion-engine').start()
+        return True
+
+    def refresh(self, force: bool = False) -> Dict:
+        """同步刷新（启动预热或测试用）"""
+        with self._lock:
+            busy = self._running
+            if busy: self._rerun = self._rerun or force
+            else:
+                self._running = True
+                self._idle.clear()
+        if busy:
+            self._idle.wait()
+        else:
+            self._refresh(force)
+        return self.latest()
+
+    def _refresh(self, force: bool):
+        try:
+            while True:
+                fp = workspace_fingerprint(self.workspace_dir)
+                with self._lock:
+                    unchanged = self._report is not None and self._report['fingerprint'] == fp
+                    failed = self._failure
+                    backing_off = failed is not None and failed['fingerprint'] == fp and time.time() < failed['retry_at']
+                    if (unchanged or backing_off) and not force:
+                        if self._rerun:
+                            # 检查期间有强制刷新请求，不能就此丢弃
+                            self._rerun = False
+                            force = True
+                            continue
+                        if unchanged: self._stale = False
+                        return
+                    self._stale = True
+                t0 = time.time()
+                try:
+                    suggestions = self.compute(self.workspace_dir)
+                    error = None
+                except Exception as e:
+                    self.logger.error(f"全局建议生成失败: {e}")
+                    suggestions, error = None, str(e)
+                with self._lock:
+                    self._last_error = error
+                    if suggestions is not None:
+                        self._report = {'suggestions': suggestions, 'generated_at': time.time(),
+                                        'fingerprint': fp, 'duration': time.time() - t0}
+                        self._stale = False
+                        self._failure = None
+                    else:
+                        count = failed['count'] + 1 if failed and failed['fingerprint'] == fp else 1
+                        delay = min(self.max_error_backoff, self.error_backoff * 2 ** (count - 1))
+                        self._failure = {'fingerprint': fp, 'count': count, 'retry_at': time.time() + delay}
+                    if not self._rerun:
+                        return
+                    self._rerun = False
+                    force = True
+        finally:
+            with self._lock:
+                self._running = False
+                self._idle.set()
+
+    def start_polling(self, interval: float = 60.0):
+        """可选：定期检查指纹，工作区无请求时也保持建议新鲜"""
+        if self._poller: return
+        def loop():
+            while True:
+                time.sleep(interval)
+                self.refresh_async()
+        self._poller = threading.Thread(target=loop, daemon=True, name='suggestion-poller')
+        self._poller.start()
+
+if __name__ == "__main__":
+    print("SuggestionEngine 仅作为模块使用，不建议直接运行。")
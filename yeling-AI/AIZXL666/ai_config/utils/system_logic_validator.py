@@ -8,6 +8,7 @@ import subprocess
 from typing import Dict, List, Any
 from .script_analyzer import ScriptAnalyzer
 from .connectivity_tester import GlobalConnectivityTester
+from .graph_algorithms import IncrementalSCC
 
 class SystemLogicValidator:
     def suggest_code_optimization(self, file_path):
@@ -104,6 +105,9 @@ class SystemLogicValidator:
         self.logger = logging.getLogger(__name__)
         self.analyzer = ScriptAnalyzer(workspace_dir)
         self.connectivity_tester = GlobalConnectivityTester(workspace_dir)
+        # 文件级依赖图的强连通分量索引，首次检测后支持增量更新
+        self._dependency_graph: Dict[str, List[str]] = {}
+        self._cycle_index = None
         
     def validate_system_logic(self) -> Dict:
         """验证整体系统逻辑"""
@@ -383,35 +387,48 @@ class SystemLogicValidator:
             
         return result
     
+    def _dependency_adjacency(self, dependency_graph: Dict) -> Dict[str, set]:
+        """把 dependency_graph（文件 -> 导入的模块名）解析为文件级邻接表，工作区外的模块忽略"""
+        from scanner.dependency_scanner import module_names, resolve_import
+        files = [fp for fp in dependency_graph if fp.endswith('.py')]
+        names = module_names(files); file_set = set(files)
+        adj = {}
+        for fp in files:
+            targets = (resolve_import(fp, mod, names, file_set) for mod in dependency_graph.get(fp, []))
+            adj[fp] = {t for t in targets if t is not None}
+        return adj
+
     def _detect_dependency_cycles(self, dependency_graph: Dict) -> List:
-        """检测依赖循环"""
-        cycles = []
-        visited = set()
-        rec_stack = set()
-        
-        def dfs(node, path):
-            if node in rec_stack:
-                cycle_start = path.index(node)
-                cycles.append(path[cycle_start:] + [node])
-                return
-            
-            if node in visited:
-                return
-                
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for dep in dependency_graph.get(node, []):
-                dfs(dep, path + [node])
-                
-            rec_stack.remove(node)
-        
-        for node in dependency_graph:
-            if node not in visited:
-                dfs(node, [])
-                
-        return cycles
-    
+        """检测依赖循环：迭代 Tarjan 求强连通分量，O(V+E)，每个循环集合只报告一次。
+
+        结果保存在 self._cycle_index 中，之后可用 update_dependency_cycles 增量更新。
+        """
+        self._dependency_graph = dict(dependency_graph)
+        self._cycle_index = IncrementalSCC(self._dependency_adjacency(self._dependency_graph))
+        return self._cycle_index.cycles()
+
+    def update_dependency_cycles(self, changed_files: List[str], removed_files: List[str] = ()) -> List:
+        """只重新分析变化的文件并局部重算强连通分量，返回最新的循环集合"""
+        if self._cycle_index is None:
+            return self._detect_dependency_cycles(self.analyzer.get_global_interaction_map()['dependency_graph'])
+        graph = self._dependency_graph
+        old_files = set(graph)
+        for fp in removed_files:
+            graph.pop(fp, None)
+        for fp in changed_files:
+            if os.path.exists(fp):
+                graph[fp] = self.analyzer.analyze_script_impact(fp)['global_dependencies']
+        adj = self._dependency_adjacency(graph)
+        index = self._cycle_index
+        if set(graph) == old_files:
+            # 文件集合不变时模块名解析不变，只有变化文件的出边可能不同
+            changed = {fp: adj[fp] for fp in changed_files if fp in adj}
+        else:
+            # 新增/删除文件可能改变其他文件的导入解析结果，比较全部出边（解析代价远小于重新分析）
+            changed = {fp: vs for fp, vs in adj.items() if index.adj.get(fp) != vs}
+        index.update(changed, [fp for fp in removed_files if fp in index.adj])
+        return index.cycles()
+
     def _generate_recommendations(self, validation_results: Dict) -> List[str]:
         """生成改进建议"""
         recommendations = []
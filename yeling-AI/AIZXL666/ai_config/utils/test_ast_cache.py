@@ -0,0 +1,42 @@
+import os, sys, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pytest
+from utils.ast_cache import ASTCache, AST_CACHE
+from utils.code_duplication_detector import CodeDuplicationDetector
+
+def test_parse_once_per_version(tmp_path):
+    p = tmp_path / 'm.py'
+    p.write_text("def f():\n    return 1\n")
+    cache = ASTCache()
+    t1 = cache.parse_file(str(p))
+    assert cache.parse_file(str(p)) is t1
+    assert cache.parse_source(str(p), p.read_text()) is t1
+    p.write_text("def g():\n    return 2\n")
+    t = time.time() + 5
+    os.utime(p, (t, t))
+    assert cache.parse_file(str(p)) is not t1
+    assert cache.stats()['misses'] == 2
+
+def test_syntax_error_cached_and_reraised(tmp_path):
+    p = tmp_path / 'bad.py'
+    p.write_text("def (:\n")
+    cache = ASTCache()
+    for _ in range(2):
+        with pytest.raises(SyntaxError):
+            cache.parse_file(str(p))
+    assert cache.stats()['misses'] == 1
+
+def test_lru_respects_memory_budget(tmp_path):
+    cache = ASTCache(max_bytes=2000)
+    for i in range(10):
+        cache.parse_source(str(tmp_path / f'{i}.py'), f"x{i} = {i}\n" * 10)
+    assert cache.stats()['bytes'] <= 2000
+    assert cache.stats()['entries'] < 10
+
+def test_duplication_detector_parses_each_file_once(tmp_path):
+    for i in range(3):
+        (tmp_path / f'm{i}.py').write_text("import os\nimport os\ndef helper(a):\n    return a\n")
+    AST_CACHE.clear()
+    before = AST_CACHE.stats()['misses']
+    CodeDuplicationDetector(str(tmp_path)).scan_all_files()
+    assert AST_CACHE.stats()['misses'] - before == 3
@@ -0,0 +1,53 @@
+import sys, os, time, subprocess
+sys.path.insert(0, os.path.dirname(__file__))
+from cache_backend import SQLiteCacheBackend
+from memory_cache import MemoryCache
+
+def test_backend_roundtrip_and_expiry(tmp_path):
+    b = SQLiteCacheBackend(tmp_path / 'c.sqlite')
+    b.set('latest_context', {'files': {'a.py': {}}}, expire=float('inf'))
+    b.set('old', 1, expire=time.time() - 1)
+    assert b.get('latest_context') == (True, {'files': {'a.py': {}}}, None)
+    assert b.get('old')[0] is False
+    assert b.keys('latest') == ['latest_context']
+    assert b.purge_expired() == 1
+
+def test_l1_in_front_of_shared_backend(tmp_path):
+    db = tmp_path / 'c.sqlite'
+    scanner = MemoryCache(backend=SQLiteCacheBackend(db), backend_namespaces=['latest_context'], background_expiry=False)
+    server = MemoryCache(backend=SQLiteCacheBackend(db), l1_ttl=0.05, backend_namespaces=['latest_context'], background_expiry=False)
+    assert server.get('latest_context') is None
+    scanner.set('latest_context', {'v': 1}, ttl=float('inf'))
+    scanner.set('complexity:/a.py', 3)   # 不在共享命名空间，只留在本进程
+    assert server.get('latest_context') == {'v': 1} and server.info()['backend_hits'] == 1
+    assert server.get('complexity:/a.py') is None
+    scanner.set('latest_context', {'v': 2})
+    assert server.get('latest_context') == {'v': 1}   # L1 副本仍有效
+    time.sleep(0.1)
+    assert server.get('latest_context') == {'v': 2}
+
+def test_other_process_sees_writes(tmp_path):
+    db = tmp_path / 'c.sqlite'
+    code = ('import sys; sys.path.insert(0, sys.argv[1]); from cache_backend import SQLiteCacheBackend; '
+            'from memory_cache import MemoryCache; '
+            'MemoryCache(backend=SQLiteCacheBackend(sys.argv[2]), background_expiry=False).set("latest_context", {"pid": 1})')
+    subprocess.run([sys.executable, '-c', code, os.path.dirname(__file__), str(db)], check=True)
+    assert MemoryCache(backend=SQLiteCacheBackend(db), background_expiry=False).get('latest_context') == {'pid': 1}
+
+def test_backend_errors_are_logged_not_raised(caplog):
+    from memory_cache import ShardedMemoryCache
+    class LockedBackend:
+        def __getattr__(self, name):
+            def fail(*a, **kw):
+                raise RuntimeError('database is locked')
+            return fail
+    for cache in (MemoryCache(backend=LockedBackend(), background_expiry=False),
+                  ShardedMemoryCache(shards=4, backend=LockedBackend(), background_expiry=False)):
+        cache.set('latest_context', {'v': 1})
+        assert cache.get('latest_context') == {'v': 1}
+        cache.delete('latest_context')
+        assert cache.get('latest_context') is None
+        cache.set('latest_context', {'v': 2})
+        cache.clear()
+        assert len(cache) == 0
+    assert sum('database is locked' in r.getMessage() for r in caplog.records) >= 8
@@ -0,0 +1,77 @@
+import os, sys, ast
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.clone_detector import CloneDetector, function_tokens, winnow, minhash_signature
+from utils.code_duplication_detector import CodeDuplicationDetector
+
+ORIGINAL = '''
+def load_config(path, defaults=None):
+    settings = dict(defaults or {})
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            key, _, value = line.partition('=')
+            settings[key.strip()] = value.strip()
+    if 'timeout' in settings:
+        settings['timeout'] = int(settings['timeout'])
+    return settings
+'''
+# 改名 + 改常量：规范化后与原函数完全相同
+RENAMED = ORIGINAL.replace('load_config', 'read_options').replace('settings', 'opts').replace("'#'", "';'")
+# 少量编辑：多一条语句、少一个分支
+EDITED = ORIGINAL.replace('load_config', 'parse_conf').replace(
+    "    return settings", "    settings.setdefault('retries', 3)\n    return settings").replace(
+    "            if not line or line.startswith('#'):\n                continue\n", "            if not line:\n                continue\n")
+UNRELATED = '''
+def render(rows, width):
+    out = []
+    for i, row in enumerate(rows):
+        cells = [str(c).ljust(width) for c in row]
+        out.append(' | '.join(cells))
+        if i == 0:
+            out.append('-' * (width * len(row) + 3 * (len(row) - 1)))
+    return '\\n'.join(out)
+'''
+
+def test_renamed_and_edited_copies_cluster_together():
+    det = CloneDetector(threshold=0.6)
+    for i, src in enumerate((ORIGINAL, RENAMED, EDITED, UNRELATED, ORIGINAL)):
+        det.add_tree(f'm{i}.py', ast.parse(src))
+    exact = det.exact_duplicates()
+    assert [sorted(o['file'] for o in occ) for occ in exact.values()] == [['m0.py', 'm4.py']]
+    clusters, stats = det.near_duplicates()
+    assert len(clusters) == 1
+    names = sorted(o['name'] for o in clusters[0]['functions'])
+    assert names == ['load_config', 'load_config', 'parse_conf', 'read_options']
+    assert 0.6 <= clusters[0]['similarity'] < 1.0 and not clusters[0]['exact']
+    assert stats['functions'] == 5 and stats['lsh_units'] == 3
+
+def test_normalization_and_signature_properties():
+    a = function_tokens(ast.parse(ORIGINAL).body[0])
+    b = function_tokens(ast.parse(RENAMED).body[0])
+    assert a[0] == b[0] and a[1] != b[1]
+    fps = winnow(a[0])
+    assert 0 < len(fps) < len(a[0])
+    sig = minhash_signature(fps, 64)
+    assert len(sig) == 64 and sig == minhash_signature(set(fps), 64)
+    # 指纹很少时空桶由旋转补齐，签名仍是定长的
+    assert len(minhash_signature({12345}, 64)) == 64
+
+def test_large_buckets_do_not_compare_quadratically():
+    det = CloneDetector(max_bucket=8)
+    for i in range(300):
+        det.add_tree(f'gen{i}.py', ast.parse(ORIGINAL.replace("'timeout'", f"'t{i}'").replace('int(', 'float(' if i % 2 else 'int(')))
+    clusters, stats = det.near_duplicates()
+    assert sum(len(c['functions']) for c in clusters) == 300
+    assert stats['comparisons'] < 300 * 8
+
+def test_detector_reports_near_duplicates(tmp_path):
+    (tmp_path / 'source').mkdir(); (tmp_path / 'release').mkdir()
+    (tmp_path / 'source' / 'cfg.py').write_text(ORIGINAL)
+    (tmp_path / 'release' / 'cfg.py').write_text(EDITED)
+    results = CodeDuplicationDetector(str(tmp_path)).scan_all_files()
+    assert results['duplicate_functions'] == {}
+    assert len(results['near_duplicate_functions']) == 1
+    assert results['near_duplicate_functions'][0]['files'] == 2
+    assert any('近似重复' in r for r in results['recommendations'])
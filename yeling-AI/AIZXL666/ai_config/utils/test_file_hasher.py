@@ -0,0 +1,24 @@
+import sys, os, hashlib
+sys.path.insert(0, os.path.dirname(__file__))
+from file_hasher import FileHasher
+
+def test_full_hash_matches_hashlib(tmp_path):
+    data = os.urandom(300_000)
+    fp = tmp_path / 'model.bin'; fp.write_bytes(data)
+    for use_mmap in (True, False):
+        h = FileHasher('blake2b', buffer_size=65536, use_mmap=use_mmap)
+        assert h.hash_file(str(fp)) == (hashlib.blake2b(data).hexdigest(), False, len(data))
+    assert FileHasher('sha256').hash_file(str(fp))[0] == hashlib.sha256(data).hexdigest()
+    assert FileHasher('no-such-algo').algorithm == 'blake2b'
+
+def test_sampled_fingerprint_and_parallel_stats(tmp_path):
+    data = bytearray(os.urandom(200_000))
+    (tmp_path / 'a.bin').write_bytes(data)
+    data[100_000] ^= 1   # 中间块变化能被抽样检测到
+    (tmp_path / 'b.bin').write_bytes(data)
+    h = FileHasher('blake2b', workers=2, sample_threshold=50_000, sample_block=4096)
+    out, stats = h.hash_many([(str(tmp_path / n), 200_000) for n in ('a.bin', 'b.bin')])
+    (da, sa), (db, sb) = out[str(tmp_path / 'a.bin')], out[str(tmp_path / 'b.bin')]
+    assert sa and sb and da != db
+    assert stats['files'] == 2 and stats['sampled_files'] == 2 and stats['bytes_read'] == 2 * 3 * 4096
+    assert h.hash_file(str(tmp_path / 'missing.bin')) == (None, False, 0)
@@ -0,0 +1,51 @@
+import os, sys, ast
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import utils.functional_independence_validator as fiv
+from utils.functional_independence_validator import FunctionalIndependenceValidator, build_coupling_matrix
+
+def legacy_strength(validator, module1_path, module2_name):
+    """原 _calculate_coupling_strength 的计数方式，用于对照"""
+    coupling_count = total_imports = 0
+    for py_file in validator._module_python_files(module1_path):
+        for node in ast.walk(ast.parse(open(py_file).read())):
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                total_imports += 1
+                if isinstance(node, ast.ImportFrom) and node.module:
+                    coupling_count += module2_name in node.module
+                elif isinstance(node, ast.Import):
+                    coupling_count += sum(module2_name in a.name for a in node.names)
+    return coupling_count / total_imports if total_imports else 0.0
+
+def make_workspace(root):
+    pkg = root / 'AI' / 'ai_assistant_full_package'
+    (pkg / 'scanner').mkdir(parents=True)
+    (pkg / 'scanner' / 'a.py').write_text("from utils.cache import X\nimport os, utils.log\nfrom . import b\n")
+    (pkg / 'scanner' / 'b.py').write_text("from server import app\n")
+    (pkg / 'utils').mkdir()
+    (pkg / 'utils' / 'cache.py').write_text("import json\nfrom scanner.a import f\n")
+    (pkg / 'server.py').write_text("from utils.cache import X\nfrom scanner import a\nimport flask\n")
+    (pkg / 'empty').mkdir()
+    return pkg
+
+def test_matrix_matches_pairwise_computation(tmp_path):
+    make_workspace(tmp_path)
+    validator = FunctionalIndependenceValidator(str(tmp_path))
+    modules = validator._identify_modules()
+    coupling = validator._analyze_module_coupling(modules)
+    for m1, p1 in modules.items():
+        for m2 in modules:
+            if m1 != m2:
+                assert coupling['coupling_matrix'][m1][m2] == legacy_strength(validator, p1, m2)
+    names = coupling['coupling_compact']['modules']
+    dense = {(names[i], names[j]): v for i, j, v in coupling['coupling_compact']['entries']}
+    assert dense[('scanner', 'utils')] == 0.5 and dense[('scanner', 'server')] == 0.25
+    assert all(v > 0 for v in dense.values())
+    assert coupling['high_coupling_pairs'] == []
+
+def test_pure_python_fallback_matches_numpy_path(monkeypatch):
+    from collections import Counter
+    names = ['scanner', 'utils', 'server']
+    histograms = [(Counter({'utils.cache': 2, 'server': 1}), 4), (Counter({'scanner.a': 1}), 2), (Counter(), 0)]
+    expected = [[0.0, 0.5, 0.25], [0.5, 0.0, 0.0], [0.0, 0.0, 0.0]]
+    monkeypatch.setattr(fiv, 'np', None)
+    assert build_coupling_matrix(names, histograms) == expected
@@ -0,0 +1,60 @@
+import sys, os, time, random
+sys.path.insert(0, os.path.dirname(__file__))
+from graph_algorithms import CSRGraph, strongly_connected_components, cycles, longest_path, high_degree_nodes, scc_of_adjacency, IncrementalSCC
+
+def test_scc_cycles_and_longest_path():
+    g = CSRGraph.from_pairs([('a', 'b'), ('b', 'c'), ('c', 'a'), ('c', 'd'), ('d', 'e'), ('e', 'e'), ('x', 'a')])
+    found = sorted(sorted(g.labels[v] for v in c) for c in cycles(g))
+    assert found == [['a', 'b', 'c'], ['e']]
+    path = [g.labels[v] for v in longest_path(g)]
+    assert path[0] == 'x' and path[-2:] == ['d', 'e'] and len(path) == 4
+    hubs = {g.labels[v]: (i, o) for v, i, o in high_degree_nodes(g, 3)}
+    assert hubs == {'a': (2, 1), 'c': (1, 2), 'e': (2, 1)}
+
+def test_deep_chain_and_large_graph_are_linear():
+    n = 200_000
+    chain = CSRGraph.from_edges(n, ((i, i + 1) for i in range(n - 1)))
+    assert len(strongly_connected_components(chain)) == n   # 迭代实现，无递归深度限制
+    assert len(longest_path(chain)) == n
+    rnd = random.Random(1)
+    m = 20_000
+    g = CSRGraph.from_edges(m, ((rnd.randrange(m), rnd.randrange(m)) for _ in range(100_000)))
+    t0 = time.perf_counter()
+    comps = strongly_connected_components(g)
+    longest_path(g)
+    assert sum(len(c) for c in comps) == m
+    assert time.perf_counter() - t0 < 3
+
+def _canonical(comps):
+    return sorted(sorted(c) for c in comps)
+
+def test_incremental_scc_matches_full_recompute():
+    rnd = random.Random(7)
+    n = 300
+    adj = {u: {rnd.randrange(n) for _ in range(rnd.randrange(3))} for u in range(n)}
+    inc = IncrementalSCC(adj)
+    for step in range(200):
+        if step % 10 == 9:
+            u = rnd.randrange(n)
+            adj.pop(u, None)
+            inc.update({}, [u])
+        else:
+            u = rnd.randrange(n)
+            adj[u] = {rnd.randrange(n) for _ in range(rnd.randrange(4))}
+            inc.update({u: adj[u]})
+        assert _canonical(inc.members.values()) == _canonical(scc_of_adjacency(adj))
+    full = [c for c in scc_of_adjacency(adj) if len(c) > 1 or c[0] in adj[c[0]]]
+    assert _canonical(inc.cycles()) == _canonical(full)
+
+def test_incremental_update_touches_only_affected_region():
+    n = 20_000
+    adj = {i: {i + 1} for i in range(n - 1)}
+    adj[n - 1] = set()
+    inc = IncrementalSCC(adj)
+    assert inc.cycles() == []
+    inc.update({n - 5: {n - 4, n - 10}})   # 在链尾附近造一个环
+    assert inc.cycles() == [list(range(n - 10, n - 4))]
+    assert inc.last_recomputed < 20
+    inc.update({n - 5: {n - 4}})
+    assert inc.cycles() == []
+
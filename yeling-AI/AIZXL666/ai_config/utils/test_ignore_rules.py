@@ -0,0 +1,28 @@
+import sys, os
+sys.path.insert(0, os.path.dirname(__file__))
+from ignore_rules import IgnoreRules, load_ignore_rules, walk
+
+def _touch(root, *rels):
+    for rel in rels:
+        p = root / rel
+        p.parent.mkdir(parents=True, exist_ok=True)
+        p.write_text('x')
+
+def test_gitignore_semantics(tmp_path):
+    rules = IgnoreRules(str(tmp_path), ['*.pyc', 'build/', '/top.txt', 'docs/**/*.tmp', '!keep.pyc', 'a/**'], gitignore=False)
+    ig = lambda rel, d=False: rules.ignored(str(tmp_path / rel), d)
+    assert ig('x/y/z.pyc') and not ig('x/keep.pyc')
+    assert ig('src/build', True) and not ig('src/build')          # 只匹配目录
+    assert ig('top.txt') and not ig('sub/top.txt')                # 含 / 的模式锚定在根目录
+    assert ig('docs/a/b/c.tmp') and ig('docs/c.tmp') and not ig('src/c.tmp')
+    assert ig('a/b/c.py') and not ig('ab/c.py')
+
+def test_walk_prunes_defaults_settings_and_nested_gitignore(tmp_path):
+    _touch(tmp_path, 'app/main.py', '.git/config', '.venv/lib/site.py', 'node_modules/x/i.js',
+           'pkg/__pycache__/m.pyc', 'pkg/mod.py', 'pkg/gen/out.py', 'models/big.gguf', 'keep.log')
+    (tmp_path / 'pkg' / '.gitignore').write_text('gen/\n')
+    (tmp_path / '.gitignore').write_text('*.log\n!keep.log\n')
+    files = sorted(os.path.relpath(os.path.join(d, f), tmp_path) for d, _, fs in walk(str(tmp_path), settings={'scanner': {'exclude': ['*.gguf']}}) for f in fs)
+    assert files == ['.gitignore', 'app/main.py', 'keep.log', 'pkg/.gitignore', 'pkg/mod.py']
+    from_settings = load_ignore_rules(str(tmp_path), {'scanner': {'exclude': ['app/'], 'gitignore': False}})
+    assert from_settings.ignored(str(tmp_path / 'app'), True) and not from_settings.ignored(str(tmp_path / 'pkg' / 'gen'), True)
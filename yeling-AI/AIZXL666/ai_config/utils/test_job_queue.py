@@ -0,0 +1,59 @@
+import os, sys, time, threading
+import pytest
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.job_queue import JobQueue, QueueFull
+
+def test_identical_concurrent_requests_share_one_job():
+    gate, calls = threading.Event(), []
+    def work(progress):
+        calls.append(1)
+        progress(50, 'half way')
+        gate.wait(5)
+        return {'answer': 42}
+    jobs = JobQueue(workers=2)
+    first, created = jobs.submit('structure', work, dedupe_key='structure:/ws')
+    second, created_again = jobs.submit('structure', work, dedupe_key='structure:/ws')
+    assert created and not created_again and first['id'] == second['id']
+    gate.set()
+    done = jobs.wait(first['id'], 5)
+    assert done['status'] == 'done' and done['result'] == {'answer': 42} and done['requests'] == 2
+    assert calls == [1] and jobs.metrics()['deduplicated'] == 1
+    # 结束后再提交会重新计算
+    again, created = jobs.submit('structure', work, dedupe_key='structure:/ws')
+    assert created and again['id'] != first['id']
+    jobs.wait(again['id'], 5)
+    jobs.shutdown()
+
+def test_priority_lanes_failures_and_queue_limit():
+    gate, order = threading.Event(), []
+    jobs = JobQueue(workers=1, max_queued=2)
+    blocker, _ = jobs.submit('block', lambda p: gate.wait(5))
+    while jobs.get(blocker['id'])['status'] != 'running':
+        time.sleep(0.01)
+    low, _ = jobs.submit('low', lambda p: order.append('low'), priority='low')
+    high, _ = jobs.submit('high', lambda p: order.append('high') or 1 / 0, priority='high')
+    with pytest.raises(QueueFull):
+        jobs.submit('extra', lambda p: None)
+    gate.set()
+    assert jobs.wait(low['id'], 5)['status'] == 'done'
+    failed = jobs.get(high['id'])
+    assert order == ['high', 'low'] and failed['status'] == 'failed' and 'division' in failed['error']
+    with pytest.raises(ValueError):
+        jobs.submit('bad', lambda p: None, priority='urgent')
+    jobs.shutdown()
+
+def test_events_stream_progress_and_results_expire():
+    jobs = JobQueue(workers=1, result_ttl=0.05)
+    def work(progress):
+        for pct in (25, 75):
+            progress(pct, f'{pct}%')
+            time.sleep(0.02)
+        return 'ok'
+    job, _ = jobs.submit('model_check', work)
+    events = list(jobs.events(job['id'], timeout=5))
+    assert events[-1]['status'] == 'done' and events[-1]['result'] == 'ok'
+    progress = [e['progress'] for e in events]
+    assert len(events) >= 3 and progress == sorted(progress) and progress[-1] == 100.0
+    time.sleep(0.1)
+    assert jobs.get(job['id']) is None and jobs.metrics()['expired'] == 1
+    jobs.shutdown()
@@ -1,6 +1,6 @@
 import sys, os
 sys.path.insert(0, os.path.dirname(__file__))
-from memory_cache import MemoryCache
+from memory_cache import MemoryCache, ShardedMemoryCache, create_cache
 
 import pytest
 
@@ -20,3 +20,71 @@ def test_ttl_expiry():
     cache.set('x', 'y')
     import time; time.sleep(1.2)
     assert cache.get('x') is None
+
+def test_lru_order_and_counters():
+    cache = MemoryCache(max_items=3, default_ttl=60, background_expiry=False)
+    for k in 'abc': cache.set(k, k)
+    cache.get('a')          # a 变为最近使用
+    cache.set('d', 'd')     # 淘汰 b
+    assert cache.get('b') is None
+    assert [cache.get(k) for k in 'acd'] == ['a', 'c', 'd']
+    info = cache.info()
+    assert info['evictions'] == 1 and info['misses'] == 1 and info['hits'] == 4
+
+def test_namespace_limits_and_bytes():
+    cache = MemoryCache(max_items=100, namespace_limits={'complexity': 2}, background_expiry=False)
+    for i in range(5): cache.set(f'complexity:{i}', i)
+    cache.set('latest_context', {'x': 1})
+    assert len(cache) == 3
+    assert cache.get('complexity:0') is None and cache.get('complexity:4') == 4
+    assert cache.get('latest_context') == {'x': 1}
+    cache = MemoryCache(max_items=100, max_bytes=100, sizeof=len, background_expiry=False)
+    cache.set('a', 'x' * 60); cache.set('b', 'x' * 60)
+    assert cache.get('a') is None and cache.info()['bytes'] == 60
+
+def test_expiry_wheel_sweep():
+    cache = MemoryCache(max_items=10, default_ttl=0.05, background_expiry=False)
+    cache.RESOLUTION = 0.01
+    cache.set('a', 1); cache.set('b', 2, ttl=float('inf'))
+    import time; time.sleep(0.1)
+    assert cache.sweep() == 1
+    assert len(cache) == 1 and cache.get('b') == 2
+
+def test_sharded_cache_concurrent():
+    import threading
+    cache = ShardedMemoryCache(shards=4, max_items=400, default_ttl=60, background_expiry=False)
+    def worker(t):
+        for i in range(200):
+            cache.set(f'complexity:{t}:{i}', i)
+            assert cache.get(f'complexity:{t}:{i}') == i
+    threads = [threading.Thread(target=worker, args=(t,)) for t in range(8)]
+    for th in threads: th.start()
+    for th in threads: th.join()
+    assert len(cache) <= 400
+    info = cache.info()
+    assert info['shards'] == 4 and info['sets'] == 1600 and info['evictions'] == 1600 - len(cache)
+    cache.delete('complexity:7:199'); assert cache.get('complexity:7:199') is None
+    assert isinstance(create_cache({'cache': {'shards': 4}}), ShardedMemoryCache)
+    assert isinstance(create_cache({}), MemoryCache)
+
+def test_empty_cache_is_truthy_and_receives_published_context():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from ai.context_manager import ContextManager
+    for cache in (create_cache({'cache': {'shards': 8}}), MemoryCache(background_expiry=False)):
+        assert len(cache) == 0 and bool(cache)
+        cm = ContextManager(cache=cache)
+        cm.context = {'files': {'a.py': {}}}
+        cm._publish()
+        assert cache.get('latest_context') == {'files': {'a.py': {}}}
+
+def test_sharded_namespace_limits_apply_across_shards():
+    cache = ShardedMemoryCache(shards=8, max_items=800, namespace_limits={'latest_context': 1, 'structure': 3}, background_expiry=False)
+    cache.set('latest_context', {'v': 1})
+    cache.set('latest_context', {'v': 2})
+    for i in range(20):
+        cache.set(f'structure:{i}', i)
+        cache.set(f'complexity:{i}', i)
+    namespaces = cache.info()['namespaces']
+    assert namespaces == {'latest_context': 1, 'structure': 3} and len(cache) == 1 + 3 + 20
+    assert cache.get('latest_context') == {'v': 2}
+    assert [cache.get(f'structure:{i}') for i in range(17, 20)] == [17, 18, 19]
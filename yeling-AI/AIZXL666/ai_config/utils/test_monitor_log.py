@@ -0,0 +1,97 @@
+import os, sys, gzip, json, time, threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.monitor_log import MonitorLog, normalize_time
+
+def fill(log, n):
+    for i in range(n):
+        event = 'error' if i % 10 == 0 else 'request'
+        log.append(event, {'path': f'/api/{i % 3}', 'method': 'GET', 'i': i})
+    assert log.flush()
+
+def test_batched_writes_ring_buffer_and_backward_paging(tmp_path):
+    log = MonitorLog(str(tmp_path / 'monitor_log.json'), ring_size=20, batch_size=50, flush_interval=5, index_every=4)
+    fill(log, 103)
+    assert log.stats['batches'] <= 4 and len(log.recent) == 20
+    with open(log.path, encoding='utf-8') as f:
+        assert len(f.readlines()) == 103
+    page = log.query(limit=10)
+    assert [e['detail']['i'] for e in page['entries']] == list(range(93, 103))
+    seen, before = [], None
+    while True:
+        page = log.query(limit=7, before=before)
+        seen = [e['detail']['i'] for e in page['entries']] + seen
+        before = page['prev_cursor']
+        if before is None:
+            break
+    assert seen == list(range(103))
+    errors = log.query(event='error', path='/api/1', limit=100)['entries']
+    assert [e['detail']['i'] for e in errors] == [10, 40, 70, 100]
+    assert [e['detail']['i'] for e in log.query(source='memory', path='/api/2', limit=3)['entries']] == [95, 98, 101]
+    log.close()
+
+def test_forward_paging_by_time_and_cursor(tmp_path):
+    log = MonitorLog(str(tmp_path / 'monitor_log.json'), index_every=5)
+    fill(log, 60)
+    with open(log.path, encoding='utf-8') as f:
+        stamps = [json.loads(line)['timestamp'] for line in f]
+    since, until = stamps[23], stamps[41]
+    got, after = [], None
+    while True:
+        page = log.query(since=since, until=until, path='/api/*', limit=8, after=after)
+        got += [e['detail']['i'] for e in page['entries']]
+        after = page['next_cursor']
+        if after is None:
+            break
+    assert got == list(range(23, 42))
+    assert normalize_time('2026-10-17T21:00:00Z') == '2026-10-17T21:00:00.000000Z'
+    log.close()
+
+def test_rotation_compresses_and_index_follows_other_writers(tmp_path):
+    path = str(tmp_path / 'monitor_log.json')
+    log = MonitorLog(path, max_bytes=4000, backups=2, index_every=3, batch_size=10, flush_interval=0.01)
+    for _ in range(10):
+        fill(log, 20)
+    assert log.wait_archived()
+    archives = log.archives()
+    assert log.stats['rotations'] >= 3 and len(archives) == 2
+    with gzip.open(archives[0], 'rt', encoding='utf-8') as f:
+        assert json.loads(f.readline())['event'] in ('request', 'error')
+    assert os.path.getsize(path) <= 4000
+    # 另一个进程（这里用第二个实例模拟）追加到同一文件，索引增量跟上
+    last = log.query(limit=1)['entries'][0]['detail']['i']
+    other = MonitorLog(path, max_bytes=0, index_every=3)
+    other.append('request', {'path': '/other', 'i': 'x'})
+    other.flush()
+    assert [e['detail']['i'] for e in log.query(limit=2)['entries']] == [last, 'x']
+    other.close()
+    log.close()
+
+def test_query_does_not_wait_for_writer_and_reads_index_of_open_file(tmp_path, monkeypatch):
+    path = str(tmp_path / 'monitor_log.json')
+    log = MonitorLog(path, index_every=2, flush_interval=5, batch_size=1000)
+    fill(log, 10)
+    # 写入线程被长时间占用（例如轮转压缩）时，查询只返回已落盘的内容而不阻塞
+    release = threading.Event()
+    real_write = log._write_batch
+    monkeypatch.setattr(log, '_write_batch', lambda batch: release.wait(5) and real_write(batch))
+    log.append('request', {'path': '/late', 'i': 'late'})
+    t0 = time.monotonic()
+    page = log.query(limit=100)
+    assert time.monotonic() - t0 < 1 and len(page['entries']) == 10
+    assert log.query(source='memory', limit=1)['entries'][0]['detail']['i'] == 'late'
+    release.set()
+    assert log.flush()
+    # 查询打开文件后发生轮转：索引按已打开文件的 inode 建立，不会把旧偏移套到新文件上
+    real_open = open
+    def rotating_open(p, *a, **kw):
+        f = real_open(p, *a, **kw)
+        if p == path:
+            log.rotate()
+            with real_open(path, 'w', encoding='utf-8') as g:
+                g.write(json.dumps({'event': 'x', 'detail': {'i': 'new'}, 'timestamp': '2099-01-01T00:00:00.000000Z'}) + '\n')
+        return f
+    monkeypatch.setattr('builtins.open', rotating_open)
+    assert [e['detail']['i'] for e in log.query(limit=3)['entries']] == [8, 9, 'late']
+    monkeypatch.undo()
+    assert [e['detail']['i'] for e in log.query(limit=3)['entries']] == ['new']
+    log.close()
@@ -0,0 +1,36 @@
+import os, sys, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.scan_cache import ScanCache
+from scanner.file_index import walk_files
+from scanner.complexity_scanner import ComplexityScanner
+from scanner.security_scanner import SecurityScanner
+
+def test_incremental_rescan_reuses_unchanged_files(tmp_path):
+    for i in range(3):
+        (tmp_path / f'm{i}.py').write_text(f"def f{i}():\n    if True:\n        return {i}\n")
+    cache = ScanCache(tmp_path / 'scan_cache.sqlite')
+    scanner = ComplexityScanner()
+    first = scanner.run_on_files(walk_files([str(tmp_path)]), None, {}, scan_cache=cache)
+    cache.commit()
+    assert first['cache_stats'] == {'hits': 0, 'misses': 3}
+    second = scanner.run_on_files(walk_files([str(tmp_path)]), None, {}, scan_cache=cache)
+    assert second['cache_stats'] == {'hits': 3, 'misses': 0}
+    assert second['complexity'] == first['complexity']
+    # 内容变化 -> 重新分析；仅 mtime 变化 -> 哈希校验命中
+    (tmp_path / 'm0.py').write_text("def g():\n    for x in y:\n        pass\n")
+    t = time.time() + 5
+    os.utime(tmp_path / 'm1.py', (t, t))
+    third = scanner.run_on_files(walk_files([str(tmp_path)]), None, {}, scan_cache=cache)
+    assert third['cache_stats'] == {'hits': 2, 'misses': 1}
+    cache.close()
+
+def test_cache_persists_across_instances(tmp_path):
+    (tmp_path / 'cfg.py').write_text("api_key = 'ABCDEFGH12345678'\n")
+    db = tmp_path / 'scan_cache.sqlite'
+    c1 = ScanCache(db)
+    SecurityScanner().run_on_files(walk_files([str(tmp_path)]), None, {}, scan_cache=c1)
+    c1.close()
+    c2 = ScanCache(db)
+    res = SecurityScanner().run_on_files(walk_files([str(tmp_path / 'cfg.py')]), None, {}, scan_cache=c2)
+    assert res['cache_stats']['hits'] == 1
+    assert res['security_findings'][0]['match'].startswith('api_key')
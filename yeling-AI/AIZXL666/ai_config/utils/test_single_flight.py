@@ -0,0 +1,71 @@
+import os, sys, time, threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.single_flight import SingleFlight, RecentValue, make_key
+
+def run_concurrently(n, target):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_concurrent_identical_calls_execute_once_and_share_result():
+    flights, calls, gate = SingleFlight(), [], threading.Event()
+    def compute():
+        calls.append(1)
+        gate.wait(5)
+        return {'nodes': 3}
+    threading.Timer(0.2, gate.set).start()
+    results = run_concurrently(10, lambda: flights.do('k', compute, group='/structure'))
+    assert calls == [1] and all(r[0] == {'nodes': 3} for r in results)
+    assert sorted(shared for _, shared in results) == [False] + [True] * 9
+    stats = flights.metrics()['groups']['/structure']
+    assert stats['calls'] == 10 and stats['executions'] == 1 and stats['coalesced'] == 9
+    # 结束后重新执行
+    assert flights.do('k', lambda: 'fresh') == ('fresh', False)
+
+def test_errors_propagate_to_waiters_and_keys_normalize():
+    flights, gate = SingleFlight(), threading.Event()
+    def boom():
+        gate.wait(5)
+        raise RuntimeError('scan failed')
+    def call():
+        try:
+            flights.do('k', boom)
+        except RuntimeError as e:
+            return str(e)
+    threading.Timer(0.2, gate.set).start()
+    assert run_concurrently(3, call) == ['scan failed'] * 3
+    assert flights.metrics()['groups']['k']['errors'] == 1 and flights.metrics()['inflight'] == 0
+    assert make_key('/models', [('b', '2'), ('a', '1'), ('async', '1')], 'fp') == make_key('/models', [('a', '1'), ('b', '2')], 'fp')
+    assert make_key('/structure', [], 'fp1') != make_key('/structure', [], 'fp2')
+
+def test_recent_value_reuses_within_ttl():
+    calls = []
+    value = RecentValue(lambda: calls.append(1) or len(calls), ttl=0.1)
+    assert value.get() == 1 and value.get() == 1
+    time.sleep(0.15)
+    assert value.get() == 2
+
+def test_background_recent_value_never_computes_on_caller():
+    callers, gate = [], threading.Event()
+    def compute():
+        callers.append(threading.current_thread().name)
+        gate.wait(5)
+        return len(callers)
+    value = RecentValue(compute, ttl=0.05, background=True)
+    assert value.get() is None            # 尚未算出：立即返回，不阻塞
+    gate.set()
+    deadline = time.time() + 5
+    while value.get() is None and time.time() < deadline:
+        time.sleep(0.01)
+    assert value.get() == 1
+    gate.clear()
+    time.sleep(0.1)
+    assert value.get() == 1               # 过期：先返回旧值，后台刷新
+    gate.set()
+    while value.get() == 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert value.get() == 2 and threading.current_thread().name not in callers
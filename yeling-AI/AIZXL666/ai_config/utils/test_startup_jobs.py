@@ -0,0 +1,27 @@
+import os, sys, threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.startup_jobs import StartupJobs
+
+def test_jobs_run_in_background_in_order_and_report_state():
+    gate = threading.Event()
+    order = []
+    jobs = StartupJobs()
+    jobs.add('first', lambda: order.append('first') or {'n': 1})
+    jobs.add('broken', lambda: 1 / 0)
+    jobs.add('slow', lambda: gate.wait(5) and order.append('slow'))
+    assert jobs.state == 'pending' and not jobs.warm
+    assert jobs.start() is True and jobs.start() is False
+    assert not jobs.wait(0.05) and jobs.state == 'warming'
+    gate.set()
+    assert jobs.wait(5)
+    status = jobs.status()
+    assert order == ['first', 'slow'] and status['state'] == 'degraded' and status['warm']
+    by_name = {j['name']: j for j in status['jobs']}
+    assert by_name['first']['detail'] == {'n': 1} and by_name['first']['status'] == 'done'
+    assert by_name['broken']['status'] == 'failed' and 'division' in by_name['broken']['error']
+
+def test_synchronous_start_finishes_before_returning():
+    jobs = StartupJobs()
+    jobs.add('only', lambda: 'ok')
+    jobs.start(background=False)
+    assert jobs.state == 'warm' and jobs.status()['jobs'][0]['detail'] == 'ok'
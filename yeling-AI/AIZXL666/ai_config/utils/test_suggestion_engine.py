@@ -0,0 +1,61 @@
+import os, sys, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.suggestion_engine import SuggestionEngine
+
+def _wait(engine, timeout=5):
+    end = time.time() + timeout
+    while time.time() < end:
+        s = engine.latest()
+        if not s['refreshing'] and not s['stale']:
+            return s
+        time.sleep(0.02)
+    raise AssertionError('engine did not settle')
+
+def test_latest_is_cached_and_recomputed_only_on_change(tmp_path):
+    (tmp_path / 'a.py').write_text('x = 1\n')
+    calls = []
+    def compute(ws):
+        calls.append(ws); time.sleep(0.1)
+        return [f'建议 {len(calls)}']
+    engine = SuggestionEngine(str(tmp_path), compute=compute, min_check_interval=0)
+    first = engine.latest()
+    assert first['stale'] and first['generated_at'] is None
+    s = _wait(engine)
+    assert s['suggestion'] == '建议 1'
+    # 指纹不变：不再重新计算
+    engine.latest(); _wait(engine)
+    assert len(calls) == 1
+    (tmp_path / 'b.py').write_text('y = 2\n')
+    engine.latest()
+    s = _wait(engine)
+    assert s['suggestion'] == '建议 2' and len(calls) == 2
+
+def test_latest_does_not_block_on_compute(tmp_path):
+    engine = SuggestionEngine(str(tmp_path), compute=lambda ws: time.sleep(1) or ['slow'], min_check_interval=0)
+    t0 = time.time()
+    engine.latest()
+    assert time.time() - t0 < 0.2
+
+def test_failed_compute_backs_off_until_workspace_changes(tmp_path):
+    (tmp_path / 'a.py').write_text('x = 1\n')
+    calls = []
+    def compute(ws):
+        calls.append(ws)
+        raise RuntimeError('analyzer crashed')
+    engine = SuggestionEngine(str(tmp_path), compute=compute, min_check_interval=0, error_backoff=60)
+    s = engine.refresh()
+    assert s['error'] == 'analyzer crashed' and s['stale'] and len(calls) == 1
+    for _ in range(5):
+        engine.refresh()
+    assert len(calls) == 1
+    (tmp_path / 'b.py').write_text('y = 2\n')
+    engine.refresh()
+    assert len(calls) == 2
+    engine.refresh(force=True)
+    assert len(calls) == 3
+
+def test_sync_refresh_waits_for_running_refresh(tmp_path):
+    engine = SuggestionEngine(str(tmp_path), compute=lambda ws: time.sleep(0.3) or ['done'], min_check_interval=0)
+    assert engine.refresh_async()
+    s = engine.refresh()
+    assert s['suggestion'] == 'done' and not s['stale']
@@ -0,0 +1,74 @@
+import asyncio, os, sys, time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.workspace_watcher import WorkspaceWatcher
+from scanner.dispatcher import ScannerDispatcher
+from ai.context_manager import ContextManager
+from utils.memory_cache import MemoryCache
+
+SCANNER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+def test_debounced_batches(tmp_path):
+    batches = []
+    w = WorkspaceWatcher([str(tmp_path)], lambda c, r: batches.append((c, r)), debounce=0.05)
+    w.poll()
+    (tmp_path / 'a.py').write_text('x = 1\n')
+    w.poll()
+    assert not w.flush()  # 仍在防抖窗口内
+    time.sleep(0.06)
+    assert w.flush()
+    (tmp_path / 'a.py').unlink()
+    w.poll(); w.flush(force=True)
+    assert batches == [([str(tmp_path / 'a.py')], []), ([], [str(tmp_path / 'a.py')])]
+
+def test_burst_of_edits_patches_context_incrementally(tmp_path):
+    n = 2000
+    for i in range(n):
+        (tmp_path / f'm{i}.py').write_text(f'def f{i}():\n    return {i}\n')
+    d = ScannerDispatcher(SCANNER_DIR)
+    asyncio.run(d.load_plugins())
+    ctxm = ContextManager(dispatcher=d)
+    ctx = asyncio.run(ctxm.build_context(asyncio.run(d.run_all([str(tmp_path)])), workspace=str(tmp_path)))
+    w = WorkspaceWatcher([str(tmp_path)], ctxm.apply_changes, debounce=0)
+    w.poll()
+    # 突发：修改全部文件，新增一个带密钥的文件，删除一个文件
+    for i in range(n):
+        (tmp_path / f'm{i}.py').write_text(f'def f{i}():\n    if {i}:\n        return {i}\n')
+    (tmp_path / 'leak.py').write_text("api_key = 'ABCDEFGH12345678'\n")
+    os.unlink(tmp_path / 'm0.py')
+    t0 = time.perf_counter()
+    assert w.poll() == n + 1
+    assert w.flush()
+    elapsed = time.perf_counter() - t0
+    assert str(tmp_path / 'm0.py') not in ctx['files']
+    assert str(tmp_path / 'leak.py') in ctx['files']
+    assert any(s['file'].endswith('leak.py') for s in ctx['security'])
+    scores = {c['file']: c['score'] for c in ctx['summary']['complexity_analyzer']['complexity']}
+    assert len(scores) == n and scores[str(tmp_path / 'm1.py')] == 3
+    assert w.stats['batches'] == 1
+    assert elapsed < 30
+
+def test_cached_complexity_is_rescored_after_edit(tmp_path):
+    src = tmp_path / 'a.py'
+    src.write_text('def f():\n    return 1\n')
+    cache = MemoryCache(background_expiry=False)
+    d = ScannerDispatcher(SCANNER_DIR, cache=cache)
+    asyncio.run(d.load_plugins())
+    ctxm = ContextManager(dispatcher=d, cache=cache)
+    ctx = asyncio.run(ctxm.build_context(asyncio.run(d.run_all([str(tmp_path)])), workspace=str(tmp_path)))
+    assert ctx['summary']['complexity_analyzer']['complexity'][0]['score'] == 2
+    src.write_text('def f():\n    if 1:\n        return 1\n')
+    ctxm.apply_changes([str(src)])
+    assert ctx['summary']['complexity_analyzer']['complexity'][0]['score'] == 3
+    assert cache.get('latest_context')['summary']['complexity_analyzer']['complexity'][0]['score'] == 3
+
+def test_nested_gitignore_is_respected(tmp_path):
+    (tmp_path / 'pkg' / 'gen').mkdir(parents=True)
+    (tmp_path / 'pkg' / '.gitignore').write_text('gen/\n*.tmp\n')
+    batches = []
+    w = WorkspaceWatcher([str(tmp_path)], lambda c, r: batches.append(c), debounce=0)
+    w.poll()
+    (tmp_path / 'pkg' / 'gen' / 'out.py').write_text('x = 1\n')
+    (tmp_path / 'pkg' / 'scratch.tmp').write_text('x')
+    (tmp_path / 'pkg' / 'a.py').write_text('y = 2\n')
+    w.poll(); w.flush(force=True)
+    assert batches == [[str(tmp_path / 'pkg' / 'a.py')]]
@@ -0,0 +1,50 @@
+import os, sys, io, json, threading
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.wsgi_lanes import SlowLane
+
+def make_app(gate, calls):
+    def app(environ, start_response):
+        calls.append((threading.current_thread().name, environ['PATH_INFO']))
+        if environ['PATH_INFO'].startswith('/slow'):
+            gate.wait(5)
+        body = environ['wsgi.input'].read()
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'echo:', body]
+    return app
+
+def call(app, path, body=b'', method='GET'):
+    out = {}
+    def start_response(status, headers, exc_info=None):
+        out['status'], out['headers'] = status, dict(headers)
+    environ = {'PATH_INFO': path, 'REQUEST_METHOD': method, 'CONTENT_LENGTH': str(len(body)), 'wsgi.input': io.BytesIO(body)}
+    out['body'] = b''.join(app(environ, start_response))
+    return out
+
+def test_slow_routes_run_on_lane_threads_and_fast_routes_inline():
+    gate, calls = threading.Event(), []
+    gate.set()
+    lane = SlowLane(make_app(gate, calls), ['/slow', 'POST /pipeline'])
+    r = call(lane, '/slow/x', b'abc', 'POST')
+    assert r['status'] == '200 OK' and r['body'] == b'echo:abc' and r['headers']['Content-Length'] == '8'
+    call(lane, '/fast')
+    call(lane, '/pipeline')
+    call(lane, '/pipeline', method='POST')
+    threads = [name for name, _ in calls]
+    assert threads[0].startswith('slow-lane') and threads[3].startswith('slow-lane')
+    assert not threads[1].startswith('slow-lane') and not threads[2].startswith('slow-lane')
+    assert lane.metrics()['completed'] == 2 and lane.metrics()['inflight'] == 0
+    lane.shutdown()
+
+def test_saturated_lane_rejects_and_times_out_without_blocking_fast_routes():
+    gate, calls = threading.Event(), []
+    lane = SlowLane(make_app(gate, calls), ['/slow'], workers=1, max_pending=0, timeout=0.1)
+    r = call(lane, '/slow')
+    assert r['status'].startswith('504')
+    busy = call(lane, '/slow')
+    assert busy['status'].startswith('503') and 'Retry-After' in busy['headers']
+    assert json.loads(busy['body'])['error']
+    assert call(lane, '/fast')['status'] == '200 OK'
+    gate.set()
+    lane.shutdown()
+    stats = lane.metrics()
+    assert stats['timeouts'] == 1 and stats['rejected'] == 1 and stats['completed'] == 1 and stats['inflight'] == 0
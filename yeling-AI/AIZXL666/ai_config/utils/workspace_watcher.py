@@ -0,0 +1,110 @@
+"""Stdlib-only workspace watcher: polls stat snapshots and delivers debounced batches of changed paths."""
+import os, time, threading, logging
+class WorkspaceWatcher:
+    """轮询式文件监听（无第三方依赖，跨平台）。
+
+    每 interval 秒比较一次 (mtime_ns, size) 快照；事件先累积，静默 debounce 秒后
+    或累积到 max_batch 个路径时，以 on_batch(changed, removed) 批量回调。
+    """
+    def __init__(self, roots, on_batch, interval=1.0, debounce=0.5, max_batch=5000, suffixes=None, settings=None):
+        from .ignore_rules import load_ignore_rules
+        self.roots = [str(r) for r in roots]
+        # 被忽略的目录（.git、虚拟环境、scanner.exclude 等）不参与快照
+        self.rules = {r: load_ignore_rules(r, settings) for r in self.roots}
+        self.on_batch = on_batch
+        self.interval = interval
+        self.debounce = debounce
+        self.max_batch = max_batch
+        self.suffixes = tuple(suffixes) if suffixes else None
+        self.logger = logging.getLogger(__name__)
+        self._snapshot = None
+        self._pending_changed = set()
+        self._pending_removed = set()
+        self._last_event = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self.stats = {'polls': 0, 'batches': 0, 'events': 0}
+    def snapshot(self):
+        snap = {}
+        for root in self.roots:
+            rules = self.rules[root]
+            stack = [root]
+            while stack:
+                d = stack.pop()
+                try:
+                    with os.scandir(d) as it:
+                        entries = list(it)
+                except OSError:
+                    continue
+                # 与 ignore_rules.walk / walk_files 一致：先加载本目录的 .gitignore，扫描器跳过的路径不产生事件
+                if rules.gitignore and any(e.name == '.gitignore' for e in entries):
+                    rules.load_gitignore(d)
+                for e in entries:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            if not rules.ignored(e.path, True): stack.append(e.path)
+                            continue
+                        if self.suffixes and not e.name.endswith(self.suffixes): continue
+                        if rules.ignored(e.path, False): continue
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    snap[e.path] = (st.st_mtime_ns, st.st_size)
+        return snap
+    def poll(self):
+        """比较快照，把差异放入待发送队列；返回本次检测到的事件数"""
+        snap = self.snapshot()
+        self.stats['polls'] += 1
+        if self._snapshot is None:
+            self._snapshot = snap
+            return 0
+        old = self._snapshot
+        changed = [p for p, v in snap.items() if old.get(p) != v]
+        removed = [p for p in old if p not in snap]
+        self._snapshot = snap
+        if changed or removed:
+            self._pending_changed.update(changed)
+            self._pending_changed.difference_update(removed)
+            self._pending_removed.update(removed)
+            self._pending_removed.difference_update(changed)
+            self._last_event = time.monotonic()
+            self.stats['events'] += len(changed) + len(removed)
+        return len(changed) + len(removed)
+    def flush(self, force=False):
+        """满足防抖条件时发送一批事件；返回是否发送"""
+        pending = len(self._pending_changed) + len(self._pending_removed)
+        if not pending: return False
+        quiet = time.monotonic() - self._last_event >= self.debounce
+        if not (force or quiet or pending >= self.max_batch): return False
+        changed, self._pending_changed = sorted(self._pending_changed), set()
+        removed, self._pending_removed = sorted(self._pending_removed), set()
+        self.stats['batches'] += 1
+        try:
+            self.on_batch(changed, removed)
+        except Exception as e:
+            self.logger.error(f'watcher batch callback failed: {e}')
+        return True
+    def _loop(self):
+        while not self._stop.is_set():
+            self.poll()
+            self.flush()
+            # 有待发送事件时按防抖间隔醒来，否则按轮询间隔
+            wait = self.debounce if (self._pending_changed or self._pending_removed) else self.interval
+            self._stop.wait(min(wait, self.interval))
+    def start(self):
+        if self._thread: return self
+        if self._snapshot is None:
+            self._snapshot = self.snapshot()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='workspace-watcher')
+        self._thread.start()
+        return self
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush(force=True)
+
+if __name__ == "__main__":
+    print("WorkspaceWatcher 仅作为模块使用，不建议直接运行。")
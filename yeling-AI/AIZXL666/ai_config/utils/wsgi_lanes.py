@@ -0,0 +1,136 @@
+"""
+WSGI 慢接口隔离 - 耗时接口在独立线程池中执行，并发、排队与等待时间都有上限，快速接口的连接线程不会被它们占满
+"""
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Dict, Iterable, List, Tuple
+
+def parse_routes(routes: Iterable[str]) -> List[Tuple[str, str]]:
+    """'/structure' 或 'POST /pipeline' -> [(方法或 '*', 路径)]"""
+    out = []
+    for r in routes:
+        parts = r.split(None, 1)
+        out.append((parts[0].upper(), parts[1]) if len(parts) == 2 else ('*', parts[0]))
+    return out
+
+class SlowLane:
+    """包装 WSGI 应用：匹配 routes 的请求交给 workers 个线程的专用线程池执行。
+
+    - 执行中 + 排队的慢请求达到 workers + max_pending 时直接返回 503（带 Retry-After），
+      因此慢请求最多占用这么多个连接线程，其余线程始终留给快速接口；
+    - 连接线程最多等待 timeout 秒，超时返回 504；线程无法被强行终止，超时的请求仍在后台执行完毕，
+      在此之前继续占用慢接口的名额；
+    - 请求体在连接线程中先完整读入内存，工作线程不直接读写套接字。
+    """
+    def __init__(self, app, routes: Iterable[str], workers: int = 2, max_pending: int = 4, timeout: float = 120.0,
+                 retry_after: int = 5):
+        self.app = app
+        self.routes = parse_routes(routes)
+        self.workers = max(1, int(workers))
+        self.max_pending = max(0, int(max_pending))
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='slow-lane')
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self.stats: Dict[str, int] = {'slow_requests': 0, 'completed': 0, 'rejected': 0, 'timeouts': 0, 'errors': 0}
+        self.logger = logging.getLogger(__name__)
+
+    def is_slow(self, environ) -> bool:
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD', 'GET')
+        return any((m == '*' or m == method) and (path == p or path.startswith(p.rstrip('/') + '/')) for m, p in self.routes)
+
+    def __call__(self, environ, start_response):
+        if not self.is_slow(environ):
+            return self.app(environ, start_response)
+        with self._lock:
+            self.stats['slow_requests'] += 1
+            if self._inflight >= self.workers + self.max_pending:
+                self.stats['rejected'] += 1
+                return self._error(start_response, '503 Service Unavailable', '慢接口繁忙，请稍后重试',
+                                   [('Retry-After', str(self.retry_after))])
+            self._inflight += 1
+        try:
+            environ = self._buffer_body(environ)
+            future = self._executor.submit(self._run, environ)
+        except Exception:
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+        try:
+            status, headers, body = future.result(timeout=self.timeout)
+        except FutureTimeout:
+            with self._lock:
+                self.stats['timeouts'] += 1
+            return self._error(start_response, '504 Gateway Timeout', f'请求处理超过 {self.timeout} 秒')
+        except Exception as e:
+            self.logger.exception('slow lane request failed')
+            return self._error(start_response, '500 Internal Server Error', str(e))
+        start_response(status, headers)
+        return [body]
+
+    def _finished(self, future):
+        with self._lock:
+            self._inflight -= 1
+            if future is not None:
+                self.stats['completed' if future.exception() is None else 'errors'] += 1
+
+    @staticmethod
+    def _buffer_body(environ):
+        environ = dict(environ)
+        try:
+            length = int(environ.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        stream = environ.get('wsgi.input')
+        if stream is None:
+            data = b''
+        elif length > 0:
+            data = stream.read(length)
+        elif environ.get('wsgi.input_terminated'):
+            data = stream.read()
+        else:
+            data = b''
+        environ['wsgi.input'] = io.BytesIO(data)
+        environ['CONTENT_LENGTH'] = str(len(data))
+        return environ
+
+    def _run(self, environ):
+        """在工作线程中执行应用，收齐响应后交回连接线程发送"""
+        captured = {}
+        chunks: List[bytes] = []
+        def start_response(status, headers, exc_info=None):
+            captured['status'] = status
+            captured['headers'] = headers
+            return chunks.append
+        result = self.app(environ, start_response)
+        try:
+            for chunk in result:
+                chunks.append(chunk)
+        finally:
+            close = getattr(result, 'close', None)
+            if close is not None:
+                close()
+        body = b''.join(chunks)
+        headers = [(k, v) for k, v in captured['headers'] if k.lower() != 'content-length']
+        headers.append(('Content-Length', str(len(body))))
+        return captured['status'], headers, body
+
+    def _error(self, start_response, status, message, extra_headers=()):
+        body = json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+        start_response(status, [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))] + list(extra_headers))
+        return [body]
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self.stats, inflight=self._inflight, workers=self.workers, max_pending=self.max_pending)
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+if __name__ == "__main__":
+    print("SlowLane 仅作为模块使用，不建议直接运行。")